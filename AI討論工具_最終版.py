@@ -8,16 +8,16 @@ AI 多窗口集中討論工具（最終版）
 - Windows / macOS 雙平台相容
 """
 
+import time
+_STARTUP_T0 = time.perf_counter()   # 啟動計時起點（見 _log_startup_timing）
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import os
 import sys
-import json
-import re
 import hashlib
-import subprocess
-import shutil
-import traceback
+import platform
+import threading
 from datetime import datetime
 
 IS_WIN = sys.platform == 'win32'
@@ -37,26 +37,42 @@ if IS_WIN:
 from ttkbootstrap import Style
 from ttkbootstrap.constants import *
 import ttkbootstrap as ttkb
-
-DESKTOP = os.path.join(os.path.expanduser("~"), "Desktop")
-HOME_DIR = os.path.expanduser("~")
-APPDATA_ROOT = os.getenv("APPDATA") or os.path.join(HOME_DIR, "AppData", "Roaming")
-APP_SUPPORT_DIR = os.path.join(APPDATA_ROOT, "AIDiscussTool")
-APP_NAME = "AI 多窗口集中討論工具"
-CONFIG_NAME = "AI討論工具_config.json"
-CONFIG_FILE = os.path.join(APP_SUPPORT_DIR, CONFIG_NAME)
-LEGACY_DESKTOP_CONFIG_FILE = os.path.join(DESKTOP, CONFIG_NAME)
-ERROR_LOG_FILE = os.path.join(APP_SUPPORT_DIR, "AI討論工具_error.log")
-TEXT_READ_ENCODINGS = ("utf-8", "utf-8-sig", "cp950", "cp936")
-INVALID_FS_CHARS_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
-WINDOWS_RESERVED_NAMES = {
-    "CON", "PRN", "AUX", "NUL",
-    "COM1", "COM2", "COM3", "COM4", "COM5", "COM6", "COM7", "COM8", "COM9",
-    "LPT1", "LPT2", "LPT3", "LPT4", "LPT5", "LPT6", "LPT7", "LPT8", "LPT9",
-}
+from ai_discuss import (
+    ACCUMULATED_NAME, APP_SUPPORT_DIR, DESKTOP, ERROR_LOG_FILE, LEGACY_TOPIC_KEYS, PERF, RoundSaveWriter,
+    SEARCH_INDEX_FILE, SEARCH_RESULT_LIMIT, STORAGE_BACKENDS, SearchIndex, record_exception, run_round_save_job,
+    topic_folder_name, write_text_file, build_search_index, detect_storage_backend, dump_config,
+    dump_topic_meta, export_round_store, load_config, load_topic_meta, open_round_store, perf_timed,
+    save_topic_meta, write_config_text, write_topic_meta_text,
+)
+_STARTUP_IMPORTED = time.perf_counter()
+
+AI_SLOT_HEIGHT_ESTIMATE = 120   # AI 面板尚未建立時佔位框的預估高度（像素）
+# 大量文字模式：超過門檻的內容先放第一屏，其餘分段背景填入
+LARGE_TEXT_THRESHOLD = 200_000   # 字元
+LARGE_TEXT_FIRST_CHUNK = 8_000
+LARGE_TEXT_CHUNK = 32_000
+LARGE_TEXT_CHUNK_DELAY_MS = 10
 
 ICON_NAME_ICO = "玻璃球.ico"
 ICON_NAME_ICNS = "玻璃球.icns"
+STARTUP_LOG_FILE = os.path.join(APP_SUPPORT_DIR, "AI討論工具_startup.log")
+STARTUP_LOG_KEEP_LINES = 200
+PERF_REFRESH_MS = 1000
+# 設定變更後延遲多久才寫檔；期間的多次修改合併成一次背景寫入（關閉程式時強制寫入）
+CONFIG_SAVE_DELAY_MS = 500
+# 效能診斷視窗顯示的操作名稱；未列出的直接顯示記錄名稱
+PERF_OP_LABELS = {
+    "load_topic": "載入主題",
+    "goto_round": "切換輪次",
+    "build_round_ui": "建立輪次畫面",
+    "submit_round": "送出（UI）",
+    "commit_round": "存檔（背景）",
+    "rebuild_accumulated": "重建累積紀錄",
+    "update_accumulated": "更新累積紀錄",
+    "persist_config": "設定變更",
+    "write_config": "寫入設定檔（背景）",
+    "search": "全文搜尋",
+}
 
 
 def resource_path(relative_path: str) -> str:
@@ -68,246 +84,28 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base, relative_path)
 
 
-def _dedupe_paths(paths):
-    unique = []
-    seen = set()
-    for path in paths:
-        norm = os.path.normcase(os.path.abspath(path))
-        if norm in seen:
-            continue
-        seen.add(norm)
-        unique.append(path)
-    return unique
-
-
-def _config_candidates():
-    if getattr(sys, 'frozen', False):
-        runtime_dir = os.path.dirname(os.path.abspath(sys.executable))
-    else:
-        runtime_dir = os.path.dirname(os.path.abspath(__file__))
-    legacy_dir = os.path.join(DESKTOP, "AI討論工具")
-    return _dedupe_paths([
-        CONFIG_FILE,
-        LEGACY_DESKTOP_CONFIG_FILE,
-        os.path.join(runtime_dir, CONFIG_NAME),
-        os.path.join(legacy_dir, CONFIG_NAME),
-    ])
-
-
-def _is_primary_config(path):
-    return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(CONFIG_FILE))
-
-
-def _backup_corrupt_config(path):
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
-    bad = os.path.join(APP_SUPPORT_DIR, f"AI討論工具_config_corrupt_{ts}.bin")
-    try:
-        shutil.copy2(path, bad)
-    except OSError:
-        pass
-
-
-def _normalize_config(cfg):
-    if not isinstance(cfg, dict):
-        raise ValueError("Config root must be a JSON object.")
-    if "topics" not in cfg or not isinstance(cfg["topics"], dict):
-        cfg["topics"] = {}
-    if "last_topic" not in cfg or not isinstance(cfg["last_topic"], str):
-        cfg["last_topic"] = ""
-    return cfg
-
-
-def load_config():
-    default_cfg = {"topics": {}, "last_topic": ""}
-    saw_primary_error = False
-
-    for path in _config_candidates():
-        if not os.path.exists(path):
-            continue
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                cfg = _normalize_config(json.load(f))
-            if not _is_primary_config(path):
-                try:
-                    save_config(cfg)
-                except OSError:
-                    pass
-            return cfg
-        except (json.JSONDecodeError, UnicodeDecodeError, OSError, ValueError):
-            _record_exception(f"讀取設定檔失敗：{path}")
-            if _is_primary_config(path):
-                saw_primary_error = True
-            _backup_corrupt_config(path)
-
-    if saw_primary_error:
-        try:
-            save_config(default_cfg)
-        except OSError:
-            pass
-    return default_cfg
-
-
-def save_config(cfg):
-    os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
-    temp_file = CONFIG_FILE + ".tmp"
-    try:
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(temp_file, CONFIG_FILE)
-    finally:
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except OSError:
-                pass
-
-
-def _append_error_log(block):
+def _append_startup_log(line):
+    """啟動計時一行一筆，只保留最近 STARTUP_LOG_KEEP_LINES 筆"""
     try:
         os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
-        with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(block.rstrip() + "\n")
-            f.write("-" * 80 + "\n")
+        lines = []
+        if os.path.exists(STARTUP_LOG_FILE):
+            with open(STARTUP_LOG_FILE, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        lines = lines[-(STARTUP_LOG_KEEP_LINES - 1):] + [line]
+        with open(STARTUP_LOG_FILE, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
     except OSError:
         pass
 
 
-def _record_exception(context, exc_info=None, extra=None):
-    if exc_info is None:
-        exc_info = sys.exc_info()
-    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    lines = [f"[{stamp}] {context}"]
-    if extra:
-        lines.append(str(extra))
-    if exc_info and exc_info[0] is not None:
-        lines.extend("".join(traceback.format_exception(*exc_info)).rstrip().splitlines())
-    _append_error_log("\n".join(lines))
-
-
-def _safe_fs_component(name, fallback="未命名", limit=80):
-    raw = (name or "").strip()
-    sanitized = INVALID_FS_CHARS_RE.sub("_", raw)
-    sanitized = re.sub(r"\s+", " ", sanitized).rstrip(" .")
-    if not sanitized:
-        sanitized = fallback
-
-    trimmed = sanitized[:limit].rstrip(" .") or fallback
-    if trimmed.upper() in WINDOWS_RESERVED_NAMES:
-        trimmed += "_"
-
-    changed = (trimmed != raw) or (sanitized != raw)
-    if changed and raw:
-        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
-        base = trimmed[:max(8, limit - 9)].rstrip(" .") or fallback
-        trimmed = f"{base}_{digest}"
-    return trimmed
-
-
-def _topic_folder_name(topic_name):
-    return _safe_fs_component(topic_name, fallback="未命名主題")
-
-
-def _ai_reply_filename(ai_name):
-    return f"{_safe_fs_component(ai_name, fallback='AI')}_回覆.txt"
-
-
-def _ai_reply_path_candidates(folder, ai_name):
-    return _dedupe_paths([
-        os.path.join(folder, f"{ai_name}_回覆.txt"),
-        os.path.join(folder, _ai_reply_filename(ai_name)),
-    ])
-
-
-def _read_text_file(path, default=""):
-    if not os.path.exists(path):
-        return default
-
-    for encoding in TEXT_READ_ENCODINGS:
-        try:
-            with open(path, "r", encoding=encoding) as f:
-                return f.read()
-        except UnicodeDecodeError:
-            continue
-        except OSError:
-            _record_exception(f"讀取檔案失敗：{path}")
-            return default
-
-    try:
-        with open(path, "r", encoding="utf-8", errors="replace") as f:
-            return f.read()
-    except OSError:
-        _record_exception(f"讀取檔案失敗：{path}")
-        return default
-
-
-def _write_text_file(path, text):
-    folder = os.path.dirname(path)
-    if folder:
-        os.makedirs(folder, exist_ok=True)
-
-    temp_file = path + ".tmp"
-    try:
-        with open(temp_file, "w", encoding="utf-8") as f:
-            f.write(text)
-            f.flush()
-            os.fsync(f.fileno())
-        os.replace(temp_file, path)
-    finally:
-        if os.path.exists(temp_file):
-            try:
-                os.remove(temp_file)
-            except OSError:
-                pass
-
-
-def scan_max_round(topic_folder):
-    if not os.path.isdir(topic_folder):
-        return 0
-    mx = 0
-    try:
-        names = os.listdir(topic_folder)
-    except OSError:
-        _record_exception(f"掃描輪次資料夾失敗：{topic_folder}")
-        return 0
-
-    for name in names:
-        m = re.match(r"^第(\d+)輪$", name)
-        if m and os.path.isdir(os.path.join(topic_folder, name)):
-            mx = max(mx, int(m.group(1)))
-    return mx
-
-
-def read_round_files(topic_folder, round_num, ai_list):
-    rn = f"第{round_num}輪"
-    folder = os.path.join(topic_folder, rn)
-    question = ""
-    responses = {}
-    q_path = os.path.join(folder, "提問.txt")
-    if os.path.exists(q_path):
-        question = _read_text_file(q_path, default="")
-    for ai in ai_list:
-        ai_file = next((path for path in _ai_reply_path_candidates(folder, ai["name"]) if os.path.exists(path)), "")
-        if ai_file:
-            lines = _read_text_file(ai_file, default="").splitlines(True)
-            content_lines = []
-            past_header = False
-            for line in lines:
-                if past_header:
-                    content_lines.append(line)
-                elif line.startswith("-" * 10) or line.startswith("=" * 10):
-                    past_header = True
-            responses[ai["name"]] = "".join(content_lines).strip()
-    return question, responses
-
-
 class App:
     THEMES = {"Cosmo 清爽": "cosmo", "Darkly 暗黑": "darkly",
               "Flatly 扁平": "flatly", "Minty 薄荷": "minty"}
 
     def __init__(self):
+        # 分段計時：(階段, perf_counter)；首次繪製後寫入 STARTUP_LOG_FILE
+        self._startup_marks = [("載入模組", _STARTUP_IMPORTED)]
         self.cfg = load_config()
         if "topics" not in self.cfg:
             self.cfg = {"topics": {}, "last_topic": ""}
@@ -322,7 +120,13 @@ class App:
         self._runtime_error_open = False
         self._install_exception_handlers()
         self._set_dark_titlebar(saved_theme)
-        self._setup_icon()
+        self._set_app_user_model_id()
+        self._config_writer = RoundSaveWriter(name="config-writer")
+        self._config_flush_after = None
+        self._config_dirty = False
+        self._config_report_errors = False
+        self._config_poll_pending = False
+        self._mark_startup("建立視窗")
 
         self.topic_var = tk.StringVar()
         self.topic_root_var = tk.StringVar(value=DESKTOP)
@@ -330,6 +134,8 @@ class App:
         self.viewing_round = 0
         self.max_round = 0
         self.topic_folder = ""
+        self._topic_meta = None   # 目前主題的 topic.json 內容（見 ai_discuss.topics）
+        self._store = None
 
         self._settings_visible = False
         prefs = self.cfg.get("prefs", {})
@@ -337,6 +143,9 @@ class App:
         self._auto_advance = tk.BooleanVar(value=prefs.get("auto_advance", False))
         self._no_full_record = tk.BooleanVar(value=prefs.get("no_full_record", False))
         self._only_full_record = tk.BooleanVar(value=prefs.get("only_full_record", False))
+        self._storage_backend = prefs.get("storage_backend", "files")
+        if self._storage_backend not in STORAGE_BACKENDS:
+            self._storage_backend = "files"
         # 防呆：若兩個互斥開關都為 True，會導致不產生任何檔案，直接回退為正常輸出
         if self._no_full_record.get() and self._only_full_record.get():
             self._no_full_record.set(False)
@@ -346,6 +155,16 @@ class App:
             self.cfg["prefs"] = prefs
             self._persist_config(silent=True)
         self._focused_text = None
+        self._round_view = None   # 常駐輪次畫面（見 _ensure_round_view）
+        self.ai_text_widgets = []   # 每位 AI 一個欄位；未捲到的欄位只有佔位框，widget 為 None
+        self._slot_height_estimate = AI_SLOT_HEIGHT_ESTIMATE
+        self._realize_slots_pending = False
+        self._text_streams = {}   # Text 元件 -> 分段填入中的完整內容（見 _load_text）
+        self._search_index = None
+        self._search_index_failed = False
+        self._search_build_thread = None
+        self._search_build_progress = {}
+        self._search_build_cancel = threading.Event()
 
         current_theme = self.cfg.get("theme", "cosmo")
         current_display = next((k for k, v in self.THEMES.items() if v == current_theme), "Cosmo 清爽")
@@ -358,15 +177,61 @@ class App:
         self._canned   = tpl.get("canned", [])      # [{"name":..,"text":..}]
         self._use_opening = tk.BooleanVar(value=tpl.get("use_opening", False))
         self._use_closing = tk.BooleanVar(value=tpl.get("use_closing", False))
+        # 未儲存偵測只保留各欄位內容的摘要；鍵為 ("question", "") 或 ("ai", 名稱)
         self._saved_snapshot_round = 0
-        self._saved_snapshot_question = ""
-        self._saved_snapshot_replies = {}
+        self._saved_snapshot_digests = {}
+        self._current_digests = {}
+        self._dirty_text_keys = set()
         self._current_round_has_saved_content = False
         self._round_status_refresh_pending = False
+        self._writer = RoundSaveWriter()
+        self._round_save_states = {}   # (主題資料夾, 輪次) -> "pending" / "saved" / "failed"
+        self._writer_poll_pending = False
         self._build_ui()
-        self._load_last_session()
+        self._mark_startup("建立介面")
         self._bind_keyboard_shortcuts()
         self.root.protocol("WM_DELETE_WINDOW", self._on_app_close)
+        # 先讓 mainloop 畫出視窗外框，再還原上次主題、載入圖示（見 _on_first_idle）
+        self._safe_after_idle(self.root, self._on_first_idle, "啟動後續載入")
+
+    # ── 分段啟動 ──
+    def _mark_startup(self, label):
+        self._startup_marks.append((label, time.perf_counter()))
+
+    def _on_first_idle(self):
+        self._mark_startup("首次繪製")
+        # 隔一輪事件迴圈，讓視窗的 Expose 先處理完再做耗時的還原
+        self._safe_after(self.root, 1, self._startup_restore_session, "還原上次主題")
+
+    def _startup_restore_session(self):
+        # 使用者若已在還原前自行切換主題，就不再覆蓋
+        if not self.topic_folder:
+            self._load_last_session()
+        else:
+            self._refresh_topic_combo()
+        self._mark_startup("還原主題")
+        self._safe_after_idle(self.root, self._startup_load_icon, "載入視窗圖示")
+
+    def _startup_load_icon(self):
+        self._setup_icon()
+        self._mark_startup("視窗圖示")
+        self._log_startup_timing()
+
+    def _log_startup_timing(self):
+        parts = []
+        prev = _STARTUP_T0
+        first_paint = None
+        for label, t in self._startup_marks:
+            parts.append(f"{label} {(t - prev) * 1000:.0f}ms")
+            if label == "首次繪製":
+                first_paint = t
+            prev = t
+        stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        summary = f"合計 {(prev - _STARTUP_T0) * 1000:.0f}ms"
+        if first_paint is not None:
+            summary = f"首次繪製 {(first_paint - _STARTUP_T0) * 1000:.0f}ms，" + summary
+        frozen = "（打包版，不含解壓時間）" if getattr(sys, "frozen", False) else ""
+        _append_startup_log(f"[{stamp}] {' / '.join(parts)}｜{summary}{frozen}")
 
     def _install_exception_handlers(self):
         self.root.report_callback_exception = self._report_callback_exception
@@ -380,7 +245,7 @@ class App:
         self._handle_runtime_exception("程式發生未處理錯誤", (exc, val, tb), parent=None)
 
     def _handle_runtime_exception(self, context, exc_info=None, parent="root"):
-        _record_exception(context, exc_info=exc_info)
+        record_exception(context, exc_info=exc_info)
         if self._runtime_error_open:
             return
 
@@ -420,7 +285,7 @@ class App:
         try:
             widget.destroy()
         except Exception:
-            _record_exception("關閉視窗失敗")
+            record_exception("關閉視窗失敗")
 
     def _safe_after(self, widget, delay_ms, callback, context):
         if not self._widget_alive(widget):
@@ -458,19 +323,85 @@ class App:
             self._handle_runtime_exception(f"排程失敗：{context}", sys.exc_info())
             return None
 
-    def _persist_config(self, silent=False, parent=None):
-        try:
-            save_config(self.cfg)
-            return True
-        except Exception:
-            _record_exception("儲存設定檔失敗")
-            if not silent:
-                self._handle_runtime_exception(
-                    "無法寫入設定檔",
-                    sys.exc_info(),
-                    parent=parent if parent is not None else "root"
-                )
-            return False
+    # ── 設定檔延遲寫入 ──
+    @perf_timed("persist_config")
+    def _persist_config(self, silent=False):
+        """標記設定已變更；CONFIG_SAVE_DELAY_MS 後才序列化並交給背景執行緒寫檔。
+
+        連續修改只會寫一次。寫入失敗在背景結果回來時才回報（silent=False 的變更
+        才會跳出錯誤視窗），呼叫端無法在這裡得知成敗。
+        """
+        self._config_dirty = True
+        if not silent:
+            self._config_report_errors = True
+        if self._config_flush_after is None and not self._closing:
+            self._config_flush_after = self._safe_after(
+                self.root, CONFIG_SAVE_DELAY_MS, self._flush_config, "寫入設定檔")
+
+    def _flush_config(self, wait=False):
+        """把目前的 cfg 交給背景寫檔；wait=True 時等到寫完（關閉程式用）"""
+        if self._config_flush_after is not None:
+            try:
+                self.root.after_cancel(self._config_flush_after)
+            except Exception:
+                pass
+            self._config_flush_after = None
+        if self._config_dirty:
+            report = self._config_report_errors
+            self._config_dirty = False
+            self._config_report_errors = False
+            try:
+                # 在 UI 執行緒序列化，背景只負責寫檔與 fsync，不會讀到改到一半的 cfg
+                text = dump_config(self.cfg)
+            except Exception:
+                record_exception("序列化設定檔失敗")
+                if report:
+                    self._handle_runtime_exception("無法寫入設定檔", sys.exc_info())
+                return
+            self._config_writer.submit("config", {"text": text, "report": report, "context": "無法寫入設定檔"},
+                                       lambda payload: write_config_text(payload["text"]))
+        if wait:
+            self._config_writer.wait_idle()
+            self._process_config_results()
+        else:
+            self._schedule_config_poll()
+
+    def _persist_topic_meta(self):
+        """把目前主題的 topic.json 交給背景寫檔（同一主題連續修改只寫最後一次）"""
+        if self._topic_meta is None or not self.topic_folder:
+            return
+        payload = {
+            "folder": self.topic_folder,
+            "text": dump_topic_meta(self._topic_meta),
+            "report": True,
+            "context": f"無法寫入主題設定：{self.topic_folder}",
+        }
+        self._config_writer.submit(("topic", self.topic_folder), payload,
+                                   lambda p: write_topic_meta_text(p["folder"], p["text"]))
+        self._schedule_config_poll()
+
+    def _schedule_config_poll(self):
+        if self._config_poll_pending:
+            return
+        self._config_poll_pending = True
+
+        def _run():
+            self._config_poll_pending = False
+            self._process_config_results()
+            if self._config_writer.busy():
+                self._schedule_config_poll()
+
+        if self._safe_after(self.root, 50, _run, "處理設定檔寫入結果") is None:
+            self._config_poll_pending = False
+
+    def _process_config_results(self):
+        for _key, payload, _result, exc_info in self._config_writer.drain_results():
+            if not exc_info:
+                continue
+            if payload["report"] and not self._closing:
+                self._handle_runtime_exception(payload["context"], exc_info)
+            else:
+                record_exception(payload["context"], exc_info)
 
     def _ensure_dir(self, path, context):
         try:
@@ -482,15 +413,12 @@ class App:
 
     def _write_text_safely(self, path, text, context):
         try:
-            _write_text_file(path, text)
+            write_text_file(path, text)
             return True
         except Exception:
             self._handle_runtime_exception(f"{context}：{path}", sys.exc_info())
             return False
 
-    def _reply_file_path(self, folder, ai_name):
-        return os.path.join(folder, _ai_reply_filename(ai_name))
-
     def _bind_keyboard_shortcuts(self):
         """鍵盤快捷鍵（參考 report_tool 模式）"""
         def _on_ctrl_enter(e):
@@ -510,6 +438,10 @@ class App:
         self.root.bind('<Control-n>', _on_ctrl_n)
         self.root.bind('<Control-N>', _on_ctrl_n)
         self.root.bind('<Escape>', _on_escape)
+        self.root.bind('<Control-f>', lambda e: (self._show_search_dialog(), 'break')[1])
+        self.root.bind('<Control-F>', lambda e: (self._show_search_dialog(), 'break')[1])
+        # 隱藏的效能診斷視窗（使用者回報變慢時請他們匯出）
+        self.root.bind('<Control-Shift-D>', lambda e: (self._show_perf_dialog(), 'break')[1])
 
     # ═══════════════════════════════════════════════════════
     #  UI
@@ -619,6 +551,8 @@ class App:
                      bootstyle="info-outline").pack(side="right", padx=2)
         ttkb.Button(ctrl_row, text="模板", command=self._show_template_dialog,
                      bootstyle="info-outline").pack(side="right", padx=2)
+        ttkb.Button(ctrl_row, text="🔍 搜尋", command=self._show_search_dialog,
+                     bootstyle="info-outline").pack(side="right", padx=2)
 
         # ── 討論區（捲動）──
         self.frm_outer = ttkb.Frame(main)
@@ -633,9 +567,13 @@ class App:
         self.frm_discuss.bind("<Configure>",
                                lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
         self.canvas_win = self.canvas.create_window((0, 0), window=self.frm_discuss, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-        self.canvas.bind("<Configure>",
-                          lambda e: self.canvas.itemconfig(self.canvas_win, width=e.width))
+        self.canvas.configure(yscrollcommand=self._on_canvas_yscroll)
+
+        def _on_canvas_configure(event):
+            self.canvas.itemconfig(self.canvas_win, width=event.width)
+            self._schedule_realize_slots()
+
+        self.canvas.bind("<Configure>", _on_canvas_configure)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
@@ -767,7 +705,7 @@ class App:
         dlg = tk.Toplevel(self.root)
         dlg.withdraw()
         dlg.title("設定")
-        dlg.geometry("420x360")
+        dlg.geometry("460x460")
         dlg.resizable(False, False)
         dlg.transient(self.root)
         dlg.grab_set()
@@ -806,6 +744,30 @@ class App:
                           command=_on_only_full,
                           bootstyle="round-toggle").pack(**pad)
 
+        # ── 儲存格式 ──
+        ttkb.Label(dlg, text="儲存格式", font=("Microsoft JhengHei", 11, "bold")).pack(padx=12, pady=(12, 4), anchor="w")
+        ttkb.Separator(dlg).pack(fill="x", padx=10)
+
+        row_store = ttkb.Frame(dlg)
+        row_store.pack(fill="x", padx=12, pady=6)
+        ttkb.Label(row_store, text="新主題：").pack(side="left")
+        storage_var = tk.StringVar(value=STORAGE_BACKENDS[self._storage_backend])
+        combo_store = ttkb.Combobox(row_store, textvariable=storage_var,
+                                    values=list(STORAGE_BACKENDS.values()), state="readonly", width=15)
+        combo_store.pack(side="left", padx=3)
+
+        def _on_storage_selected(event=None):
+            label = storage_var.get()
+            self._storage_backend = next((k for k, v in STORAGE_BACKENDS.items() if v == label), "files")
+        combo_store.bind("<<ComboboxSelected>>", _on_storage_selected)
+
+        btn_export = ttkb.Button(row_store, text="匯出目前主題為資料夾格式",
+                                 command=lambda: self._export_current_topic(parent=dlg),
+                                 bootstyle="info-outline")
+        btn_export.pack(side="left", padx=5)
+        if not self._store or self._store.backend != "sqlite":
+            btn_export.config(state="disabled")
+
         # ── 外觀主題 ──
         ttkb.Label(dlg, text="外觀主題", font=("Microsoft JhengHei", 11, "bold")).pack(padx=12, pady=(12, 4), anchor="w")
         ttkb.Separator(dlg).pack(fill="x", padx=10)
@@ -821,8 +783,7 @@ class App:
 
         # 關閉
         def _close_settings():
-            if not self._save_prefs():
-                return
+            self._save_prefs()
             self._safe_destroy(dlg)
         btn_close = ttkb.Button(dlg, text="關閉", command=_close_settings,
                                  bootstyle="secondary")
@@ -832,7 +793,7 @@ class App:
         dlg.bind('<Escape>', lambda e: _close_settings())
         dlg.bind('<Return>', lambda e: btn_close.invoke())
         dlg.bind('<KP_Enter>', lambda e: btn_close.invoke())
-        self._center_dialog(dlg, 420, 360)
+        self._center_dialog(dlg, 460, 460)
 
     def _switch_theme(self):
         display = self.theme_var.get()
@@ -842,14 +803,15 @@ class App:
             self.colors = self.style.colors
             if hasattr(self, "canvas"):
                 self.canvas.configure(bg=str(self.colors.bg))
+            self._restyle_round_view()
             self._set_dark_titlebar(theme)
         except Exception as e:
             messagebox.showerror("主題切換失敗", f"無法切換主題：\n{e}")
             return
         self.cfg["theme"] = theme
-        if not self._persist_config():
-            return
-        messagebox.showinfo("主題已切換", f"已切換為「{display}」。")
+        self._persist_config()
+        # 設定檔在背景寫入，寫入失敗會另外跳出錯誤
+        messagebox.showinfo("主題已切換", f"已切換為「{display}」，設定稍後自動儲存。")
 
     def _save_templates(self):
         # 若啟用但無有效啟用項，自動關閉
@@ -866,7 +828,7 @@ class App:
             "use_opening": self._use_opening.get(),
             "use_closing": self._use_closing.get(),
         }
-        return self._persist_config()
+        self._persist_config()
 
     def _save_prefs(self):
         self.cfg["prefs"] = {
@@ -874,8 +836,9 @@ class App:
             "auto_advance": self._auto_advance.get(),
             "no_full_record": self._no_full_record.get(),
             "only_full_record": self._only_full_record.get(),
+            "storage_backend": self._storage_backend,
         }
-        return self._persist_config()
+        self._persist_config()
 
     def _resolve_placeholders(self, text):
         """將模板佔位符替換為實際路徑（加「」框）"""
@@ -913,8 +876,7 @@ class App:
 
         # 先 pack 底部按鈕，保證永遠可見
         def _on_close():
-            if not self._save_templates():
-                return
+            self._save_templates()
             self._safe_destroy(dlg)
             # 重新載入當前輪次 UI，保留未儲存草稿，讓罐頭按鈕即時更新
             self._refresh_current_round_preserve_draft()
@@ -1161,9 +1123,8 @@ class App:
         except Exception:
             pass
 
-    def _setup_icon(self):
-        """設定視窗圖示 + Windows 工作列 AppUserModelID"""
-        # Windows: 設定 AppUserModelID，讓工作列圖示獨立不與 Python 共用
+    def _set_app_user_model_id(self):
+        """Windows: 設定 AppUserModelID，讓工作列圖示獨立不與 Python 共用（須在視窗顯示前）"""
         if IS_WIN:
             try:
                 import ctypes
@@ -1172,6 +1133,8 @@ class App:
             except Exception:
                 pass
 
+    def _setup_icon(self):
+        """設定視窗圖示（PIL 縮圖較慢，啟動時延到首次繪製之後）"""
         # 優先用 PNG + wm_iconphoto（工作列/左上角都正確）
         icon_set = False
         try:
@@ -1222,8 +1185,8 @@ class App:
         except Exception:
             pass
 
-    def _bind_text_focus(self, txt_widget):
-        """為 ScrolledText 綁定焦點追蹤 + 貼上後自動移除焦點"""
+    def _bind_text_focus(self, txt_widget, dirty_key=None):
+        """為 ScrolledText 綁定焦點追蹤 + 貼上後自動移除焦點；dirty_key 用於未儲存偵測"""
         def _on_focus_in(event):
             self._focused_text = txt_widget
             txt_widget._paste_done = False
@@ -1240,8 +1203,14 @@ class App:
         def _on_modified(event):
             if txt_widget.edit_modified():
                 txt_widget.edit_modified(False)
+                if txt_widget in self._text_streams:
+                    # 分段填入造成的修改；_load_text 已標記過
+                    return
+                if dirty_key is not None:
+                    self._mark_text_dirty(dirty_key)
                 self._schedule_round_status_refresh()
 
+        txt_widget._dirty_key = dirty_key
         txt_widget.bind('<FocusIn>', _on_focus_in, add='+')
         txt_widget.bind('<FocusOut>', _on_focus_out, add='+')
         txt_widget.bind('<<Paste>>', _on_paste, add='+')
@@ -1262,7 +1231,7 @@ class App:
         folder = topic_info.get("folder", "") if isinstance(topic_info, dict) else ""
         folder = self._normalize_path(folder)
         if not folder:
-            folder = os.path.join(DESKTOP, _topic_folder_name(topic_name))
+            folder = os.path.join(DESKTOP, topic_folder_name(topic_name))
         return folder
 
     def _refresh_topic_combo(self):
@@ -1282,18 +1251,12 @@ class App:
         if p:
             self.topic_root_var.set(self._normalize_path(p).replace("/", "\\"))
 
-    def _load_topic(self, topic_name):
+    @perf_timed("load_topic")
+    def _load_topic(self, topic_name, preferred_storage="files"):
         t = (topic_name or "").strip()
         if not t:
             return
 
-        topics_cfg = self.cfg.setdefault("topics", {})
-        info = topics_cfg.get(t, {})
-        if not isinstance(info, dict):
-            info = {}
-        if "ai_list" not in info or not isinstance(info.get("ai_list"), list):
-            info["ai_list"] = []
-
         folder = self._topic_folder_of(t)
         try:
             os.makedirs(folder, exist_ok=True)
@@ -1301,17 +1264,44 @@ class App:
             messagebox.showerror("錯誤", f"無法建立或載入主題資料夾：\n{folder}\n\n{e}")
             return
 
-        info["folder"] = folder
-        topics_cfg[t] = info
+        # 詳細設定只在開啟時讀取；舊版設定檔的欄位在這裡搬進主題資料夾
+        meta, from_legacy = load_topic_meta(self.cfg, t, folder)
+        if meta["storage"] not in STORAGE_BACKENDS:
+            meta["storage"] = detect_storage_backend(folder, preferred_storage)
+            from_legacy = True
+        if from_legacy:
+            save_topic_meta(self.cfg, t, folder, meta)
+        else:
+            topics_cfg = self.cfg.setdefault("topics", {})
+            entry = topics_cfg.get(t)
+            entry = entry if isinstance(entry, dict) else {}
+            entry["folder"] = folder
+            for key in LEGACY_TOPIC_KEYS:
+                entry.pop(key, None)
+            topics_cfg[t] = entry
         self.cfg["last_topic"] = t
-        if not self._persist_config():
+        self._persist_config()
+
+        try:
+            store = open_round_store(folder, meta["storage"])
+            store.recover()
+        except Exception:
+            self._handle_runtime_exception(f"無法開啟主題資料：{folder}", sys.exc_info())
             return
+        if self._store is not None:
+            # 舊主題的儲存層排在它尚未寫完的存檔工作之後關閉（不在 UI 執行緒等待）
+            old_store = self._store
+            self._writer.submit(("close-store", id(old_store)), {"store": old_store},
+                                lambda payload: payload["store"].close())
+            self._schedule_writer_poll()
+        self._store = store
 
         self.topic_var.set(t)
         self.topic_folder = folder
+        self._topic_meta = meta
         self.topic_root_var.set((os.path.dirname(folder) or DESKTOP).replace("/", "\\"))
-        self.ai_list = info.get("ai_list", [])
-        self.max_round = scan_max_round(self.topic_folder)
+        self.ai_list = meta["ai_list"]
+        self.max_round = self._store.max_round()
         self._refresh_ai_list_display()
         self._refresh_topic_combo()
 
@@ -1336,7 +1326,7 @@ class App:
             messagebox.showerror("錯誤", f"無法建立主題根目錄：\n{root}\n\n{e}")
             return
 
-        folder = os.path.join(root, _topic_folder_name(t))
+        folder = os.path.join(root, topic_folder_name(t))
         if os.path.exists(folder) and not os.path.isdir(folder):
             messagebox.showerror("錯誤", f"建立失敗：目標不是資料夾\n{folder}")
             return
@@ -1345,12 +1335,10 @@ class App:
         info = topics_cfg.get(t, {})
         if not isinstance(info, dict):
             info = {}
-        if "ai_list" not in info or not isinstance(info.get("ai_list"), list):
-            info["ai_list"] = []
         info["folder"] = folder
         topics_cfg[t] = info
 
-        self._load_topic(t)
+        self._load_topic(t, preferred_storage=self._storage_backend)
 
     def _on_topic_selected(self, event=None):
         t = self.combo_topic.get().strip() if hasattr(self, "combo_topic") else ""
@@ -1412,12 +1400,18 @@ class App:
         info = topics_cfg.get(t, {})
         if not isinstance(info, dict):
             info = {}
-        info["ai_list"] = self.ai_list
-        if self.topic_folder:
-            info["folder"] = self.topic_folder
-        topics_cfg[t] = info
-        if not self._persist_config():
-            return
+        meta = self._topic_meta
+        if meta is not None and meta["topic"] == t and "ai_list" not in info:
+            # 只重寫這個主題的 topic.json，根設定檔不變
+            meta["ai_list"] = self.ai_list
+            self._persist_topic_meta()
+        else:
+            # 尚未開啟的主題，或主題資料夾無法寫入：暫存在根設定檔，開啟時再搬移
+            info["ai_list"] = self.ai_list
+            if self.topic_folder:
+                info["folder"] = self.topic_folder
+            topics_cfg[t] = info
+            self._persist_config()
         if self.topic_folder:
             if not self._ensure_dir(self.topic_folder, "建立主題資料夾失敗"):
                 return
@@ -1439,7 +1433,7 @@ class App:
     #  輪次導航
     # ═══════════════════════════════════════════════════════
     def _update_nav(self):
-        self.max_round = scan_max_round(self.topic_folder) if self.topic_folder else 0
+        self.max_round = self._store.max_round() if self._store else 0
         if hasattr(self, "btn_prev"):
             self.btn_prev.config(state="normal" if self.viewing_round > 1 else "disabled")
         if hasattr(self, "btn_next"):
@@ -1450,7 +1444,12 @@ class App:
             return
 
         rn = f"第{self.viewing_round}輪"
-        if self._has_unsaved_text_changes():
+        save_state = self._round_save_states.get(self._round_key(self.viewing_round))
+        if save_state == "pending":
+            self.lbl_round.config(text=f"⏳ {rn}（儲存中…）", fg="#9E9E9E")
+        elif save_state == "failed":
+            self.lbl_round.config(text=f"❌ {rn}（儲存失敗）", fg="#E74C3C")
+        elif self._has_unsaved_text_changes():
             self.lbl_round.config(text=f"✏️ {rn}（未儲存變更）", fg="#F39C12")
         elif self._current_round_has_saved_content:
             self.lbl_round.config(text=f"📖 {rn}（已儲存 ✔）", fg="#1565C0")
@@ -1486,22 +1485,26 @@ class App:
         if not self.ai_list:
             messagebox.showwarning("提示", "請先新增至少一個 AI 成員")
             return
-        self.max_round = scan_max_round(self.topic_folder)
+        self.max_round = self._store.max_round()
         new_n = self.max_round + 1
-        if not self._ensure_dir(os.path.join(self.topic_folder, f"第{new_n}輪"), "建立新輪次資料夾失敗"):
+        try:
+            self._store.create_round(new_n)
+        except Exception:
+            self._handle_runtime_exception(f"建立新輪次失敗：{self._store.round_location(new_n)}", sys.exc_info())
             return
         self._goto_round(new_n)
         # 自動收合設定
         if self._settings_visible:
             self._toggle_settings()
 
+    @perf_timed("goto_round")
     def _goto_round(self, n):
         if not self.topic_folder or not self.ai_list:
             return
         try:
             self.viewing_round = n
             rn = f"第{n}輪"
-            saved_q, saved_r = read_round_files(self.topic_folder, n, self.ai_list)
+            saved_q, saved_r = self._load_round_contents(n)
             has_saved = bool(saved_q) or bool(saved_r)
             self._current_round_has_saved_content = has_saved
             self._build_round_ui(n, saved_q, saved_r, has_saved)
@@ -1511,25 +1514,50 @@ class App:
         except Exception:
             self._handle_runtime_exception(f"載入第{n}輪失敗", sys.exc_info())
 
+    def _round_key(self, round_num):
+        return (os.path.normcase(os.path.abspath(self.topic_folder)), round_num)
+
+    def _load_round_contents(self, round_num):
+        """讀取一輪內容；背景仍在寫入的輪次直接使用待寫入的內容"""
+        payload = self._writer.pending_payload(self._round_key(round_num))
+        if payload is not None:
+            record = payload["record"]
+            names = {ai["name"] for ai in self.ai_list}
+            return record["question"], {r["name"]: r["text"] for r in record["replies"] if r["name"] in names}
+        return self._store.load_round(round_num, self.ai_list)
+
     def _clear_discuss(self):
         for w in self.frm_discuss.winfo_children():
             w.destroy()
+        self._round_view = None
+        self.ai_text_widgets = []
         self.btn_submit.config(state="disabled")
         self._saved_snapshot_round = 0
-        self._saved_snapshot_question = ""
-        self._saved_snapshot_replies = {}
+        self._saved_snapshot_digests = {}
+        self._current_digests = {}
+        self._dirty_text_keys.clear()
         self._current_round_has_saved_content = False
 
     def _normalize_text(self, text):
         return (text or "").strip()
 
+    def _text_digest(self, text):
+        """欄位內容摘要；空白內容固定為空字串，方便判斷「是否有內容」"""
+        text = self._normalize_text(text)
+        if not text:
+            return ""
+        return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _mark_text_dirty(self, key):
+        self._dirty_text_keys.add(key)
+
     def _capture_current_inputs(self):
         question = ""
         if hasattr(self, 'txt_question'):
-            question = self._normalize_text(self.txt_question.get("1.0", tk.END))
+            question = self._normalize_text(self._widget_text(self.txt_question))
         replies = {}
         for aw in getattr(self, "ai_text_widgets", []):
-            replies[aw["name"]] = self._normalize_text(aw["widget"].get("1.0", tk.END))
+            replies[aw["name"]] = self._normalize_text(self._slot_get_text(aw))
         return question, replies
 
     def _capture_round_draft(self):
@@ -1541,7 +1569,7 @@ class App:
             focus_key = ("question", "")
         else:
             for aw in getattr(self, "ai_text_widgets", []):
-                if self._focused_text is aw["widget"]:
+                if aw["widget"] is not None and self._focused_text is aw["widget"]:
                     focus_key = ("ai", aw["name"])
                     break
         return {
@@ -1555,21 +1583,15 @@ class App:
         if not draft or draft.get("round") != self.viewing_round:
             return
         if hasattr(self, 'txt_question'):
-            self.txt_question.delete("1.0", tk.END)
-            if draft.get("question"):
-                self.txt_question.insert("1.0", draft["question"])
+            self._load_text(self.txt_question, draft.get("question", ""))
         focus_target = None
         focus_key = draft.get("focus_key")
         if focus_key and focus_key[0] == "question":
             focus_target = getattr(self, "txt_question", None)
         for aw in getattr(self, "ai_text_widgets", []):
-            txt = aw["widget"]
-            txt.delete("1.0", tk.END)
-            val = draft.get("replies", {}).get(aw["name"], "")
-            if val:
-                txt.insert("1.0", val)
+            self._slot_set_text(aw, draft.get("replies", {}).get(aw["name"], ""))
             if focus_key and focus_key[0] == "ai" and focus_key[1] == aw["name"]:
-                focus_target = txt
+                focus_target = self._realize_slot(aw)
         if focus_target is not None:
             try:
                 focus_target.focus_set()
@@ -1591,31 +1613,49 @@ class App:
 
     def _set_saved_snapshot(self, round_num, question, replies):
         self._saved_snapshot_round = round_num
-        self._saved_snapshot_question = self._normalize_text(question)
-        self._saved_snapshot_replies = {}
+        digests = {("question", ""): self._text_digest(question)}
         for aw in getattr(self, "ai_text_widgets", []):
             name = aw["name"]
-            self._saved_snapshot_replies[name] = self._normalize_text(replies.get(name, ""))
+            digests[("ai", name)] = self._text_digest(replies.get(name, ""))
+        self._saved_snapshot_digests = digests
 
     def _sync_saved_snapshot_from_widgets(self):
-        question, replies = self._capture_current_inputs()
-        self._set_saved_snapshot(self.viewing_round, question, replies)
+        self._dirty_text_keys.clear()
+        self._current_digests = {("question", ""): self._text_digest(self._widget_text(self.txt_question))}
+        for aw in getattr(self, "ai_text_widgets", []):
+            self._current_digests[("ai", aw["name"])] = self._text_digest(self._slot_get_text(aw))
+        self._saved_snapshot_round = self.viewing_round
+        self._saved_snapshot_digests = dict(self._current_digests)
+
+    def _current_text_digests(self):
+        """只重新計算標記為已修改的欄位，其餘沿用上次的摘要"""
+        if self._dirty_text_keys:
+            slots = {aw["name"]: aw for aw in getattr(self, "ai_text_widgets", [])}
+            for key in self._dirty_text_keys:
+                kind, name = key
+                if kind == "question":
+                    self._current_digests[key] = self._text_digest(self._widget_text(self.txt_question))
+                elif name in slots:
+                    self._current_digests[key] = self._text_digest(self._slot_get_text(slots[name]))
+                else:
+                    self._current_digests.pop(key, None)
+            self._dirty_text_keys.clear()
+        return self._current_digests
 
     def _has_unsaved_text_changes(self):
         if self.viewing_round <= 0 or not hasattr(self, 'txt_question'):
             return False
 
-        current_q, current_r = self._capture_current_inputs()
+        current = self._current_text_digests()
         if self._saved_snapshot_round != self.viewing_round:
-            return bool(current_q) or any(bool(v) for v in current_r.values())
+            return any(current.values())
 
-        if current_q != self._saved_snapshot_question:
-            return True
-        for name, val in current_r.items():
-            if val != self._saved_snapshot_replies.get(name, ""):
+        saved = self._saved_snapshot_digests
+        for key, digest in current.items():
+            if digest != saved.get(key, ""):
                 return True
-        for name, val in self._saved_snapshot_replies.items():
-            if name not in current_r and val:
+        for key, digest in saved.items():
+            if key not in current and digest:
                 return True
         return False
 
@@ -1634,9 +1674,19 @@ class App:
                     self._submit_round(show_done_message=False, do_auto_advance=False)
                 finally:
                     self._auto_advance.set(old_auto_advance)
+                self._writer.wait_idle()
+                self._process_writer_results()
                 if self._has_unsaved_text_changes():
                     return
+        self._writer.wait_idle()
+        self._process_writer_results()
+        self._flush_config(wait=True)
         self._closing = True
+        self._writer.stop()
+        self._config_writer.stop()
+        self._stop_search_index()
+        if self._store is not None:
+            self._store.close()
         if getattr(self, "_previous_excepthook", None):
             sys.excepthook = self._previous_excepthook
         self._safe_destroy(self.root)
@@ -1644,6 +1694,7 @@ class App:
     # ═══════════════════════════════════════════════════════
     #  討論 UI
     # ═══════════════════════════════════════════════════════
+    @perf_timed("build_round_ui")
     def _build_round_ui(self, round_num, saved_q="", saved_r=None, has_saved=False):
         if saved_r is None:
             saved_r = {}
@@ -1653,74 +1704,72 @@ class App:
         except Exception:
             pass
 
-        for w in self.frm_discuss.winfo_children():
-            w.destroy()
-
-        rn = f"第{round_num}輪"
+        view = self._ensure_round_view()
 
         # 標題已移到上方輪次位置顯示
 
         # ── 上一輪摘要 ──
+        summary = ""
         if round_num > 1:
-            prev_q, prev_r = read_round_files(self.topic_folder, round_num - 1, self.ai_list)
-            if prev_q or prev_r:
-                frm_prev = ttkb.Labelframe(self.frm_discuss,
-                                            text=f"▼ 上一輪（第{round_num-1}輪）摘要",
-                                            padding=5)
-                frm_prev.pack(fill="x", padx=8, pady=(0, 5))
-                txt_prev = scrolledtext.ScrolledText(frm_prev, height=5,
-                                                      font=("Microsoft JhengHei", 9),
-                                                      wrap="word")
-                txt_prev.pack(fill="x")
-                summary = ""
-                if prev_q:
-                    summary += f"【我的問題】\n{prev_q}\n\n"
-                for ai_name, reply in prev_r.items():
-                    preview = reply[:300] + ("..." if len(reply) > 300 else "")
-                    summary += f"【{ai_name}】\n{preview}\n\n"
-                txt_prev.insert("1.0", summary)
-                txt_prev.config(state="disabled")
+            prev_q, prev_r = self._load_round_contents(round_num - 1)
+            if prev_q:
+                summary += f"【我的問題】\n{prev_q}\n\n"
+            for ai_name, reply in prev_r.items():
+                preview = reply[:300] + ("..." if len(reply) > 300 else "")
+                summary += f"【{ai_name}】\n{preview}\n\n"
+        frm_prev = view["frm_prev"]
+        if summary:
+            frm_prev.config(text=f"▼ 上一輪（第{round_num-1}輪）摘要")
+            txt_prev = view["txt_prev"]
+            self._load_text(txt_prev, summary, final_state="disabled")
+            if not frm_prev.winfo_manager():
+                frm_prev.pack(fill="x", padx=8, pady=(0, 5), before=view["frm_q"])
+        elif frm_prev.winfo_manager():
+            frm_prev.pack_forget()
 
         # ── 提問區 ──
-        frm_q = ttkb.Labelframe(self.frm_discuss, text="📝 本輪提問", padding=8)
-        frm_q.pack(fill="x", padx=8, pady=(0, 5))
-
         # 章節路徑：只顯示鄰近 5 輪（插入路徑，不切換輪次）
-        frm_chapter = ttkb.Frame(frm_q)
-        frm_chapter.pack(fill="x", pady=(0, 4))
-        ttkb.Label(frm_chapter, text="插入路徑：", font=("Microsoft JhengHei", 8)).pack(side="left")
-        self.max_round = scan_max_round(self.topic_folder)
+        self.max_round = self._store.max_round()
         total_rounds = max(round_num, self.max_round)
         window_size = 5
         start_round = max(1, round_num - (window_size // 2))
         end_round = min(total_rounds, start_round + window_size - 1)
         start_round = max(1, end_round - window_size + 1)
-        for r in range(start_round, end_round + 1):
+        frm_chapter = view["frm_chapter"]
+        if self._store.backend == "sqlite":
+            # SQLite 主題沒有「第N輪」資料夾可插入
+            if frm_chapter.winfo_manager():
+                frm_chapter.pack_forget()
+        elif not frm_chapter.winfo_manager():
+            frm_chapter.pack(fill="x", pady=(0, 4), before=view["frm_q"].pack_slaves()[0])
+        chapter_btns = view["chapter_btns"]
+        while len(chapter_btns) < end_round - start_round + 1:
+            chapter_btns.append(ttkb.Button(view["frm_chapter"], bootstyle="outline"))
+        for btn in chapter_btns:
+            btn.pack_forget()
+        for btn, r in zip(chapter_btns, range(start_round, end_round + 1)):
             rp = os.path.join(self.topic_folder, f"第{r}輪")
             label = f"第{r}輪"
             if r == round_num:
                 label += " ★"
-            ttkb.Button(
-                frm_chapter,
-                text=label,
-                command=lambda p=rp: self._insert_path(p),
-                bootstyle="outline"
-            ).pack(side="left", padx=1)
-
-        # 罐頭快捷按鈕（超過寬度自動換行）
-        if self._canned:
+            btn.config(text=label, command=lambda p=rp: self._insert_path(p))
+            btn.pack(side="left", padx=1)
+
+        # 罐頭快捷按鈕（超過寬度自動換行）；清單有變動才重建
+        canned_key = tuple(c["name"] for c in self._canned)
+        if canned_key != view["canned_key"]:
+            if view["canned_wrapper"] is not None:
+                view["canned_wrapper"].destroy()
             can_btns = [(c["name"], lambda idx=ci: self._insert_canned(idx), "info-outline")
                         for ci, c in enumerate(self._canned)]
-            self._create_wrapping_buttons(frm_q, "罐頭：", can_btns, pady=(0, 4))
-
-        self.txt_question= scrolledtext.ScrolledText(frm_q, height=7,
-                                                       font=("Microsoft JhengHei", 10), wrap="char")
-        self.txt_question.pack(fill="x")
-        self._bind_text_focus(self.txt_question)
-        self._place_expand_btn(frm_q, self.txt_question, "本輪提問")
-        if saved_q:
-            self.txt_question.insert("1.0", saved_q)
-        elif not has_saved:
+            wrapper = self._create_wrapping_buttons(view["frm_q"], "罐頭：", can_btns, pady=(0, 4))
+            if wrapper is not None:
+                wrapper.pack_configure(before=self.txt_question.frame)
+            view["canned_wrapper"] = wrapper
+            view["canned_key"] = canned_key
+
+        question = saved_q
+        if not saved_q and not has_saved:
             # 新一輪：自動帶入開場白 + 結語
             auto_text = ""
             if self._use_opening.get():
@@ -1733,35 +1782,231 @@ class App:
                     if auto_text:
                         auto_text += "\n\n\n"
                     auto_text += closing
-            if auto_text:
-                self.txt_question.insert("1.0", auto_text)
+            question = auto_text
+        self._load_text(self.txt_question, question)
 
         # ── 各 AI 回覆 ──
-        self.ai_text_widgets = []
-        for ai in self.ai_list:
-            label_text = f"🤖 {ai['name']}"
-            if ai.get('path'):
-                label_text += f"　　{ai['path']}"
-            frm_ai = ttkb.Labelframe(self.frm_discuss, text=label_text, padding=8)
-            frm_ai.pack(fill="x", padx=8, pady=3)
-
-            txt = scrolledtext.ScrolledText(frm_ai, height=4,
-                                             font=("Microsoft JhengHei", 10), wrap="char")
-            txt.pack(fill="x")
-            self._bind_text_focus(txt)
-            self._place_expand_btn(frm_ai, txt, ai['name'])
-            if ai["name"] in saved_r:
-                txt.insert("1.0", saved_r[ai["name"]])
-            self.ai_text_widgets.append({"name": ai["name"], "path": ai.get("path", ""), "widget": txt})
+        for aw in self.ai_text_widgets:
+            self._slot_set_text(aw, saved_r.get(aw["name"], ""))
 
         self._sync_saved_snapshot_from_widgets()
+        self.canvas.yview_moveto(0)
         self.frm_discuss.update_idletasks()
+        self._realize_visible_slots()
         try:
             self.canvas.itemconfigure(self.canvas_win, state="normal")
             self.canvas.configure(scrollregion=self.canvas.bbox("all"))
         except Exception:
             pass
-        self.canvas.yview_moveto(0)
+
+    def _ensure_round_view(self):
+        """取得常駐的輪次畫面；各 AI 面板只在成員清單變動時重建，換輪只替換內容"""
+        view = self._round_view
+        if view is None:
+            frm_prev = ttkb.Labelframe(self.frm_discuss, padding=5)
+            txt_prev = scrolledtext.ScrolledText(frm_prev, height=5,
+                                                  font=("Microsoft JhengHei", 9),
+                                                  wrap="word", state="disabled")
+            txt_prev.pack(fill="x")
+
+            frm_q = ttkb.Labelframe(self.frm_discuss, text="📝 本輪提問", padding=8)
+            frm_q.pack(fill="x", padx=8, pady=(0, 5))
+            frm_chapter = ttkb.Frame(frm_q)
+            frm_chapter.pack(fill="x", pady=(0, 4))
+            ttkb.Label(frm_chapter, text="插入路徑：", font=("Microsoft JhengHei", 8)).pack(side="left")
+
+            self.txt_question = scrolledtext.ScrolledText(frm_q, height=7,
+                                                          font=("Microsoft JhengHei", 10), wrap="char")
+            self.txt_question.pack(fill="x")
+            self._bind_text_focus(self.txt_question, ("question", ""))
+            view = {
+                "frm_prev": frm_prev,
+                "txt_prev": txt_prev,
+                "frm_q": frm_q,
+                "frm_chapter": frm_chapter,
+                "chapter_btns": [],
+                "canned_key": None,
+                "canned_wrapper": None,
+                "ai_key": None,
+                "expand_btns": [self._place_expand_btn(frm_q, self.txt_question, "本輪提問")],
+            }
+            self._round_view = view
+            self.ai_text_widgets = []
+
+        ai_key = tuple((ai["name"], ai.get("path", "")) for ai in self.ai_list)
+        if ai_key != view["ai_key"]:
+            for aw in self.ai_text_widgets:
+                if aw["widget"] is not None and self._focused_text is aw["widget"]:
+                    self._focused_text = None
+                aw["slot"].destroy()
+            del view["expand_btns"][1:]
+            self.ai_text_widgets = []
+            # 只先放固定高度的佔位框，捲進可視範圍時才建立真正的輸入框
+            for ai in self.ai_list:
+                slot = ttkb.Frame(self.frm_discuss, height=self._slot_height_estimate)
+                slot.pack_propagate(False)
+                slot.pack(fill="x", padx=8, pady=3)
+                self.ai_text_widgets.append({"name": ai["name"], "path": ai.get("path", ""),
+                                             "slot": slot, "widget": None, "text": ""})
+            view["ai_key"] = ai_key
+        return view
+
+    # ── AI 回覆欄位（虛擬化）──
+    def _realize_slot(self, aw):
+        """把佔位框換成真正的輸入框；已建立則直接回傳"""
+        if aw["widget"] is not None:
+            return aw["widget"]
+        label_text = f"🤖 {aw['name']}"
+        if aw.get('path'):
+            label_text += f"　　{aw['path']}"
+        frm_ai = ttkb.Labelframe(aw["slot"], text=label_text, padding=8)
+        frm_ai.pack(fill="x")
+
+        txt = scrolledtext.ScrolledText(frm_ai, height=4,
+                                         font=("Microsoft JhengHei", 10), wrap="char")
+        txt.pack(fill="x")
+        self._bind_text_focus(txt, ("ai", aw["name"]))
+        self._load_text(txt, aw["text"])
+        self._round_view["expand_btns"].append(self._place_expand_btn(frm_ai, txt, aw['name']))
+        aw["slot"].pack_propagate(True)
+        aw["widget"] = txt
+        aw["text"] = ""
+        return txt
+
+    def _calibrate_slot_height(self):
+        """以實際建立的面板高度校正其餘佔位框，減少捲動時的跳動"""
+        built = next((aw for aw in self.ai_text_widgets if aw["widget"] is not None), None)
+        if built is None:
+            return
+        measured = built["slot"].winfo_reqheight()
+        if measured <= 1 or measured == self._slot_height_estimate:
+            return
+        self._slot_height_estimate = measured
+        for aw in self.ai_text_widgets:
+            if aw["widget"] is None:
+                aw["slot"].configure(height=measured)
+
+    def _slot_get_text(self, aw):
+        if aw["widget"] is not None:
+            return self._widget_text(aw["widget"])
+        return aw["text"]
+
+    def _slot_set_text(self, aw, content):
+        if aw["widget"] is not None:
+            self._load_text(aw["widget"], content)
+        else:
+            aw["text"] = content or ""
+        self._mark_text_dirty(("ai", aw["name"]))
+
+    def _realize_visible_slots(self):
+        """建立與 canvas 可視範圍（含上下半屏緩衝）相交的 AI 面板"""
+        self._realize_slots_pending = False
+        if not self.ai_text_widgets or not self._widget_alive(self.canvas):
+            return
+        self._calibrate_slot_height()
+        view_h = max(1, self.canvas.winfo_height())
+        top = self.canvas.canvasy(0) - view_h // 2
+        bottom = self.canvas.canvasy(view_h) + view_h // 2
+        realized = False
+        for aw in self.ai_text_widgets:
+            if aw["widget"] is not None:
+                continue
+            slot = aw["slot"]
+            y = slot.winfo_y()
+            if y + max(slot.winfo_height(), self._slot_height_estimate) >= top and y <= bottom:
+                self._realize_slot(aw)
+                realized = True
+        if realized:
+            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def _schedule_realize_slots(self):
+        if self._realize_slots_pending or not self.ai_text_widgets:
+            return
+        if all(aw["widget"] is not None for aw in self.ai_text_widgets):
+            return
+        self._realize_slots_pending = True
+        if not self._safe_after_idle(self.root, self._realize_visible_slots, "建立可視 AI 面板"):
+            self._realize_slots_pending = False
+
+    def _on_canvas_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_realize_slots()
+
+    def _restyle_round_view(self):
+        """切換主題後更新常駐輪次畫面中自行上色的元件"""
+        if self._round_view is None:
+            return
+        for btn in self._round_view["expand_btns"]:
+            if self._widget_alive(btn):
+                btn.configure(bg=str(self.colors.inputbg), fg=str(self.colors.primary))
+
+    # ── 大量文字：分段載入 ──
+    def _load_text(self, txt_widget, content, final_state="normal"):
+        """替換 Text 內容；超過門檻時先放第一屏，其餘以 after() 分段填入。
+
+        填入期間元件暫時停用，完整內容保留在 self._text_streams，
+        讀取一律經過 _widget_text()，因此存檔永遠拿到完整內容。
+        """
+        content = content or ""
+        self._text_streams.pop(txt_widget, None)
+        txt_widget.config(state="normal")
+        txt_widget.delete("1.0", tk.END)
+        if len(content) <= LARGE_TEXT_THRESHOLD:
+            if content:
+                txt_widget.insert("1.0", content)
+            txt_widget.config(state=final_state)
+        else:
+            self._text_streams[txt_widget] = {
+                "text": content,
+                "pos": LARGE_TEXT_FIRST_CHUNK,
+                "final_state": final_state,
+            }
+            txt_widget.insert("1.0", content[:LARGE_TEXT_FIRST_CHUNK])
+            txt_widget.config(state="disabled")
+            self._safe_after(self.root, LARGE_TEXT_CHUNK_DELAY_MS,
+                             lambda: self._stream_text_chunk(txt_widget), "分段載入文字")
+        dirty_key = getattr(txt_widget, "_dirty_key", None)
+        if dirty_key is not None:
+            self._mark_text_dirty(dirty_key)
+            self._schedule_round_status_refresh()
+
+    def _stream_text_chunk(self, txt_widget):
+        stream = self._text_streams.get(txt_widget)
+        if stream is None:
+            return
+        if not self._widget_alive(txt_widget):
+            self._text_streams.pop(txt_widget, None)
+            return
+        text, pos = stream["text"], stream["pos"]
+        end = min(len(text), pos + LARGE_TEXT_CHUNK)
+        txt_widget.config(state="normal")
+        txt_widget.insert("end-1c", text[pos:end])
+        stream["pos"] = end
+        if end >= len(text):
+            self._text_streams.pop(txt_widget, None)
+            txt_widget.edit_modified(False)
+            txt_widget.config(state=stream["final_state"])
+            return
+        txt_widget.config(state="disabled")
+        self._safe_after(self.root, LARGE_TEXT_CHUNK_DELAY_MS,
+                         lambda: self._stream_text_chunk(txt_widget), "分段載入文字")
+
+    def _finish_text_stream(self, txt_widget):
+        """需要直接編輯元件時，把尚未填入的部分一次補完"""
+        stream = self._text_streams.pop(txt_widget, None)
+        if stream is None:
+            return
+        txt_widget.config(state="normal")
+        txt_widget.insert("end-1c", stream["text"][stream["pos"]:])
+        txt_widget.edit_modified(False)
+        txt_widget.config(state=stream["final_state"])
+
+    def _widget_text(self, txt_widget):
+        """Text 元件的完整內容（含尚在分段填入、未進元件的部分）"""
+        stream = self._text_streams.get(txt_widget)
+        if stream is not None:
+            return stream["text"]
+        return txt_widget.get("1.0", "end-1c")
 
     def _place_expand_btn(self, parent_frame, txt_widget, title):
         """在文字區域右下角放小放大按鈕"""
@@ -1772,6 +2017,7 @@ class App:
         btn.bind('<Button-1>', lambda e: self._expand_text(txt_widget, title))
         btn.place(relx=1.0, rely=1.0, anchor="se", x=-30, y=-6)
         btn.lift()
+        return btn
 
     def _create_wrapping_buttons(self, parent, label_text, buttons_info, pady=(0, 2)):
         """建立可自動換行的按鈕列。"""
@@ -1832,12 +2078,14 @@ class App:
 
     def _insert_path(self, path):
         if hasattr(self, 'txt_question'):
+            self._finish_text_stream(self.txt_question)
             self.txt_question.insert(tk.INSERT, f"「{path}」")
             self.txt_question.focus_set()
 
     def _insert_canned(self, idx):
         if hasattr(self, 'txt_question') and 0 <= idx < len(self._canned):
             resolved = self._resolve_placeholders(self._canned[idx]["text"])
+            self._finish_text_stream(self.txt_question)
             self.txt_question.insert(tk.INSERT, resolved)
             self.txt_question.focus_set()
 
@@ -1864,16 +2112,13 @@ class App:
         )
         big_txt.pack(fill="both", expand=True, padx=8, pady=(8, 4))
 
-        content = txt_widget.get("1.0", tk.END).rstrip("\n")
-        if content:
-            big_txt.insert("1.0", content)
+        self._load_text(big_txt, self._widget_text(txt_widget).rstrip("\n"))
 
         def _save_and_close():
-            new_content = big_txt.get("1.0", tk.END).rstrip("\n")
+            new_content = self._widget_text(big_txt).rstrip("\n")
+            self._text_streams.pop(big_txt, None)
             if self._widget_alive(txt_widget):
-                txt_widget.delete("1.0", tk.END)
-                if new_content:
-                    txt_widget.insert("1.0", new_content)
+                self._load_text(txt_widget, new_content)
             self._safe_destroy(dlg)
 
         dlg.protocol("WM_DELETE_WINDOW", _save_and_close)
@@ -1890,29 +2135,10 @@ class App:
     # ═══════════════════════════════════════════════════════
     #  儲存
     # ═══════════════════════════════════════════════════════
+    @perf_timed("submit_round")
     def _submit_round(self, show_done_message=True, do_auto_advance=True):
         if not hasattr(self, 'txt_question') or self.viewing_round == 0:
             return
-        question = self.txt_question.get("1.0", tk.END).strip()
-        rn = f"第{self.viewing_round}輪"
-        round_folder = os.path.join(self.topic_folder, rn)
-        if not self._ensure_dir(round_folder, "建立輪次資料夾失敗"):
-            return
-
-        lines = [
-            f"主題：{self.topic_var.get().strip()}",
-            f"輪次：{rn}",
-            f"時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            "=" * 60, "",
-            "【本輪提問】", question, "",
-            "=" * 60,
-        ]
-        for aw in self.ai_text_widgets:
-            resp = aw["widget"].get("1.0", tk.END).strip()
-            lines += ["", f"【{aw['name']}】的回覆"]
-            if aw.get("path"):
-                lines.append(f"專案路徑：{aw['path']}")
-            lines += ["-" * 40, resp if resp else "（未填寫）", "", "=" * 60]
 
         # 根據設定決定輸出檔案（防呆：兩開關同時為 True 時，改成兩種都輸出）
         write_full = not self._no_full_record.get()
@@ -1921,100 +2147,379 @@ class App:
             write_full = True
             write_split = True
 
-        if write_full:
-            if not self._write_text_safely(
-                os.path.join(round_folder, f"{rn}_完整紀錄.txt"),
-                "\n".join(lines),
-                "寫入完整紀錄失敗"
-            ):
-                return
-
-        if write_split:
-            for aw in self.ai_text_widgets:
-                resp = aw["widget"].get("1.0", tk.END).strip()
-                reply_lines = [
-                    f"AI 名稱：{aw['name']}",
-                ]
-                if aw.get("path"):
-                    reply_lines.append(f"專案路徑：{aw['path']}")
-                reply_lines.extend([
-                    f"輪次：{rn}",
-                    "-" * 40,
-                    resp if resp else "（未填寫）",
-                ])
-                if not self._write_text_safely(
-                    self._reply_file_path(round_folder, aw["name"]),
-                    "\n".join(reply_lines),
-                    "寫入 AI 回覆檔失敗"
-                ):
-                    return
-
-            if not self._write_text_safely(
-                os.path.join(round_folder, "提問.txt"),
-                question,
-                "寫入提問檔失敗"
-            ):
-                return
-
-        self._sync_saved_snapshot_from_widgets()
-        self._rebuild_accumulated()
-        self._current_round_has_saved_content = True
+        record = {
+            "round": self.viewing_round,
+            "topic": self.topic_var.get().strip(),
+            "saved_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "question": self._widget_text(self.txt_question).strip(),
+            "replies": [
+                {"name": aw["name"], "path": aw.get("path", ""),
+                 "text": self._slot_get_text(aw).strip()}
+                for aw in self.ai_text_widgets
+            ],
+            "write_full": write_full,
+            "write_split": write_split,
+        }
+        key = self._round_key(self.viewing_round)
+        payload = {
+            "record": record,
+            "store": self._store,
+            "ai_list": [dict(ai) for ai in self.ai_list],
+            "location": self._store.round_location(self.viewing_round),
+            "show_done_message": show_done_message,
+            "search_index": self._get_search_index(),
+        }
+        self._writer.submit(key, payload, run_round_save_job)
+        self._round_save_states[key] = "pending"
         self._refresh_round_status_label()
-        self._update_nav()
-        if show_done_message:
-            messagebox.showinfo("完成", f"{rn} 已儲存至：\n{round_folder}")
+        self._schedule_writer_poll()
 
-        # 自動進入下一輪
+        # 自動進入下一輪（內容已交給背景寫檔，不必等寫完）
         if do_auto_advance and self._auto_advance.get():
             self._new_round()
 
-    def _rebuild_accumulated(self):
-        if not self.topic_folder:
-            return False
-        mx = scan_max_round(self.topic_folder)
-        all_lines = [
-            f"主題：{self.topic_var.get().strip()}  —  全部討論累積紀錄",
-            f"更新時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"AI 成員：{', '.join(a['name'] for a in self.ai_list)}",
-            "=" * 60, "",
-        ]
-        for i in range(1, mx + 1):
-            rn = f"第{i}輪"
-            rp = os.path.join(self.topic_folder, rn, f"{rn}_完整紀錄.txt")
-            if os.path.exists(rp):
-                content = _read_text_file(rp, default="").rstrip()
-                if content:
-                    all_lines.append(content)
-                    all_lines.append("")
-                    continue
-
-            question, replies = read_round_files(self.topic_folder, i, self.ai_list)
-            if not question and not replies:
+    def _schedule_writer_poll(self):
+        if self._writer_poll_pending:
+            return
+        self._writer_poll_pending = True
+
+        def _run():
+            self._writer_poll_pending = False
+            self._process_writer_results()
+            if self._writer.busy():
+                self._schedule_writer_poll()
+
+        if self._safe_after(self.root, 50, _run, "處理背景存檔結果") is None:
+            self._writer_poll_pending = False
+
+    def _process_writer_results(self):
+        results = self._writer.drain_results()
+        for key, payload, accumulated_error, exc_info in results:
+            if "record" not in payload:
+                # 切換主題時排入的關閉舊儲存層
+                if exc_info:
+                    record_exception("關閉主題儲存層失敗", exc_info)
                 continue
+            record = payload["record"]
+            rn = f"第{record['round']}輪"
+            superseded = self._writer.pending_payload(key) is not None
+            if not superseded:
+                self._round_save_states[key] = "failed" if exc_info else "saved"
+            is_current = bool(self.topic_folder) and key == self._round_key(self.viewing_round)
+
+            if exc_info:
+                self._handle_runtime_exception(f"儲存{rn}失敗：{payload['location']}", exc_info)
+            else:
+                if is_current and not superseded:
+                    self._set_saved_snapshot(
+                        record["round"], record["question"],
+                        {r["name"]: r["text"] for r in record["replies"]}
+                    )
+                    self._current_round_has_saved_content = True
+                if accumulated_error:
+                    self._handle_runtime_exception(
+                        f"更新累積紀錄失敗：{os.path.join(payload['store'].topic_folder, ACCUMULATED_NAME)}",
+                        accumulated_error
+                    )
+                if payload["show_done_message"] and not superseded:
+                    messagebox.showinfo("完成", f"{rn} 已儲存至：\n{payload['location']}")
+            if is_current:
+                self._refresh_round_status_label()
+        if results and self._store is not None:
+            self._update_nav()
 
-            fallback_lines = [
-                f"主題：{self.topic_var.get().strip()}",
-                f"輪次：{rn}",
-                "=" * 60,
-                "",
-                "【本輪提問】",
-                question,
-                "",
-                "=" * 60,
-            ]
-            for ai in self.ai_list:
-                reply = replies.get(ai["name"], "")
-                fallback_lines += ["", f"【{ai['name']}】的回覆"]
-                if ai.get("path"):
-                    fallback_lines.append(f"專案路徑：{ai['path']}")
-                fallback_lines += ["-" * 40, reply if reply else "（未填寫）", "", "=" * 60]
-            all_lines.append("\n".join(fallback_lines).rstrip())
-            all_lines.append("")
-        return self._write_text_safely(
-            os.path.join(self.topic_folder, "全部討論紀錄（累積）.txt"),
-            "\n".join(all_lines),
-            "更新累積紀錄失敗"
+    def _export_current_topic(self, parent=None):
+        """SQLite 主題 → 原本的「第N輪」資料夾格式（寫到主題資料夾內）"""
+        if not self._store or self._store.backend != "sqlite":
+            return
+        try:
+            count = export_round_store(self._store, self.topic_folder)
+        except Exception:
+            self._handle_runtime_exception(f"匯出主題失敗：{self.topic_folder}", sys.exc_info(), parent=parent)
+            return
+        messagebox.showinfo("匯出完成", f"已匯出 {count} 輪至：\n{self.topic_folder}", parent=parent)
+
+    # ═══════════════════════════════════════════════════════
+    #  全文搜尋
+    # ═══════════════════════════════════════════════════════
+    def _get_search_index(self):
+        """延遲開啟搜尋索引；開不起來時記錄錯誤並停用搜尋（不影響存檔）"""
+        if self._search_index is None and not self._search_index_failed:
+            try:
+                self._search_index = SearchIndex(SEARCH_INDEX_FILE)
+            except Exception:
+                self._search_index_failed = True
+                record_exception(f"開啟搜尋索引失敗：{SEARCH_INDEX_FILE}")
+        return self._search_index
+
+    def _start_search_index_build(self):
+        """背景替尚未建立索引的主題建立索引；已在建立中則不重複啟動"""
+        index = self._get_search_index()
+        if index is None:
+            return False
+        if self._search_build_thread is not None and self._search_build_thread.is_alive():
+            return True
+        topics = []
+        for name, info in self.cfg.get("topics", {}).items():
+            if not isinstance(info, dict):
+                continue
+            # 各主題的 topic.json 由建索引的背景執行緒讀取
+            legacy_ai = info.get("ai_list")
+            topics.append((name, self._topic_folder_of(name), info.get("storage"),
+                           [dict(ai) for ai in legacy_ai] if isinstance(legacy_ai, list) else None))
+        self._search_build_progress = {"done": 0, "total": len(topics)}
+        self._search_build_thread = threading.Thread(
+            target=build_search_index,
+            args=(index, topics, self._search_build_progress, self._search_build_cancel),
+            name="search-index-build", daemon=True
         )
+        self._search_build_thread.start()
+        return True
+
+    def _stop_search_index(self):
+        self._search_build_cancel.set()
+        if self._search_build_thread is not None:
+            self._search_build_thread.join(timeout=2)
+        if self._search_index is not None:
+            self._search_index.close()
+            self._search_index = None
+
+    def _show_search_dialog(self):
+        """全文搜尋所有主題的提問與回覆，雙擊結果跳到該輪並標示"""
+        if self._widget_alive(getattr(self, "_search_dlg", None)):
+            self._search_dlg.deiconify()
+            self._search_dlg.lift()
+            return
+        if not self._start_search_index_build():
+            messagebox.showerror("搜尋無法使用", f"無法開啟搜尋索引：\n{SEARCH_INDEX_FILE}")
+            return
+
+        dlg = tk.Toplevel(self.root)
+        dlg.withdraw()
+        dlg.title("全文搜尋")
+        dlg.geometry("680x480")
+        dlg.transient(self.root)
+        self._search_dlg = dlg
+
+        row = ttkb.Frame(dlg)
+        row.pack(fill="x", padx=8, pady=(8, 4))
+        query_var = tk.StringVar()
+        ent = ttkb.Entry(row, textvariable=query_var)
+        ent.pack(side="left", fill="x", expand=True, padx=(0, 4))
+        status_var = tk.StringVar(value="")
+        hits = []
+
+        cols = ("topic", "round", "source", "snippet")
+        tree = ttkb.Treeview(dlg, columns=cols, show="headings", selectmode="browse")
+        for col, title, width, stretch in (("topic", "主題", 120, False), ("round", "輪次", 60, False),
+                                           ("source", "來源", 110, False), ("snippet", "內容", 360, True)):
+            tree.heading(col, text=title)
+            tree.column(col, width=width, stretch=stretch)
+
+        def _do_search():
+            query = query_var.get().strip()
+            tree.delete(*tree.get_children())
+            hits.clear()
+            if not query:
+                status_var.set("")
+                return
+            started = time.perf_counter()
+            try:
+                hits.extend(self._search_index.search(query))
+            except Exception:
+                self._handle_runtime_exception(f"搜尋失敗：{query}", sys.exc_info(), parent=dlg)
+                return
+            elapsed = (time.perf_counter() - started) * 1000
+            for i, hit in enumerate(hits):
+                source = "我的提問" if hit["kind"] == "question" else hit["name"]
+                tree.insert("", "end", iid=str(i),
+                            values=(hit["topic"], f"第{hit['round']}輪", source, hit["snippet"]))
+            more = f"（僅顯示前 {SEARCH_RESULT_LIMIT} 筆）" if len(hits) >= SEARCH_RESULT_LIMIT else ""
+            status_var.set(f"找到 {len(hits)} 筆{more}，耗時 {elapsed:.0f} ms")
+
+        def _open_selected(event=None):
+            sel = tree.selection()
+            if sel:
+                self._jump_to_search_hit(hits[int(sel[0])], query_var.get().strip())
+            return 'break'
+
+        def _rebuild():
+            if not messagebox.askyesno("重建索引", "清除並重新建立所有主題的搜尋索引？", parent=dlg):
+                return
+            if self._search_build_thread is not None and self._search_build_thread.is_alive():
+                messagebox.showinfo("提示", "索引建立中，請稍後再試。", parent=dlg)
+                return
+            self._search_index.forget_topics()
+            self._start_search_index_build()
+            _poll_build()
+
+        def _poll_build():
+            if not self._widget_alive(dlg):
+                return
+            thread = self._search_build_thread
+            if thread is not None and thread.is_alive():
+                p = self._search_build_progress
+                status_var.set(f"索引建立中… {p.get('done', 0)}/{p.get('total', 0)} 個主題（結果可能不完整）")
+                self._safe_after(dlg, 200, _poll_build, "更新索引進度")
+            elif not hits:
+                stats = self._search_index.stats()
+                status_var.set(f"已建立索引：{stats['topics']} 個主題、{stats['docs']} 段內容")
+
+        ttkb.Button(row, text="搜尋", command=_do_search, bootstyle="primary").pack(side="left")
+        ttkb.Button(row, text="重建索引", command=_rebuild,
+                    bootstyle="secondary-outline").pack(side="left", padx=(4, 0))
+        ttkb.Label(dlg, textvariable=status_var, font=("Microsoft JhengHei", 8)).pack(
+            fill="x", padx=8, pady=(0, 4))
+        tree.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+
+        ent.bind('<Return>', lambda e: (_do_search(), 'break')[1])
+        tree.bind('<Double-1>', _open_selected)
+        tree.bind('<Return>', _open_selected)
+        dlg.bind('<Escape>', lambda e: self._safe_destroy(dlg))
+
+        self._center_dialog(dlg, 680, 480)
+        ent.focus_set()
+        _poll_build()
+
+    def _topic_name_for_folder(self, folder_key):
+        for name in self.cfg.get("topics", {}):
+            if SearchIndex.folder_key(self._topic_folder_of(name)) == folder_key:
+                return name
+        return None
+
+    def _jump_to_search_hit(self, hit, query):
+        same_topic = bool(self.topic_folder) and SearchIndex.folder_key(self.topic_folder) == hit["folder"]
+        if not (same_topic and self.viewing_round == hit["round"]) and self._has_unsaved_text_changes():
+            if not messagebox.askyesno("尚未儲存", "目前輪次有未儲存內容，仍要跳到搜尋結果嗎？",
+                                       parent=self._search_dlg):
+                return
+        if not same_topic:
+            name = self._topic_name_for_folder(hit["folder"])
+            if name is None:
+                messagebox.showwarning("提示", f"找不到主題「{hit['topic']}」，可能已移除或更名。",
+                                       parent=self._search_dlg)
+                return
+            self._load_topic(name)
+        if self.viewing_round != hit["round"]:
+            self._goto_round(hit["round"])
+        if self.viewing_round != hit["round"]:
+            return
+
+        if hit["kind"] == "question":
+            txt = self.txt_question
+            anchor = self._round_view["frm_q"]
+        else:
+            aw = next((a for a in self.ai_text_widgets if a["name"] == hit["name"]), None)
+            if aw is None:
+                messagebox.showinfo("提示", f"「{hit['name']}」已不在目前的 AI 成員中。",
+                                    parent=self._search_dlg)
+                return
+            txt = self._realize_slot(aw)
+            anchor = aw["slot"]
+
+        self._finish_text_stream(txt)
+        txt.tag_remove("search_hit", "1.0", tk.END)
+        piece = query.split()[0] if query.split() else ""
+        start = txt.search(piece, "1.0", stopindex=tk.END, nocase=True) if piece else ""
+        if not start:
+            start = f"1.0+{max(hit['pos'], 0)}c"
+        end = f"{start}+{hit['length']}c"
+        txt.tag_configure("search_hit", background="#FFE066", foreground="#000000")
+        txt.tag_add("search_hit", start, end)
+        txt.see(start)
+
+        # 把命中的欄位捲進 canvas 可視範圍
+        self.frm_discuss.update_idletasks()
+        total = max(1, self.frm_discuss.winfo_height())
+        self.canvas.yview_moveto(max(0, anchor.winfo_y() - 10) / total)
+
+    # ═══════════════════════════════════════════════════════
+    #  效能診斷（Ctrl+Shift+D）
+    # ═══════════════════════════════════════════════════════
+    def _perf_export_context(self):
+        """匯出時一併附上的環境資訊，方便對照使用者的資料量"""
+        startup = []
+        prev = _STARTUP_T0
+        for label, t in getattr(self, "_startup_marks", []):
+            startup.append({"phase": label, "ms": round((t - prev) * 1000, 1)})
+            prev = t
+        return {
+            "app": "AI討論工具_最終版",
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "topic_count": len(self.cfg.get("topics", {})),
+            "current_topic_rounds": self.max_round,
+            "ai_members": len(self.ai_list),
+            "storage": self._store.backend if self._store is not None else "",
+            "startup": startup,
+        }
+
+    def _show_perf_dialog(self):
+        if self._widget_alive(getattr(self, "_perf_dlg", None)):
+            self._perf_dlg.deiconify()
+            self._perf_dlg.lift()
+            return
+
+        dlg = tk.Toplevel(self.root)
+        dlg.withdraw()
+        dlg.title("效能診斷")
+        dlg.geometry("640x360")
+        dlg.transient(self.root)
+        self._perf_dlg = dlg
+
+        cols = ("op", "count", "p50", "p95", "max", "mean", "last")
+        tree = ttkb.Treeview(dlg, columns=cols, show="headings", selectmode="none")
+        for col, title, width, stretch in (("op", "操作", 150, True), ("count", "次數", 60, False),
+                                           ("p50", "p50 (ms)", 75, False), ("p95", "p95 (ms)", 75, False),
+                                           ("max", "最大 (ms)", 75, False), ("mean", "平均 (ms)", 75, False),
+                                           ("last", "最近一次", 80, False)):
+            tree.heading(col, text=title)
+            tree.column(col, width=width, stretch=stretch, anchor="w" if col == "op" else "e")
+        status_var = tk.StringVar(value="")
+
+        def _refresh():
+            if not self._widget_alive(dlg):
+                return
+            stats = PERF.snapshot()
+            tree.delete(*tree.get_children())
+            for name, st in stats.items():
+                tree.insert("", "end", values=(
+                    PERF_OP_LABELS.get(name, name), st["count"], f"{st['p50_ms']:.1f}",
+                    f"{st['p95_ms']:.1f}", f"{st['max_ms']:.1f}", f"{st['mean_ms']:.1f}", st["last_at"]))
+            status_var.set(f"自 {PERF.started_at} 起記錄（只存在記憶體，關閉程式即清除）")
+            self._safe_after(dlg, PERF_REFRESH_MS, _refresh, "更新效能診斷")
+
+        def _reset():
+            PERF.reset()
+            tree.delete(*tree.get_children())
+
+        def _export():
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = filedialog.asksaveasfilename(
+                parent=dlg, title="匯出效能紀錄", initialdir=DESKTOP,
+                initialfile=f"AI討論工具_效能紀錄_{stamp}.json", defaultextension=".json",
+                filetypes=[("JSON", "*.json")])
+            if not path:
+                return
+            try:
+                PERF.export_json(path, self._perf_export_context())
+            except Exception:
+                self._handle_runtime_exception(f"匯出效能紀錄失敗：{path}", sys.exc_info(), parent=dlg)
+                return
+            messagebox.showinfo("已匯出", f"效能紀錄已存到：\n{path}", parent=dlg)
+
+        row = ttkb.Frame(dlg)
+        row.pack(fill="x", side="bottom", padx=8, pady=(0, 8))
+        ttkb.Button(row, text="匯出 JSON", command=_export, bootstyle="primary").pack(side="right")
+        ttkb.Button(row, text="重設", command=_reset,
+                    bootstyle="secondary-outline").pack(side="right", padx=(0, 4))
+        ttkb.Label(dlg, textvariable=status_var, font=("Microsoft JhengHei", 8)).pack(
+            fill="x", side="bottom", padx=8, pady=(0, 4))
+        tree.pack(fill="both", expand=True, padx=8, pady=8)
+        dlg.bind('<Escape>', lambda e: self._safe_destroy(dlg))
+
+        self._center_dialog(dlg, 640, 360)
+        _refresh()
 
     # ═══════════════════════════════════════════════════════
     #  工具
@@ -2024,10 +2529,9 @@ class App:
         try:
             if IS_WIN:
                 os.startfile(path)
-            elif IS_MAC:
-                subprocess.Popen(['open', path])
             else:
-                subprocess.Popen(['xdg-open', path])
+                import subprocess   # 只有開啟檔案時才需要
+                subprocess.Popen(['open' if IS_MAC else 'xdg-open', path])
         except Exception:
             self._handle_runtime_exception(f"開啟路徑失敗：{path}", sys.exc_info())
 
@@ -2050,7 +2554,7 @@ class App:
     def _open_accumulated(self):
         if not self.topic_folder:
             return
-        p = os.path.join(self.topic_folder, "全部討論紀錄（累積）.txt")
+        p = os.path.join(self.topic_folder, ACCUMULATED_NAME)
         if os.path.exists(p):
             self._open_path(p)
         else:
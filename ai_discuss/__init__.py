@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+AI 多窗口集中討論工具的核心（不含 GUI，不載入 tkinter）。命令列工具：python -m ai_discuss --help
+
+- config：設定檔讀寫、錯誤紀錄
+- textio：文字檔讀寫（編碼偵測、原子寫入、讀取快取）
+- rounds：輪次資料夾格式、回覆檔、累積紀錄、交易式提交
+- stores：FileRoundStore / SqliteRoundStore、背景寫檔執行緒
+- topics：主題資料夾內的詳細設定（topic.json），根設定檔只留主題索引
+- search：跨主題全文搜尋索引
+- perf：熱點操作的耗時紀錄
+"""
+
+from .config import (
+    APP_NAME, APP_SUPPORT_DIR, CONFIG_FILE, DESKTOP, ERROR_LOG_FILE, Config, ExcInfo,
+    dump_config, load_config, record_exception, save_config, write_config_text,
+)
+from .textio import read_text_file, safe_fs_component, topic_folder_name, write_text_file
+from .rounds import (
+    ACCUMULATED_NAME, ROUND_COMMIT_DIR_RE, TOPIC_META_DIRNAME, AIMember, ReplyRecord,
+    RoundContents, RoundRecord, commit_round_files, create_round_dir, format_full_record,
+    load_round_manifest, read_round_files, rebuild_accumulated_record, recover_round_commits,
+    scan_max_round, scan_round_dirs,
+)
+from .stores import (
+    STORAGE_BACKENDS, FileRoundStore, RoundSaveWriter, RoundStore, SqliteRoundStore,
+    commit_round, detect_storage_backend, export_round_store, open_round_store,
+    run_round_save_job,
+)
+from .topics import (
+    LEGACY_TOPIC_KEYS, TOPIC_META_NAME, ResolvedTopicEntry, TopicEntry, TopicMeta, dump_topic_meta,
+    load_topic_meta, read_topic_meta, resolve_topic_entries, save_topic_meta, topic_details,
+    topic_index_folder, write_topic_meta, write_topic_meta_text,
+)
+from .perf import PERF, PerfRecorder, perf_timed
+from .search import (
+    SEARCH_INDEX_FILE, SEARCH_RESULT_LIMIT, SearchHit, SearchIndex, build_search_index,
+)
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+命令列工具（不需要顯示器，也不載入 tkinter）
+
+  python -m ai_discuss list-topics
+  python -m ai_discuss stats [主題 ...]
+  python -m ai_discuss rebuild [主題 ...]
+  python -m ai_discuss verify [主題 ...]
+  python -m ai_discuss export 主題 目的地（資料夾，或 .json / .jsonl 檔）
+  python -m ai_discuss import 來源.jsonl --topic 新主題 [--root 目錄] [--storage files|sqlite]
+
+未指定主題時處理設定檔中的全部主題。GUI 執行中時請勿使用會改寫設定檔的 import。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from . import (
+    ACCUMULATED_NAME, DESKTOP, ROUND_COMMIT_DIR_RE, SEARCH_INDEX_FILE, STORAGE_BACKENDS,
+    AIMember, Config, FileRoundStore, ReplyRecord, RoundRecord, RoundStore, SearchIndex, SqliteRoundStore,
+    ResolvedTopicEntry, record_exception, scan_round_dirs, topic_folder_name,
+    detect_storage_backend, export_round_store, load_config, load_round_manifest, load_topic_meta,
+    open_round_store, rebuild_accumulated_record, resolve_topic_entries, save_config,
+    save_topic_meta, topic_index_folder,
+)
+
+# 輸出的一列：{欄位: 值}
+Row = Dict[str, Any]
+
+
+class CliError(Exception):
+    """使用者輸入錯誤；只印訊息、不印 traceback"""
+
+
+def _topic_entries(cfg: Config, names: Optional[List[str]] = None) -> List[ResolvedTopicEntry]:
+    """設定檔中的主題 → [(名稱, 資料夾, 儲存格式, ai_list)]"""
+    topics = cfg.get("topics", {})
+    if names:
+        missing = [n for n in names if n not in topics]
+        if missing:
+            raise CliError("找不到主題：" + "、".join(missing))
+    return resolve_topic_entries(cfg, names)
+
+
+def _folder_size(folder: str) -> int:
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(folder):
+        for fn in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, fn))
+            except OSError:
+                pass
+    return total
+
+
+def _iter_round_records(store: RoundStore, topic_name: str,
+                        ai_list: Sequence[AIMember]) -> Iterator[RoundRecord]:
+    """依序產生主題的每一輪 record（SQLite 直接取存檔內容，資料夾格式由檔案重組）"""
+    if isinstance(store, SqliteRoundStore):
+        yield from store.iter_records()
+        return
+    for round_num in range(1, store.max_round() + 1):
+        question, replies = store.load_round(round_num, ai_list)
+        if not question and not replies:
+            continue
+        folder = store.round_location(round_num)
+        saved_at = datetime.fromtimestamp(os.stat(folder).st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        yield {
+            "round": round_num,
+            "topic": topic_name,
+            "saved_at": saved_at,
+            "question": question,
+            "replies": [
+                {"name": ai["name"], "path": ai.get("path", ""),
+                 "text": "" if replies.get(ai["name"]) == "（未填寫）" else replies.get(ai["name"], "")}
+                for ai in ai_list
+            ],
+            "write_full": True,
+            "write_split": True,
+        }
+
+
+def _print_rows(rows: List[Row], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    for row in rows:
+        print("\t".join(str(v) for v in row.values()))
+
+
+# ── 子命令 ──
+def cmd_list_topics(args: argparse.Namespace, cfg: Config) -> int:
+    rows: List[Row] = []
+    for name, folder, backend, ai_list in _topic_entries(cfg):
+        rounds = 0
+        if os.path.isdir(folder):
+            store = open_round_store(folder, backend)
+            try:
+                rounds = store.max_round()
+            finally:
+                store.close()
+        rows.append({"topic": name, "rounds": rounds, "storage": backend,
+                     "members": len(ai_list), "folder": folder})
+    _print_rows(rows, args.json)
+    return 0
+
+
+def cmd_stats(args: argparse.Namespace, cfg: Config) -> int:
+    rows: List[Row] = []
+    for name, folder, backend, ai_list in _topic_entries(cfg, args.topics):
+        if not os.path.isdir(folder):
+            rows.append({"topic": name, "error": f"資料夾不存在：{folder}"})
+            continue
+        store = open_round_store(folder, backend)
+        try:
+            rounds = store.max_round()
+            chars = 0
+            filled = 0
+            for round_num in range(1, rounds + 1):
+                question, replies = store.load_round(round_num, ai_list)
+                chars += len(question) + sum(len(v) for v in replies.values())
+                filled += sum(1 for v in replies.values() if v and v != "（未填寫）")
+        finally:
+            store.close()
+        rows.append({"topic": name, "rounds": rounds, "replies": filled, "chars": chars,
+                     "bytes": _folder_size(folder), "storage": backend})
+    _print_rows(rows, args.json)
+    return 0
+
+
+def cmd_rebuild(args: argparse.Namespace, cfg: Config) -> int:
+    failed = 0
+    for name, folder, backend, ai_list in _topic_entries(cfg, args.topics):
+        if not os.path.isdir(folder):
+            print(f"略過（資料夾不存在）：{name}", file=sys.stderr)
+            continue
+        store = open_round_store(folder, backend)
+        try:
+            store.recover()
+            rebuild_accumulated_record(store, name, ai_list)
+            print(f"已重建：{os.path.join(folder, ACCUMULATED_NAME)}")
+        except Exception as e:
+            record_exception(f"命令列重建累積紀錄失敗：{folder}")
+            print(f"重建失敗：{name}：{e}", file=sys.stderr)
+            failed += 1
+        finally:
+            store.close()
+    return 1 if failed else 0
+
+
+def cmd_verify(args: argparse.Namespace, cfg: Config) -> int:
+    problems = 0
+    for name, folder, backend, ai_list in _topic_entries(cfg, args.topics):
+        issues = []
+        if not os.path.isdir(folder):
+            issues.append(f"資料夾不存在：{folder}")
+        else:
+            leftovers = [n for n in os.listdir(folder) if ROUND_COMMIT_DIR_RE.match(n)]
+            if leftovers:
+                issues.append("有未完成的輪次提交（下次載入時會自動修復）：" + "、".join(sorted(leftovers)))
+            if backend == "files":
+                on_disk = set(scan_round_dirs(folder))
+                listed = {int(n) for n in load_round_manifest(folder)["rounds"]}
+                if on_disk != listed:
+                    issues.append(f"輪次清單與資料夾不一致：清單 {len(listed)} 輪，實際 {len(on_disk)} 輪")
+            store = open_round_store(folder, backend)
+            try:
+                for round_num in range(1, store.max_round() + 1):
+                    try:
+                        store.load_round(round_num, ai_list)
+                    except Exception as e:
+                        issues.append(f"第{round_num}輪無法讀取：{e}")
+            finally:
+                store.close()
+        status = "OK" if not issues else "有問題"
+        print(f"[{status}] {name}")
+        for issue in issues:
+            print(f"    - {issue}")
+        problems += len(issues)
+    return 1 if problems else 0
+
+
+def cmd_export(args: argparse.Namespace, cfg: Config) -> int:
+    [(name, folder, backend, ai_list)] = _topic_entries(cfg, [args.topic])
+    if not os.path.isdir(folder):
+        raise CliError(f"主題資料夾不存在：{folder}")
+    dest = os.path.abspath(args.dest)
+    store = open_round_store(folder, backend)
+    try:
+        if dest.lower().endswith((".json", ".jsonl")):
+            # 每行一輪 record，可再用 import 匯入
+            count = 0
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            with open(dest, "w", encoding="utf-8") as f:
+                for record in _iter_round_records(store, name, ai_list):
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+        else:
+            if os.path.normcase(dest) == os.path.normcase(os.path.abspath(folder)) and backend == "files":
+                raise CliError("目的地與主題資料夾相同")
+            if isinstance(store, SqliteRoundStore):
+                count = export_round_store(store, dest)
+            else:
+                target = FileRoundStore(dest)
+                count = 0
+                for record in _iter_round_records(store, name, ai_list):
+                    target.save_round(record)
+                    count += 1
+            rebuild_accumulated_record(FileRoundStore(dest), name, ai_list)
+    finally:
+        store.close()
+    print(f"已匯出 {count} 輪：{dest}")
+    return 0
+
+
+def _parse_import_record(line: str, line_no: int, source: str, topic: str) -> RoundRecord:
+    """一行 JSON → 已補齊欄位的 record；格式不符時在寫入任何資料前就拋出 CliError"""
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise TypeError
+        round_num = data["round"]
+        replies = data.get("replies", [])
+        if not isinstance(replies, list):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        raise CliError(f"第 {line_no} 行不是有效的輪次資料：{source}")
+    # JSON 的 true / false 在 Python 也是 int，要另外排除
+    if not isinstance(round_num, int) or isinstance(round_num, bool) or round_num < 1:
+        raise CliError(f"第 {line_no} 行的 round 必須是 1 以上的整數：{source}")
+    question = data.get("question", "")
+    saved_at = data.get("saved_at") or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if not isinstance(question, str) or not isinstance(saved_at, str):
+        raise CliError(f"第 {line_no} 行的 question / saved_at 必須是字串：{source}")
+    cleaned: List[ReplyRecord] = []
+    for i, reply in enumerate(replies, 1):
+        if not isinstance(reply, dict) or not isinstance(reply.get("name"), str) or not reply["name"]:
+            raise CliError(f"第 {line_no} 行第 {i} 則回覆缺少 name：{source}")
+        text = reply.get("text", "")
+        path = reply.get("path", "")
+        if not isinstance(text, str) or not isinstance(path, str):
+            raise CliError(f"第 {line_no} 行第 {i} 則回覆的 text / path 必須是字串：{source}")
+        cleaned.append({"name": reply["name"], "path": path, "text": text})
+    return {
+        "round": round_num,
+        "topic": topic,
+        "saved_at": saved_at,
+        "question": question,
+        "replies": cleaned,
+        "write_full": bool(data.get("write_full", True)),
+        "write_split": bool(data.get("write_split", True)),
+    }
+
+
+def cmd_import(args: argparse.Namespace, cfg: Config) -> int:
+    records: List[RoundRecord] = []
+    seen: Dict[int, int] = {}   # 輪次 -> 行號
+    with open(args.source, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = _parse_import_record(line, line_no, args.source, args.topic)
+            round_num = record["round"]
+            if round_num in seen:
+                raise CliError(f"第 {line_no} 行的第{round_num}輪與第 {seen[round_num]} 行重複：{args.source}")
+            seen[round_num] = line_no
+            records.append(record)
+    if not records:
+        raise CliError(f"沒有可匯入的輪次：{args.source}")
+
+    name = args.topic
+    if name in cfg.get("topics", {}):
+        folder = topic_index_folder(cfg, name)
+    else:
+        folder = os.path.join(os.path.abspath(args.root or DESKTOP), topic_folder_name(name))
+    os.makedirs(folder, exist_ok=True)
+    meta, _ = load_topic_meta(cfg, name, folder)
+    backend = meta["storage"] or detect_storage_backend(folder, args.storage)
+
+    # 成員沿用既有設定，再補上匯入資料中出現的新成員
+    ai_list = [dict(ai) for ai in meta["ai_list"]]
+    known = {ai["name"] for ai in ai_list}
+    for record in records:
+        for reply in record["replies"]:
+            if reply["name"] not in known:
+                ai_list.append({"name": reply["name"], "path": reply["path"]})
+                known.add(reply["name"])
+
+    index = SearchIndex(SEARCH_INDEX_FILE) if os.path.exists(SEARCH_INDEX_FILE) else None
+    store = open_round_store(folder, backend)
+    try:
+        store.recover()
+        for record in sorted(records, key=lambda r: r["round"]):
+            store.create_round(record["round"])
+            store.save_round(record)
+            if index is not None:
+                index.update_round(folder, name, record["round"], record["question"],
+                                   {r["name"]: r["text"] for r in record["replies"]})
+        rebuild_accumulated_record(store, name, ai_list)
+    finally:
+        store.close()
+        if index is not None:
+            index.close()
+
+    meta["storage"] = backend
+    meta["ai_list"] = ai_list
+    save_topic_meta(cfg, name, folder, meta)
+    save_config(cfg)
+    print(f"已匯入 {len(records)} 輪至主題「{name}」：{folder}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m ai_discuss", description="AI 討論工具命令列維護工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list-topics", help="列出設定檔中的主題")
+    p.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    p.set_defaults(func=cmd_list_topics)
+
+    p = sub.add_parser("stats", help="各主題的輪次、回覆與容量統計")
+    p.add_argument("topics", nargs="*", help="主題名稱（省略則為全部）")
+    p.add_argument("--json", action="store_true", help="以 JSON 輸出")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("rebuild", help="重建累積紀錄")
+    p.add_argument("topics", nargs="*", help="主題名稱（省略則為全部）")
+    p.set_defaults(func=cmd_rebuild)
+
+    p = sub.add_parser("verify", help="檢查主題資料是否完整可讀")
+    p.add_argument("topics", nargs="*", help="主題名稱（省略則為全部）")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("export", help="匯出主題為資料夾格式或 JSON Lines")
+    p.add_argument("topic", help="主題名稱")
+    p.add_argument("dest", help="目的地資料夾，或 .json / .jsonl 檔案")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="從 export 產生的 JSON Lines 匯入輪次")
+    p.add_argument("source", help="JSON Lines 檔案（每行一輪）")
+    p.add_argument("--topic", required=True, help="匯入到的主題名稱（不存在則建立）")
+    p.add_argument("--root", help="新主題的根目錄（預設為桌面）")
+    p.add_argument("--storage", choices=sorted(STORAGE_BACKENDS), default="files",
+                   help="新主題的儲存格式")
+    p.set_defaults(func=cmd_import)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    cfg = load_config()
+    try:
+        return args.func(args, cfg)
+    except CliError as e:
+        print(f"錯誤：{e}", file=sys.stderr)
+        return 2
+    except OSError as e:
+        record_exception(f"命令列執行失敗：{args.command}")
+        print(f"錯誤：{e}", file=sys.stderr)
+        return 1
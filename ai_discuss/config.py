@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""設定檔讀寫與錯誤紀錄"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from datetime import datetime
+from types import TracebackType
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from .perf import perf_timed
+
+DESKTOP = os.path.join(os.path.expanduser("~"), "Desktop")
+HOME_DIR = os.path.expanduser("~")
+APPDATA_ROOT = os.getenv("APPDATA") or os.path.join(HOME_DIR, "AppData", "Roaming")
+APP_SUPPORT_DIR = os.path.join(APPDATA_ROOT, "AIDiscussTool")
+APP_NAME = "AI 多窗口集中討論工具"
+CONFIG_NAME = "AI討論工具_config.json"
+CONFIG_FILE = os.path.join(APP_SUPPORT_DIR, CONFIG_NAME)
+LEGACY_DESKTOP_CONFIG_FILE = os.path.join(DESKTOP, CONFIG_NAME)
+ERROR_LOG_FILE = os.path.join(APP_SUPPORT_DIR, "AI討論工具_error.log")
+
+# 設定檔根物件：{"topics": {主題: {...}}, "last_topic": str, "prefs": {...}, ...}
+Config = Dict[str, Any]
+ExcInfo = Tuple[Optional[Type[BaseException]], Optional[BaseException], Optional[TracebackType]]
+
+
+def _dedupe_paths(paths: Iterable[str]) -> List[str]:
+    unique = []
+    seen = set()
+    for path in paths:
+        norm = os.path.normcase(os.path.abspath(path))
+        if norm in seen:
+            continue
+        seen.add(norm)
+        unique.append(path)
+    return unique
+
+
+def _config_candidates() -> List[str]:
+    if getattr(sys, 'frozen', False):
+        runtime_dir = os.path.dirname(os.path.abspath(sys.executable))
+    else:
+        # 與主程式同一層（本套件的上一層）
+        runtime_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    legacy_dir = os.path.join(DESKTOP, "AI討論工具")
+    return _dedupe_paths([
+        CONFIG_FILE,
+        LEGACY_DESKTOP_CONFIG_FILE,
+        os.path.join(runtime_dir, CONFIG_NAME),
+        os.path.join(legacy_dir, CONFIG_NAME),
+    ])
+
+
+def _is_primary_config(path: str) -> bool:
+    return os.path.normcase(os.path.abspath(path)) == os.path.normcase(os.path.abspath(CONFIG_FILE))
+
+
+def _backup_corrupt_config(path: str) -> None:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
+    bad = os.path.join(APP_SUPPORT_DIR, f"AI討論工具_config_corrupt_{ts}.bin")
+    try:
+        shutil.copy2(path, bad)
+    except OSError:
+        pass
+
+
+def _normalize_config(cfg: Any) -> Config:
+    if not isinstance(cfg, dict):
+        raise ValueError("Config root must be a JSON object.")
+    if "topics" not in cfg or not isinstance(cfg["topics"], dict):
+        cfg["topics"] = {}
+    if "last_topic" not in cfg or not isinstance(cfg["last_topic"], str):
+        cfg["last_topic"] = ""
+    return cfg
+
+
+def load_config() -> Config:
+    default_cfg = {"topics": {}, "last_topic": ""}
+    saw_primary_error = False
+
+    for path in _config_candidates():
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cfg = _normalize_config(json.load(f))
+            if not _is_primary_config(path):
+                try:
+                    save_config(cfg)
+                except OSError:
+                    pass
+            return cfg
+        except (json.JSONDecodeError, UnicodeDecodeError, OSError, ValueError):
+            record_exception(f"讀取設定檔失敗：{path}")
+            if _is_primary_config(path):
+                saw_primary_error = True
+            _backup_corrupt_config(path)
+
+    if saw_primary_error:
+        try:
+            save_config(default_cfg)
+        except OSError:
+            pass
+    return default_cfg
+
+
+def dump_config(cfg: Config) -> str:
+    """設定檔內容（須在修改 cfg 的執行緒呼叫，寫檔則可交給背景執行緒）"""
+    return json.dumps(cfg, ensure_ascii=False, indent=2)
+
+
+@perf_timed("write_config")
+def write_config_text(text: str) -> None:
+    """以暫存檔 + fsync + 改名的方式寫入設定檔"""
+    os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
+    temp_file = CONFIG_FILE + ".tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, CONFIG_FILE)
+    finally:
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+
+
+def save_config(cfg: Config) -> None:
+    write_config_text(dump_config(cfg))
+
+
+def _append_error_log(block: str) -> None:
+    try:
+        os.makedirs(APP_SUPPORT_DIR, exist_ok=True)
+        with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(block.rstrip() + "\n")
+            f.write("-" * 80 + "\n")
+    except OSError:
+        pass
+
+
+def record_exception(context: str, exc_info: Optional[ExcInfo] = None, extra: Any = None) -> None:
+    if exc_info is None:
+        exc_info = sys.exc_info()
+    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lines = [f"[{stamp}] {context}"]
+    if extra:
+        lines.append(str(extra))
+    if exc_info and exc_info[0] is not None:
+        import traceback    # 只在真的出錯時才載入
+        lines.extend("".join(traceback.format_exception(*exc_info)).rstrip().splitlines())
+    _append_error_log("\n".join(lines))
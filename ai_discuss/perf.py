@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+熱點操作的耗時紀錄（只存在記憶體）
+
+  @perf_timed("load_topic")
+  def _load_topic(...): ...
+
+每個操作保留呼叫次數、累計耗時、固定級距的直方圖，以及最近 PERF_WINDOW 次的
+耗時樣本（p50 / p95 由樣本計算）。背景寫檔執行緒也會記錄，所以以鎖保護。
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, TypeVar, cast
+
+PERF_WINDOW = 1000
+# 直方圖級距上限（毫秒），最後一格為更慢的全部
+PERF_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+_BUCKET_LABELS = [f"<={b}ms" for b in PERF_BUCKETS_MS] + [f">{PERF_BUCKETS_MS[-1]}ms"]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _OpStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets", "samples", "last_at")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(PERF_BUCKETS_MS) + 1)
+        self.samples: Deque[float] = deque(maxlen=PERF_WINDOW)
+        self.last_at = ""
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+class PerfRecorder:
+    def __init__(self) -> None:
+        self._ops: Dict[str, _OpStats] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        bucket = len(PERF_BUCKETS_MS)
+        for i, bound in enumerate(PERF_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = _OpStats()
+            op.count += 1
+            op.total_ms += elapsed_ms
+            op.max_ms = max(op.max_ms, elapsed_ms)
+            op.buckets[bucket] += 1
+            op.samples.append(elapsed_ms)
+            op.last_at = datetime.now().strftime("%H:%M:%S")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{操作: {count, p50_ms, p95_ms, max_ms, mean_ms, total_ms, last_at, histogram}}"""
+        with self._lock:
+            items = [(name, op.count, op.total_ms, op.max_ms, list(op.buckets), sorted(op.samples), op.last_at)
+                     for name, op in self._ops.items()]
+        out = {}
+        for name, count, total, peak, buckets, ordered, last_at in sorted(items):
+            out[name] = {
+                "count": count,
+                "p50_ms": _percentile(ordered, 50),
+                "p95_ms": _percentile(ordered, 95),
+                "max_ms": peak,
+                "mean_ms": total / count if count else 0.0,
+                "total_ms": total,
+                "last_at": last_at,
+                "histogram": {label: n for label, n in zip(_BUCKET_LABELS, buckets) if n},
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+            self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def export_json(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        data = {
+            "exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "recording_since": self.started_at,
+            "window": PERF_WINDOW,
+            **(extra or {}),
+            "operations": self.snapshot(),
+        }
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+PERF = PerfRecorder()
+
+
+def perf_timed(name: str, recorder: Optional[PerfRecorder] = None) -> Callable[[F], F]:
+    """記錄函式每次呼叫的耗時（拋出例外也會記錄）"""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                (recorder or PERF).record(name, (time.perf_counter() - started) * 1000)
+        return cast(F, wrapper)
+    return decorator
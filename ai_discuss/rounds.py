@@ -0,0 +1,678 @@
+# -*- coding: utf-8 -*-
+"""
+輪次資料的檔案格式
+- 「第N輪」資料夾掃描與輪次清單（manifest）
+- AI 回覆檔（v2 位移表頭 / 舊格式）
+- 累積紀錄（分段檔 + 位移索引）
+- 整輪的交易式提交與當機修復
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .config import record_exception
+from .perf import perf_timed
+from .textio import (
+    ROUND_READ_CACHE, _ai_reply_path_candidates, _decode_text_bytes, _encode_text,
+    _forget_cached_file, read_text_file, _write_bytes_file, write_text_file,
+)
+
+if sys.version_info >= (3, 8):
+    from typing import TypedDict
+else:   # pragma: no cover
+    TypedDict = dict
+
+if TYPE_CHECKING:
+    from .stores import RoundStore
+
+ACCUMULATED_NAME = "全部討論紀錄（累積）.txt"
+TOPIC_META_DIRNAME = ".ai_discuss"
+ACCUMULATED_INDEX_NAME = "accumulated_index.json"
+ACCUMULATED_INDEX_VERSION = 1
+ROUND_MANIFEST_NAME = "rounds_manifest.json"
+ROUND_MANIFEST_VERSION = 1
+ROUND_DIR_RE = re.compile(r"^第(\d+)輪$")
+ROUND_COMMIT_DIR_RE = re.compile(r"^\.第(\d+)輪\.(staging|ready|old)$")
+# v2 回覆檔首行：固定寬度的魔術字串 + 10 位數內文位元組位移
+REPLY_FILE_MAGIC = b"#AIDT-REPLY v2 body="
+REPLY_FILE_OFFSET_DIGITS = 10
+REPLY_FILE_SEPARATOR = "-" * 40
+
+# AI 成員：{"name": 名稱, "path": 專案路徑}
+AIMember = Dict[str, str]
+# 一輪讀回的內容：(提問, {AI 名稱: 回覆})
+RoundContents = Tuple[str, Dict[str, str]]
+# 輪次清單：{"version", "dir_mtime_ns", "rounds": {"N": {...}}}
+Manifest = Dict[str, Any]
+
+
+class ReplyRecord(TypedDict):
+    name: str
+    path: str
+    text: str
+
+
+class RoundRecord(TypedDict):
+    """一輪送出時的完整內容（儲存層之間傳遞的單位）"""
+    round: int
+    topic: str
+    saved_at: str
+    question: str
+    replies: List[ReplyRecord]
+    write_full: bool
+    write_split: bool
+
+
+_ROUND_MANIFESTS: Dict[str, Manifest] = {}
+_ROUND_MANIFEST_LOCK = threading.RLock()
+
+
+def _topic_meta_dir(topic_folder: str) -> str:
+    return os.path.join(topic_folder, TOPIC_META_DIRNAME)
+
+
+def scan_round_dirs(topic_folder: str) -> Dict[int, str]:
+    """列出主題資料夾內的輪次資料夾：{輪次: 路徑}"""
+    rounds = {}
+    for name in os.listdir(topic_folder):
+        m = ROUND_DIR_RE.match(name)
+        if m and os.path.isdir(os.path.join(topic_folder, name)):
+            rounds[int(m.group(1))] = os.path.join(topic_folder, name)
+    return rounds
+
+
+# ── 輪次清單（manifest）──
+# 每個主題在 .ai_discuss/ 內保存各輪的檔案、大小、修改時間與是否已儲存。
+# 主題資料夾的 mtime 未變時直接使用清單，導航時不必再列目錄。
+def _round_manifest_path(topic_folder: str) -> str:
+    return os.path.join(_topic_meta_dir(topic_folder), ROUND_MANIFEST_NAME)
+
+
+def _round_manifest_key(topic_folder: str) -> str:
+    return os.path.normcase(os.path.abspath(topic_folder))
+
+
+def _is_round_record_file(name: str) -> bool:
+    return name == "提問.txt" or name.endswith("_回覆.txt") or name.endswith("_完整紀錄.txt")
+
+
+def _round_manifest_entry(round_folder: str) -> Dict[str, Any]:
+    files = {}
+    with os.scandir(round_folder) as it:
+        for entry in it:
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files[entry.name] = [st.st_size, st.st_mtime_ns]
+    return {
+        "dir_mtime_ns": os.stat(round_folder).st_mtime_ns,
+        "files": files,
+        "saved": any(_is_round_record_file(name) and size > 0 for name, (size, _) in files.items()),
+    }
+
+
+def _read_round_manifest(topic_folder: str) -> Optional[Manifest]:
+    try:
+        with open(_round_manifest_path(topic_folder), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != ROUND_MANIFEST_VERSION:
+        return None
+    if not isinstance(manifest.get("rounds"), dict):
+        return None
+    return manifest
+
+
+def _persist_round_manifest(topic_folder: str, manifest: Manifest) -> None:
+    try:
+        write_text_file(_round_manifest_path(topic_folder), json.dumps(manifest, ensure_ascii=False))
+    except OSError:
+        # 唯讀位置也能繼續使用（只是下次啟動需重新掃描）
+        record_exception(f"寫入輪次清單失敗：{topic_folder}")
+
+
+def _refresh_round_manifest(topic_folder: str, previous: Optional[Manifest]) -> Manifest:
+    os.makedirs(_topic_meta_dir(topic_folder), exist_ok=True)
+    dir_mtime_ns = os.stat(topic_folder).st_mtime_ns
+    old_rounds = (previous or {}).get("rounds", {})
+    rounds = {}
+    for num, folder in scan_round_dirs(topic_folder).items():
+        old = old_rounds.get(str(num))
+        try:
+            if old and old.get("dir_mtime_ns") == os.stat(folder).st_mtime_ns:
+                rounds[str(num)] = old
+            else:
+                rounds[str(num)] = _round_manifest_entry(folder)
+        except OSError:
+            continue
+    manifest = {"version": ROUND_MANIFEST_VERSION, "dir_mtime_ns": dir_mtime_ns, "rounds": rounds}
+    _persist_round_manifest(topic_folder, manifest)
+    return manifest
+
+
+def load_round_manifest(topic_folder: str) -> Manifest:
+    """取得主題的輪次清單；主題資料夾 mtime 改變時才重新掃描"""
+    key = _round_manifest_key(topic_folder)
+    with _ROUND_MANIFEST_LOCK:
+        st = os.stat(topic_folder)
+        cached = _ROUND_MANIFESTS.get(key)
+        if cached is not None and cached["dir_mtime_ns"] == st.st_mtime_ns:
+            return cached
+        disk = _read_round_manifest(topic_folder)
+        if disk is not None and disk.get("dir_mtime_ns") == st.st_mtime_ns:
+            _ROUND_MANIFESTS[key] = disk
+            return disk
+        manifest = _refresh_round_manifest(topic_folder, cached or disk)
+        _ROUND_MANIFESTS[key] = manifest
+        return manifest
+
+
+def record_round_manifest(topic_folder: str, round_num: int) -> Manifest:
+    """存檔 / 建立輪次後更新該輪項目，並記下目前的主題資料夾 mtime"""
+    key = _round_manifest_key(topic_folder)
+    with _ROUND_MANIFEST_LOCK:
+        manifest = _ROUND_MANIFESTS.get(key) or load_round_manifest(topic_folder)
+        round_folder = os.path.join(topic_folder, f"第{round_num}輪")
+        rounds = dict(manifest["rounds"])
+        if os.path.isdir(round_folder):
+            rounds[str(round_num)] = _round_manifest_entry(round_folder)
+        else:
+            rounds.pop(str(round_num), None)
+        manifest = {
+            "version": ROUND_MANIFEST_VERSION,
+            "dir_mtime_ns": os.stat(topic_folder).st_mtime_ns,
+            "rounds": rounds,
+        }
+        _persist_round_manifest(topic_folder, manifest)
+        _ROUND_MANIFESTS[key] = manifest
+        return manifest
+
+
+def scan_max_round(topic_folder: str) -> int:
+    if not os.path.isdir(topic_folder):
+        return 0
+    try:
+        rounds = load_round_manifest(topic_folder)["rounds"]
+        return max((int(n) for n in rounds), default=0)
+    except OSError:
+        record_exception(f"讀取輪次清單失敗，改為直接掃描：{topic_folder}")
+
+    try:
+        return max(scan_round_dirs(topic_folder), default=0)
+    except OSError:
+        record_exception(f"掃描輪次資料夾失敗：{topic_folder}")
+        return 0
+
+
+def _parse_reply_file(path: str) -> str:
+    """舊格式 AI 回覆檔：略過分隔線（---------- / ==========）以上的表頭，只取內文"""
+    lines = read_text_file(path, default="").splitlines(True)
+    content_lines = []
+    past_header = False
+    for line in lines:
+        if past_header:
+            content_lines.append(line)
+        elif line.startswith("-" * 10) or line.startswith("=" * 10):
+            past_header = True
+    return "".join(content_lines).strip()
+
+
+def _read_reply_body(path: str) -> str:
+    """讀取 AI 回覆檔內文。
+
+    v2 檔依首行記錄的位移直接跳到內文，不必逐行掃描；若首行不符或位移前方不是
+    分隔線（例如使用者手動改過表頭），就退回舊格式解析。
+    """
+    sep = REPLY_FILE_SEPARATOR.encode("ascii")
+    guard = len(sep) + 2   # 分隔線 + 最長的換行（\r\n）
+    try:
+        with open(path, "rb") as f:
+            first = f.read(len(REPLY_FILE_MAGIC) + REPLY_FILE_OFFSET_DIGITS)
+            digits = first[len(REPLY_FILE_MAGIC):]
+            if first.startswith(REPLY_FILE_MAGIC) and digits.isdigit() and int(digits) >= guard:
+                f.seek(int(digits) - guard)
+                data = f.read()
+                if data[:guard].endswith((sep + b"\n", sep + b"\r\n")):
+                    text, _ = _decode_text_bytes(data[guard:], "utf-8")
+                    return text.replace("\r\n", "\n").replace("\r", "\n").strip()
+    except FileNotFoundError:
+        return ""
+    except OSError:
+        record_exception(f"讀取檔案失敗：{path}")
+        return ""
+    return _parse_reply_file(path)
+
+
+def read_round_files(topic_folder: str, round_num: int, ai_list: Sequence[AIMember]) -> RoundContents:
+    rn = f"第{round_num}輪"
+    folder = os.path.join(topic_folder, rn)
+    question = ROUND_READ_CACHE.get(os.path.join(folder, "提問.txt"), read_text_file) or ""
+    responses = {}
+    for ai in ai_list:
+        for path in _ai_reply_path_candidates(folder, ai["name"]):
+            body = ROUND_READ_CACHE.get(path, _read_reply_body)
+            if body is not None:
+                responses[ai["name"]] = body
+                break
+    return question, responses
+
+
+# ── 累積紀錄：分段檔 + 位移索引 ──
+# 累積檔 = 表頭 + 第1輪段落 + 第2輪段落 + …；索引記錄表頭與每段的位元組長度，
+# 送出第 N 輪時只需改寫（或附加）第 N 段，不必重讀所有輪次。
+def _accumulated_index_path(topic_folder: str) -> str:
+    return os.path.join(_topic_meta_dir(topic_folder), ACCUMULATED_INDEX_NAME)
+
+
+def _accumulated_header_key(topic_name: str, ai_list: Sequence[AIMember]) -> str:
+    # 表頭與「無完整紀錄時的替代段落」都取決於主題名稱與 AI 成員（含路徑）
+    raw = json.dumps([topic_name, [[a["name"], a.get("path", "")] for a in ai_list]], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _accumulated_header(topic_name: str, ai_list: Sequence[AIMember]) -> str:
+    lines = [
+        f"主題：{topic_name}  —  全部討論累積紀錄",
+        f"更新時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"AI 成員：{', '.join(a['name'] for a in ai_list)}",
+        "=" * 60, "",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _fallback_round_text(topic_name: str, round_num: int, question: str,
+                         replies: Dict[str, str], ai_list: Sequence[AIMember]) -> str:
+    """沒有完整紀錄檔時，以提問 / 個別回覆組出與完整紀錄相近的段落"""
+    rn = f"第{round_num}輪"
+    fallback_lines = [
+        f"主題：{topic_name}",
+        f"輪次：{rn}",
+        "=" * 60,
+        "",
+        "【本輪提問】",
+        question,
+        "",
+        "=" * 60,
+    ]
+    for ai in ai_list:
+        reply = replies.get(ai["name"], "")
+        fallback_lines += ["", f"【{ai['name']}】的回覆"]
+        if ai.get("path"):
+            fallback_lines.append(f"專案路徑：{ai['path']}")
+        fallback_lines += ["-" * 40, reply if reply else "（未填寫）", "", "=" * 60]
+    return "\n".join(fallback_lines).rstrip()
+
+
+def _load_accumulated_index(topic_folder: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_accumulated_index_path(topic_folder), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != ACCUMULATED_INDEX_VERSION:
+        return None
+    if not isinstance(index.get("segments"), list) or not isinstance(index.get("header_len"), int):
+        return None
+    return index
+
+
+def _save_accumulated_index(topic_folder: str, header_key: str, header_len: int,
+                            segments: List[int]) -> None:
+    st = os.stat(os.path.join(topic_folder, ACCUMULATED_NAME))
+    index = {
+        "version": ACCUMULATED_INDEX_VERSION,
+        "header_key": header_key,
+        "header_len": header_len,
+        "segments": segments,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+    write_text_file(_accumulated_index_path(topic_folder), json.dumps(index, ensure_ascii=False))
+
+
+@perf_timed("rebuild_accumulated")
+def rebuild_accumulated_record(store: RoundStore, topic_name: str, ai_list: Sequence[AIMember]) -> None:
+    """完整重建累積紀錄與位移索引（索引失效或 AI 成員變動時使用）"""
+    topic_folder = store.topic_folder
+    header = _encode_text(_accumulated_header(topic_name, ai_list))
+    chunks = [header]
+    segments = []
+    for i in range(1, store.max_round() + 1):
+        seg = _encode_text(store.accumulated_segment(topic_name, i, ai_list))
+        chunks.append(seg)
+        segments.append(len(seg))
+    _write_bytes_file(os.path.join(topic_folder, ACCUMULATED_NAME), b"".join(chunks))
+    _save_accumulated_index(topic_folder, _accumulated_header_key(topic_name, ai_list), len(header), segments)
+
+
+@perf_timed("update_accumulated")
+def update_accumulated_round(store: RoundStore, topic_name: str, ai_list: Sequence[AIMember],
+                             round_num: int) -> bool:
+    """只改寫第 N 輪的段落（或附加在最後）。
+
+    索引不存在、與累積檔不一致（外部編輯 / 中途當機）、或表頭變動時回傳 False，
+    由呼叫端改做完整重建。
+    """
+    topic_folder = store.topic_folder
+    path = os.path.join(topic_folder, ACCUMULATED_NAME)
+    index = _load_accumulated_index(topic_folder)
+    if index is None or index.get("header_key") != _accumulated_header_key(topic_name, ai_list):
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != index.get("size") or st.st_mtime_ns != index.get("mtime_ns"):
+        return False
+
+    segments = list(index["segments"])
+    if round_num < 1 or round_num > len(segments) + 1:
+        return False
+    header = _encode_text(_accumulated_header(topic_name, ai_list))
+    if len(header) != index["header_len"]:
+        return False
+
+    seg = _encode_text(store.accumulated_segment(topic_name, round_num, ai_list))
+    offset = index["header_len"] + sum(segments[:round_num - 1])
+    old_len = segments[round_num - 1] if round_num <= len(segments) else 0
+
+    with open(path, "r+b") as f:
+        f.write(header)
+        if len(seg) == old_len:
+            f.seek(offset)
+            f.write(seg)
+        else:
+            f.seek(offset + old_len)
+            tail = f.read()
+            f.seek(offset)
+            f.write(seg)
+            f.write(tail)
+            f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+    if round_num <= len(segments):
+        segments[round_num - 1] = len(seg)
+    else:
+        segments.append(len(seg))
+    _save_accumulated_index(topic_folder, index["header_key"], index["header_len"], segments)
+    return True
+
+
+# ── 輪次儲存層 ──
+# 一輪的內容以 record 表示：
+#   {"round", "topic", "saved_at", "question", "replies": [{"name", "path", "text"}],
+#    "write_full", "write_split"}
+# FileRoundStore 對應原本的「第N輪」資料夾格式；SqliteRoundStore 把所有輪次存進
+# 主題資料夾內 .ai_discuss/rounds.sqlite3，可再匯出回資料夾格式（見 export_round_store）。
+def format_full_record(record: RoundRecord) -> str:
+    rn = f"第{record['round']}輪"
+    lines = [
+        f"主題：{record['topic']}",
+        f"輪次：{rn}",
+        f"時間：{record['saved_at']}",
+        "=" * 60, "",
+        "【本輪提問】", record["question"], "",
+        "=" * 60,
+    ]
+    for reply in record["replies"]:
+        lines += ["", f"【{reply['name']}】的回覆"]
+        if reply.get("path"):
+            lines.append(f"專案路徑：{reply['path']}")
+        lines += ["-" * 40, reply["text"] if reply["text"] else "（未填寫）", "", "=" * 60]
+    return "\n".join(lines)
+
+
+def encode_reply_file(record: RoundRecord, reply: ReplyRecord) -> bytes:
+    """AI 回覆檔（v2）的位元組內容。
+
+    首行記錄內文的位元組位移，其後仍是原本可讀的表頭與分隔線，
+    因此舊版程式用分隔線解析也讀得到相同內文。換行一律為 \n，
+    各平台寫出的檔案位元組完全相同（讀取時 \r\n 仍相容）。
+    """
+    header_lines = [
+        f"AI 名稱：{reply['name']}",
+    ]
+    if reply.get("path"):
+        header_lines.append(f"專案路徑：{reply['path']}")
+    header_lines.extend([
+        f"輪次：第{record['round']}輪",
+        REPLY_FILE_SEPARATOR,
+    ])
+    header = ("\n".join(header_lines) + "\n").encode("utf-8")
+    body = (reply["text"] if reply["text"] else "（未填寫）").encode("utf-8")
+    offset = len(REPLY_FILE_MAGIC) + REPLY_FILE_OFFSET_DIGITS + 1 + len(header)
+    first_line = REPLY_FILE_MAGIC + str(offset).zfill(REPLY_FILE_OFFSET_DIGITS).encode("ascii") + b"\n"
+    return first_line + header + body
+
+
+# ── 輪次交易式提交 ──
+# 整輪檔案先寫進同層的 .第N輪.staging，逐檔落盤後改名為 .第N輪.ready（代表已完整、
+# 可套用），再把 第N輪 整個資料夾換成新的。任何時間點當機，recover_round_commits()
+# 都能回到「全部舊檔」或「全部新檔」其中之一。
+# 交換資料夾時持有 _ROUND_MANIFEST_LOCK，讀取輪次清單或建立輪次的執行緒不會看到
+# 「第N輪」暫時不存在的瞬間；進行中的提交記在 _ACTIVE_COMMITS，修復時不會誤刪。
+_ACTIVE_COMMITS: Set[Tuple[str, int]] = set()
+
+
+def _round_commit_dir(topic_folder: str, round_num: int, state: str) -> str:
+    return os.path.join(topic_folder, f".第{round_num}輪.{state}")
+
+
+def _fsync_files(paths: Iterable[str]) -> None:
+    """逐檔 fsync（沒有整批落盤 API 時的後備做法）"""
+    for path in paths:
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+
+
+def _fsync_dir(path: str) -> None:
+    """讓資料夾內的新增 / 改名落盤。Windows 無法開啟資料夾做 fsync，NTFS 的中繼資料
+    由檔案系統日誌保護，直接略過。"""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass   # 部分網路檔案系統不支援資料夾 fsync
+    finally:
+        os.close(fd)
+
+
+_SYNCFS: List[Optional[Callable[[int], int]]] = []   # 第一次使用時載入；[None] 表示無法使用
+
+
+def _syncfs(path: str) -> bool:
+    """Linux：以 syncfs() 讓 path 所在的檔案系統（只有這一個）一次落盤；無法使用時回傳 False"""
+    if not _SYNCFS:
+        try:
+            import ctypes
+            func = ctypes.CDLL(None, use_errno=True).syncfs
+            func.argtypes = [ctypes.c_int]
+            _SYNCFS.append(func)
+        except (OSError, AttributeError):
+            _SYNCFS.append(None)
+    syncfs = _SYNCFS[0]
+    if syncfs is None:
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return syncfs(fd) == 0
+    finally:
+        os.close(fd)
+
+
+def _durability_barrier(staging_dir: str, paths: Sequence[str]) -> None:
+    """暫存資料夾內所有檔案（含資料夾本身的項目）的單一落盤屏障。
+
+    - Linux：一次 syncfs()，範圍是主題資料夾所在的檔案系統，不影響其他磁碟
+    - macOS：fsync() 只把資料交給磁碟、不等待寫入媒體，成本很低；最後對暫存資料夾
+      做一次 F_FULLFSYNC，才是真正等待磁碟快取清空的那一次
+    - 其他平台（Windows）與上述失敗時：逐檔 fsync 再 fsync 資料夾，每個檔案一次
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            if _syncfs(staging_dir):
+                return
+        except OSError:
+            pass
+    elif sys.platform == "darwin":
+        import fcntl
+        full_fsync = getattr(fcntl, "F_FULLFSYNC", None)
+        if full_fsync is not None:
+            _fsync_files(paths)
+            fd = os.open(staging_dir, os.O_RDONLY)
+            try:
+                fcntl.fcntl(fd, full_fsync)
+                return
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+    _fsync_files(paths)
+    _fsync_dir(staging_dir)
+
+
+def create_round_dir(topic_folder: str, round_num: int) -> str:
+    """建立「第N輪」資料夾（與提交的資料夾交換互斥）"""
+    folder = os.path.join(topic_folder, f"第{round_num}輪")
+    with _ROUND_MANIFEST_LOCK:
+        os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _move_files_into(src_dir: str, dest_dir: str) -> None:
+    """逐檔把 src_dir 內容移入 dest_dir（覆蓋同名檔）後移除 src_dir"""
+    os.makedirs(dest_dir, exist_ok=True)
+    for name in os.listdir(src_dir):
+        dest = os.path.join(dest_dir, name)
+        _forget_cached_file(dest)
+        os.replace(os.path.join(src_dir, name), dest)
+    shutil.rmtree(src_dir, ignore_errors=True)
+
+
+def _carry_over_files(final_dir: str, staging_dir: str, new_names: Iterable[str]) -> bool:
+    """把資料夾內其餘既有檔案帶進暫存區（優先硬連結）；遇到子資料夾回傳 False"""
+    if not os.path.isdir(final_dir):
+        return True
+    with os.scandir(final_dir) as it:
+        entries = [entry for entry in it if entry.name not in new_names]
+    if any(entry.is_dir() for entry in entries):
+        return False
+    for entry in entries:
+        dest = os.path.join(staging_dir, entry.name)
+        try:
+            os.link(entry.path, dest)
+        except OSError:
+            shutil.copy2(entry.path, dest)
+    return True
+
+
+def commit_round_files(topic_folder: str, round_num: int, files: Dict[str, bytes]) -> None:
+    """以交易方式寫入一輪的所有檔案（files：{檔名: 位元組}）。
+
+    暫存檔寫完後只過一次落盤屏障（見 _durability_barrier），改名為 .ready 後再 fsync
+    主題資料夾一次；Linux 上整輪固定兩次系統呼叫，與 AI 人數無關。之後的資料夾交換
+    不再落盤：.ready 已確定存在，當機後 recover_round_commits() 會把交換補完。
+    """
+    final_dir = os.path.join(topic_folder, f"第{round_num}輪")
+    staging_dir = _round_commit_dir(topic_folder, round_num, "staging")
+    ready_dir = _round_commit_dir(topic_folder, round_num, "ready")
+    old_dir = _round_commit_dir(topic_folder, round_num, "old")
+    active = (_round_manifest_key(topic_folder), round_num)
+    with _ROUND_MANIFEST_LOCK:
+        _recover_round_commit(topic_folder, round_num)
+        _ACTIVE_COMMITS.add(active)
+    try:
+        os.makedirs(staging_dir)
+        try:
+            staged = []
+            for name, data in files.items():
+                path = os.path.join(staging_dir, name)
+                with open(path, "wb") as f:
+                    f.write(data)
+                staged.append(path)
+            swap_dir = _carry_over_files(final_dir, staging_dir, files)
+            _durability_barrier(staging_dir, staged)
+            os.replace(staging_dir, ready_dir)
+            _fsync_dir(topic_folder)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        # 到這裡新內容已完整落盤；之後即使失敗，recover_round_commits() 也會往前套用
+        for name in files:
+            _forget_cached_file(os.path.join(final_dir, name))
+        with _ROUND_MANIFEST_LOCK:
+            if swap_dir:
+                try:
+                    if os.path.isdir(final_dir):
+                        os.replace(final_dir, old_dir)
+                    os.replace(ready_dir, final_dir)
+                except OSError:
+                    # Windows 上資料夾被其他程式開著時無法改名，改為逐檔套用
+                    pass
+            _recover_round_commit(topic_folder, round_num)
+    finally:
+        with _ROUND_MANIFEST_LOCK:
+            _ACTIVE_COMMITS.discard(active)
+
+
+def recover_round_commits(topic_folder: str, round_num: Optional[int] = None) -> None:
+    """完成或丟棄中斷的輪次提交；round_num 為 None 時處理整個主題。
+    本行程背景寫檔執行緒正在進行的提交不會被動到。"""
+    if round_num is None:
+        rounds = set()
+        try:
+            names = os.listdir(topic_folder)
+        except OSError:
+            return
+        for name in names:
+            m = ROUND_COMMIT_DIR_RE.match(name)
+            if m:
+                rounds.add(int(m.group(1)))
+    else:
+        rounds = {round_num}
+
+    with _ROUND_MANIFEST_LOCK:
+        key = _round_manifest_key(topic_folder)
+        for n in sorted(rounds):
+            if (key, n) not in _ACTIVE_COMMITS:
+                _recover_round_commit(topic_folder, n)
+
+
+def _recover_round_commit(topic_folder: str, n: int) -> None:
+    final_dir = os.path.join(topic_folder, f"第{n}輪")
+    staging_dir = _round_commit_dir(topic_folder, n, "staging")
+    ready_dir = _round_commit_dir(topic_folder, n, "ready")
+    old_dir = _round_commit_dir(topic_folder, n, "old")
+    if os.path.isdir(staging_dir):
+        # 尚未落盤完成的提交：丟棄，保留原本內容
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    if os.path.isdir(ready_dir):
+        if os.path.isdir(final_dir):
+            _move_files_into(ready_dir, final_dir)
+        else:
+            os.replace(ready_dir, final_dir)
+    if os.path.isdir(old_dir):
+        if os.path.isdir(final_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(old_dir, final_dir)
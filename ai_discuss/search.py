@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""跨主題的全文搜尋索引"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from .config import APP_SUPPORT_DIR, record_exception
+from .perf import perf_timed
+from .rounds import AIMember
+from .stores import STORAGE_BACKENDS, RoundStore, open_round_store
+from .topics import TopicEntry, topic_details
+
+SEARCH_INDEX_FILE = os.path.join(APP_SUPPORT_DIR, "search_index.sqlite3")
+SEARCH_INDEX_VERSION = 1
+SEARCH_RESULT_LIMIT = 200
+
+# 命中：{"folder", "topic", "round", "kind", "name", "pos", "length", "snippet"}
+SearchHit = Dict[str, Any]
+
+# ── 全文搜尋索引 ──
+# 所有主題的提問與回覆建成一份倒排索引（APP_SUPPORT_DIR/search_index.sqlite3）。
+# 斷詞：英數字取整個單字；中日韓等其他文字每段取相鄰兩字（bigram），
+# 並把每段最後一字單獨收錄，讓單字查詢也找得到。
+# 詞表優先存進 SQLite FTS5（壓縮的倒排串列，支援字首查詢）；
+# 不支援 FTS5 的 SQLite 改用一般的 postings 表。
+# 查詢先取得包含所有詞的候選文件，再對原文比對子字串排除誤判。
+_SEARCH_TOKEN_RE = re.compile(r"[0-9a-z_]+|[^\W0-9a-z_]+")
+
+
+def _search_terms(text: Optional[str]) -> Set[str]:
+    terms = set()
+    for run in _SEARCH_TOKEN_RE.findall((text or "").casefold()):
+        if run.isascii():
+            if run.strip("_"):
+                terms.add(run[:64])
+            continue
+        for i in range(len(run) - 1):
+            terms.add(run[i:i + 2])
+        terms.add(run[-1])
+    return terms
+
+
+def _search_snippet(text: str, pos: int, length: int, width: int = 40) -> str:
+    start = max(0, pos - width)
+    end = min(len(text), pos + length + width)
+    snippet = text[start:end].replace("\r", " ").replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class SearchIndex:
+    """跨主題的全文搜尋索引；背景寫檔執行緒與 UI 執行緒共用連線，以 _lock 串行化"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS topics (
+            folder TEXT PRIMARY KEY,
+            topic TEXT NOT NULL,
+            indexed_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY,
+            folder TEXT NOT NULL,
+            topic TEXT NOT NULL,
+            round INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL DEFAULT '',
+            body TEXT NOT NULL,
+            UNIQUE (folder, round, kind, name)
+        );
+    """
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS doc_terms
+            USING fts5(terms, content='', tokenize='unicode61 remove_diacritics 0');
+    """
+    POSTINGS_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            doc_id INTEGER NOT NULL,
+            PRIMARY KEY (term, doc_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str) -> None:
+        import sqlite3
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        # 索引可隨時由原始檔重建，不需要每次提交都完整落盤
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+            try:
+                self._conn.executescript(self.FTS_SCHEMA)
+                self.use_fts = True
+            except sqlite3.OperationalError:
+                self._conn.executescript(self.POSTINGS_SCHEMA)
+                self.use_fts = False
+            version = f"{SEARCH_INDEX_VERSION}-{'fts5' if self.use_fts else 'postings'}"
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if row is None or row[0] != version:
+                # 斷詞規則或詞表格式改變時索引作廢，之後依主題重新建立
+                self._clear()
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                                   (version,))
+
+    @staticmethod
+    def folder_key(topic_folder: str) -> str:
+        return os.path.normcase(os.path.abspath(topic_folder))
+
+    def _delete_round(self, folder_key: str, round_num: int) -> None:
+        rows = self._conn.execute(
+            "SELECT id, body FROM docs WHERE folder = ? AND round = ?", (folder_key, round_num)
+        ).fetchall()
+        for doc_id, body in rows:
+            terms = _search_terms(body)
+            if self.use_fts:
+                self._conn.execute("INSERT INTO doc_terms (doc_terms, rowid, terms) VALUES ('delete', ?, ?)",
+                                   (doc_id, " ".join(sorted(terms))))
+            else:
+                self._conn.executemany("DELETE FROM postings WHERE term = ? AND doc_id = ?",
+                                       ((t, doc_id) for t in terms))
+        self._conn.execute("DELETE FROM docs WHERE folder = ? AND round = ?", (folder_key, round_num))
+
+    def _insert_doc(self, folder_key: str, topic: str, round_num: int, kind: str, name: str, body: str) -> None:
+        if not body:
+            return
+        cur = self._conn.execute(
+            "INSERT INTO docs (folder, topic, round, kind, name, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (folder_key, topic, round_num, kind, name, body)
+        )
+        terms = _search_terms(body)
+        if self.use_fts:
+            # contentless 表刪除時須提供相同內容，排序後可由原文重算出一樣的字串
+            self._conn.execute("INSERT INTO doc_terms (rowid, terms) VALUES (?, ?)",
+                               (cur.lastrowid, " ".join(sorted(terms))))
+        else:
+            self._conn.executemany("INSERT OR IGNORE INTO postings (term, doc_id) VALUES (?, ?)",
+                                   ((t, cur.lastrowid) for t in terms))
+
+    def update_round(self, topic_folder: str, topic: str, round_num: int, question: str,
+                     replies: Dict[str, str]) -> None:
+        """以一輪的最新內容取代索引中的舊內容（replies：{AI 名稱: 內文}）"""
+        key = self.folder_key(topic_folder)
+        with self._lock, self._conn:
+            self._delete_round(key, round_num)
+            self._insert_doc(key, topic, round_num, "question", "", question)
+            for name, body in replies.items():
+                self._insert_doc(key, topic, round_num, "ai", name, body)
+
+    def indexed_folders(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT folder FROM topics")}
+
+    def index_topic(self, topic: str, store: RoundStore, ai_list: Sequence[AIMember],
+                    cancel: Optional[threading.Event] = None) -> bool:
+        """完整建立一個主題的索引；每輪讀檔與寫入都在鎖內，避免蓋掉背景存檔剛寫的內容。
+
+        cancel（threading.Event）被設定時中途停止並回傳 False，該主題下次會重建。
+        """
+        key = self.folder_key(store.topic_folder)
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT DISTINCT round FROM docs WHERE folder = ?", (key,)).fetchall()
+            for (round_num,) in rows:
+                self._delete_round(key, round_num)
+        for round_num in range(1, store.max_round() + 1):
+            if cancel is not None and cancel.is_set():
+                return False
+            with self._lock:
+                question, replies = store.load_round(round_num, ai_list)
+                # 舊檔的空白回覆會寫成「（未填寫）」，與即時存檔一致地略過
+                replies = {n: b for n, b in replies.items() if b != "（未填寫）"}
+                self.update_round(store.topic_folder, topic, round_num, question, replies)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO topics (folder, topic, indexed_at) VALUES (?, ?, ?)",
+                (key, topic, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+        return True
+
+    def _clear(self) -> None:
+        if self.use_fts:
+            self._conn.execute("INSERT INTO doc_terms (doc_terms) VALUES ('delete-all')")
+        else:
+            self._conn.execute("DELETE FROM postings")
+        self._conn.execute("DELETE FROM docs")
+        self._conn.execute("DELETE FROM topics")
+
+    def forget_topics(self) -> None:
+        """清空整份索引（重建索引用）"""
+        with self._lock, self._conn:
+            self._clear()
+
+    def _candidate_ids(self, lookups: Dict[str, bool]) -> List[int]:
+        """包含所有查詢詞的文件 id（由新到舊）"""
+        if self.use_fts:
+            expr = " AND ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in lookups.items())
+            rows = self._conn.execute(
+                "SELECT rowid FROM doc_terms WHERE doc_terms MATCH ? ORDER BY rowid DESC", (expr,)
+            )
+            return [row[0] for row in rows]
+        candidates: Optional[Set[int]] = None
+        # 先處理命中最少的詞，交集會最快縮小
+        for term, prefix in sorted(lookups.items(), key=lambda kv: (kv[1], -len(kv[0]))):
+            ids = self._term_doc_ids(term, prefix)
+            candidates = ids if candidates is None else (candidates & ids)
+            if not candidates:
+                return []
+        return sorted(candidates or (), reverse=True)
+
+    def _term_doc_ids(self, term: str, prefix: bool) -> Set[int]:
+        if prefix:
+            rows = self._conn.execute(
+                "SELECT doc_id FROM postings WHERE term >= ? AND term < ?", (term, term + "\U0010ffff")
+            )
+        else:
+            rows = self._conn.execute("SELECT doc_id FROM postings WHERE term = ?", (term,))
+        return {row[0] for row in rows}
+
+    @perf_timed("search")
+    def search(self, query: str, limit: int = SEARCH_RESULT_LIMIT) -> List[SearchHit]:
+        """回傳命中清單：{"folder", "topic", "round", "kind", "name", "pos", "length", "snippet"}"""
+        pieces = [p for p in (query or "").casefold().split() if p]
+        if not pieces:
+            return []
+        lookups = {}
+        for piece in pieces:
+            for run in _SEARCH_TOKEN_RE.findall(piece):
+                if run.isascii():
+                    if run.strip("_"):
+                        lookups[run[:64]] = True      # 英數字以字首比對，可查部分單字
+                elif len(run) == 1:
+                    lookups[run] = True               # 單一個字：比對以該字開頭的 bigram
+                else:
+                    for i in range(len(run) - 1):
+                        lookups[run[i:i + 2]] = False
+        if not lookups:
+            # 查詢只有標點符號等無法斷詞的字元
+            return []
+        with self._lock:
+            ordered = self._candidate_ids(lookups)
+            hits = []
+            for i in range(0, len(ordered), 500):
+                chunk = ordered[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT id, folder, topic, round, kind, name, body FROM docs WHERE id IN ({marks})"
+                    " ORDER BY id DESC", chunk
+                ).fetchall()
+                for _id, folder, topic, round_num, kind, name, body in rows:
+                    folded = body.casefold()
+                    if not all(p in folded for p in pieces):
+                        continue
+                    pos = folded.find(pieces[0])
+                    hits.append({
+                        "folder": folder, "topic": topic, "round": round_num,
+                        "kind": kind, "name": name, "pos": pos, "length": len(pieces[0]),
+                        "snippet": _search_snippet(body, pos, len(pieces[0])),
+                    })
+                    if len(hits) >= limit:
+                        return hits
+            return hits
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            docs = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+            topics = self._conn.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
+        return {"docs": docs, "topics": topics}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_search_index(index: SearchIndex, topics: Sequence[TopicEntry],
+                       progress: Optional[Dict[str, int]] = None,
+                       cancel: Optional[threading.Event] = None) -> None:
+    """替尚未建立索引的主題建立索引（topics：[(名稱, 資料夾, 儲存格式, ai_list)]）。
+
+    儲存格式或 ai_list 為 None 的主題在這裡（背景執行緒）才讀取 topic.json。
+    progress 為 {"done", "total"} 字典，供 UI 執行緒輪詢顯示進度。
+    """
+    done = index.indexed_folders()
+    todo = [t for t in topics if os.path.isdir(t[1]) and index.folder_key(t[1]) not in done]
+    if progress is not None:
+        progress.update(done=0, total=len(todo))
+    for i, (name, folder, backend, ai_list) in enumerate(todo):
+        if cancel is not None and cancel.is_set():
+            return
+        try:
+            if backend not in STORAGE_BACKENDS or ai_list is None:
+                backend, ai_list = topic_details(folder, {"storage": backend, "ai_list": ai_list})
+            store = open_round_store(folder, backend)
+            try:
+                index.index_topic(name, store, ai_list, cancel)
+            finally:
+                store.close()
+        except Exception:
+            record_exception(f"建立搜尋索引失敗：{folder}")
+        if progress is not None:
+            progress["done"] = i + 1
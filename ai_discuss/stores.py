@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+輪次儲存層
+- FileRoundStore：原本的「第N輪」資料夾格式
+- SqliteRoundStore：所有輪次存在主題資料夾內 .ai_discuss/rounds.sqlite3
+- RoundSaveWriter：專用背景寫檔執行緒
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from .config import ExcInfo, record_exception
+from .perf import perf_timed
+from .rounds import (
+    AIMember, ReplyRecord, RoundContents, RoundRecord, _topic_meta_dir,
+    commit_round_files, create_round_dir, encode_reply_file, format_full_record, read_round_files,
+    rebuild_accumulated_record, record_round_manifest, recover_round_commits,
+    scan_max_round, update_accumulated_round, _fallback_round_text,
+)
+from .textio import _ai_reply_filename, _encode_text, read_text_file
+
+if sys.version_info >= (3, 8):
+    from typing import Protocol
+else:   # pragma: no cover
+    Protocol = object
+
+ROUND_DB_NAME = "rounds.sqlite3"
+ROUND_DB_SCHEMA_VERSION = 1
+STORAGE_BACKENDS = {"files": "純文字資料夾", "sqlite": "SQLite 資料庫"}
+
+# 背景寫檔結果：(key, payload, 工作回傳值, exc_info 或 None)
+WriterResult = Tuple[Hashable, Dict[str, Any], Any, Optional[ExcInfo]]
+# 背景寫檔工作：{"key", "payload", "work"}
+WriterJob = Dict[str, Any]
+# SqliteRoundStore 一輪的查詢列：(topic, saved_at, question, write_full, write_split, saved,
+#  回覆 name, path, body)；沒有回覆時後三欄為 None
+RoundRow = Tuple[str, str, str, int, int, int, Optional[str], Optional[str], Optional[str]]
+
+
+class RoundStore(Protocol):
+    """FileRoundStore / SqliteRoundStore 共同的介面"""
+    backend: str
+    topic_folder: str
+
+    def round_location(self, round_num: int) -> str: ...
+    def max_round(self) -> int: ...
+    def create_round(self, round_num: int) -> None: ...
+    def load_round(self, round_num: int, ai_list: Sequence[AIMember]) -> RoundContents: ...
+    def save_round(self, record: RoundRecord) -> None: ...
+    def recover(self) -> None: ...
+    def accumulated_segment(self, topic_name: str, round_num: int, ai_list: Sequence[AIMember]) -> str: ...
+    def close(self) -> None: ...
+
+
+class FileRoundStore:
+    """原本的純文字格式：每輪一個「第N輪」資料夾"""
+    backend = "files"
+
+    def __init__(self, topic_folder: str) -> None:
+        self.topic_folder = topic_folder
+
+    def round_folder(self, round_num: int) -> str:
+        return os.path.join(self.topic_folder, f"第{round_num}輪")
+
+    def round_location(self, round_num: int) -> str:
+        return self.round_folder(round_num)
+
+    def max_round(self) -> int:
+        return scan_max_round(self.topic_folder)
+
+    def create_round(self, round_num: int) -> None:
+        create_round_dir(self.topic_folder, round_num)
+        self._record_manifest(round_num)
+
+    def load_round(self, round_num: int, ai_list: Sequence[AIMember]) -> RoundContents:
+        return read_round_files(self.topic_folder, round_num, ai_list)
+
+    def save_round(self, record: RoundRecord) -> None:
+        rn = f"第{record['round']}輪"
+        files = {}
+        if record["write_full"]:
+            files[f"{rn}_完整紀錄.txt"] = _encode_text(format_full_record(record))
+        if record["write_split"]:
+            for reply in record["replies"]:
+                files[_ai_reply_filename(reply["name"])] = encode_reply_file(record, reply)
+            files["提問.txt"] = _encode_text(record["question"])
+        commit_round_files(self.topic_folder, record["round"], files)
+        self._record_manifest(record["round"])
+
+    def recover(self) -> None:
+        """清理上次未完成的輪次提交（載入主題時呼叫）"""
+        recover_round_commits(self.topic_folder)
+
+    def accumulated_segment(self, topic_name: str, round_num: int, ai_list: Sequence[AIMember]) -> str:
+        """第 N 輪在累積紀錄中的段落；無內容時回傳空字串"""
+        rn = f"第{round_num}輪"
+        rp = os.path.join(self.round_folder(round_num), f"{rn}_完整紀錄.txt")
+        if os.path.exists(rp):
+            content = read_text_file(rp, default="").rstrip()
+            if content:
+                return content + "\n\n"
+
+        question, replies = read_round_files(self.topic_folder, round_num, ai_list)
+        if not question and not replies:
+            return ""
+        return _fallback_round_text(topic_name, round_num, question, replies, ai_list) + "\n\n"
+
+    def _record_manifest(self, round_num: int) -> None:
+        try:
+            record_round_manifest(self.topic_folder, round_num)
+        except OSError:
+            # 清單只是加速用，更新失敗時下次導航會自動重新掃描
+            record_exception(f"更新輪次清單失敗：第{round_num}輪")
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteRoundStore:
+    """所有輪次存在單一 SQLite 檔（.ai_discuss/rounds.sqlite3）"""
+    backend = "sqlite"
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS rounds (
+            round INTEGER PRIMARY KEY,
+            topic TEXT NOT NULL DEFAULT '',
+            saved_at TEXT NOT NULL DEFAULT '',
+            question TEXT NOT NULL DEFAULT '',
+            write_full INTEGER NOT NULL DEFAULT 1,
+            write_split INTEGER NOT NULL DEFAULT 1,
+            saved INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS replies (
+            round INTEGER NOT NULL REFERENCES rounds(round) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            path TEXT NOT NULL DEFAULT '',
+            body TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (round, name)
+        );
+    """
+
+    def __init__(self, topic_folder: str) -> None:
+        import sqlite3
+        self.topic_folder = topic_folder
+        self.db_path = _round_db_path(topic_folder)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # 背景寫檔執行緒與 UI 執行緒共用連線，以 _lock 串行化
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        with self._conn:
+            self._conn.executescript(self.SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(ROUND_DB_SCHEMA_VERSION),)
+            )
+
+    def round_location(self, round_num: int) -> str:
+        return self.db_path
+
+    def recover(self) -> None:
+        # SQLite 交易本身即為全有或全無
+        pass
+
+    def max_round(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(round) FROM rounds").fetchone()
+        return row[0] or 0
+
+    def create_round(self, round_num: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO rounds (round) VALUES (?)", (round_num,))
+
+    def load_record(self, round_num: int) -> Optional[RoundRecord]:
+        with self._lock:
+            rows = self._fetch_round_rows(round_num)
+        if not rows or not rows[0][5]:
+            return None
+        topic, saved_at, question, write_full, write_split = rows[0][:5]
+        replies: List[ReplyRecord] = [{"name": name, "path": path or "", "text": body or ""}
+                                      for *_, name, path, body in rows if name is not None]
+        return {
+            "round": round_num,
+            "topic": topic,
+            "saved_at": saved_at,
+            "question": question,
+            "replies": replies,
+            "write_full": bool(write_full),
+            "write_split": bool(write_split),
+        }
+
+    def _fetch_round_rows(self, round_num: int) -> List[RoundRow]:
+        return self._conn.execute(
+            "SELECT r.topic, r.saved_at, r.question, r.write_full, r.write_split, r.saved,"
+            "       p.name, p.path, p.body"
+            "  FROM rounds r LEFT JOIN replies p ON p.round = r.round"
+            " WHERE r.round = ? ORDER BY p.position",
+            (round_num,)
+        ).fetchall()
+
+    def load_round(self, round_num: int, ai_list: Sequence[AIMember]) -> RoundContents:
+        record = self.load_record(round_num)
+        if record is None:
+            return "", {}
+        names = {ai["name"] for ai in ai_list}
+        return record["question"], {r["name"]: r["text"] for r in record["replies"] if r["name"] in names}
+
+    def save_round(self, record: RoundRecord) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rounds"
+                " (round, topic, saved_at, question, write_full, write_split, saved)"
+                " VALUES (?, ?, ?, ?, ?, ?, 1)",
+                (record["round"], record["topic"], record["saved_at"], record["question"],
+                 int(record["write_full"]), int(record["write_split"]))
+            )
+            self._conn.execute("DELETE FROM replies WHERE round = ?", (record["round"],))
+            self._conn.executemany(
+                "INSERT INTO replies (round, position, name, path, body) VALUES (?, ?, ?, ?, ?)",
+                [(record["round"], i, r["name"], r.get("path", ""), r["text"])
+                 for i, r in enumerate(record["replies"])]
+            )
+
+    def round_numbers(self) -> List[int]:
+        """所有已建立的輪次（含尚未存檔的）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT round FROM rounds ORDER BY round").fetchall()
+        return [row[0] for row in rows]
+
+    def iter_records(self) -> Iterator[RoundRecord]:
+        with self._lock:
+            rounds = self._conn.execute("SELECT round FROM rounds WHERE saved = 1 ORDER BY round").fetchall()
+        for (round_num,) in rounds:
+            record = self.load_record(round_num)
+            if record is not None:
+                yield record
+
+    def accumulated_segment(self, topic_name: str, round_num: int, ai_list: Sequence[AIMember]) -> str:
+        record = self.load_record(round_num)
+        if record is None:
+            return ""
+        return format_full_record(record).rstrip() + "\n\n"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _round_db_path(topic_folder: str) -> str:
+    return os.path.join(_topic_meta_dir(topic_folder), ROUND_DB_NAME)
+
+
+def detect_storage_backend(topic_folder: str, default: str = "files") -> str:
+    """已有資料的主題沿用原格式；全新主題才採用預設格式"""
+    if os.path.exists(_round_db_path(topic_folder)):
+        return "sqlite"
+    if scan_max_round(topic_folder) > 0:
+        return "files"
+    return default if default in STORAGE_BACKENDS else "files"
+
+
+def open_round_store(topic_folder: str, backend: str = "files") -> RoundStore:
+    if backend == "sqlite":
+        return SqliteRoundStore(topic_folder)
+    return FileRoundStore(topic_folder)
+
+
+def run_round_save_job(payload: Dict[str, Any]) -> Optional[ExcInfo]:
+    result = commit_round(payload["store"], payload["record"], payload["ai_list"])
+    index = payload.get("search_index")
+    if index is not None:
+        record = payload["record"]
+        try:
+            index.update_round(payload["store"].topic_folder, record["topic"], record["round"],
+                               record["question"], {r["name"]: r["text"] for r in record["replies"]})
+        except Exception:
+            # 搜尋索引只是輔助資料，失敗不影響存檔結果
+            record_exception(f"更新搜尋索引失敗：{payload['store'].topic_folder} 第{record['round']}輪")
+    return result
+
+
+@perf_timed("commit_round")
+def commit_round(store: RoundStore, record: RoundRecord, ai_list: Sequence[AIMember]) -> Optional[ExcInfo]:
+    """儲存一輪並更新累積紀錄（於背景寫檔執行緒執行）。
+
+    輪次本身寫入失敗時拋出例外；只有累積紀錄失敗時回傳其 exc_info，
+    讓 UI 仍可把該輪標示為已儲存。
+    """
+    store.save_round(record)
+    try:
+        if update_accumulated_round(store, record["topic"], ai_list, record["round"]):
+            return None
+    except Exception:
+        record_exception(f"局部更新累積紀錄失敗，改為完整重建：第{record['round']}輪")
+    try:
+        rebuild_accumulated_record(store, record["topic"], ai_list)
+    except Exception:
+        return sys.exc_info()
+    return None
+
+
+class RoundSaveWriter:
+    """專用的背景寫檔執行緒。
+
+    工作依送出順序執行；同一個 key（例如主題資料夾 + 輪次）尚未開始的工作會被
+    最新一次送出取代，只寫最後的內容。完成結果放進佇列，由 UI 執行緒以
+    after() 輪詢取回（worker 不碰任何 Tk 物件）。設定檔的延遲寫入也用同一個類別。
+    """
+
+    def __init__(self, name: str = "round-save-writer") -> None:
+        self._cond = threading.Condition()
+        self._order: Deque[Hashable] = deque()
+        self._pending: Dict[Hashable, WriterJob] = {}
+        self._running: Optional[WriterJob] = None
+        self._results: Deque[WriterResult] = deque()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key: Hashable, payload: Dict[str, Any],
+               work: Callable[[Dict[str, Any]], Any]) -> bool:
+        """排入 work(payload)；回傳 True 表示與尚未執行的同一輪工作合併"""
+        with self._cond:
+            job = self._pending.get(key)
+            if job is not None:
+                job["payload"] = payload
+                job["work"] = work
+                return True
+            self._pending[key] = {"key": key, "payload": payload, "work": work}
+            self._order.append(key)
+            self._cond.notify_all()
+            return False
+
+    def pending_payload(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """尚未寫完的最新內容（含執行中的工作），沒有則回傳 None"""
+        with self._cond:
+            job = self._pending.get(key)
+            if job is None and self._running is not None and self._running["key"] == key:
+                job = self._running
+            return job["payload"] if job is not None else None
+
+    def busy(self) -> bool:
+        with self._cond:
+            return bool(self._order) or self._running is not None or bool(self._results)
+
+    def drain_results(self) -> List[WriterResult]:
+        """取回已完成的工作：[(key, payload, result, exc_info), ...]"""
+        with self._cond:
+            results = list(self._results)
+            self._results.clear()
+        return results
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._order and self._running is None, timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._order or self._stopping)
+                if not self._order:
+                    return
+                key = self._order.popleft()
+                job = self._pending.pop(key)
+                self._running = job
+            result = None
+            exc_info = None
+            try:
+                result = job["work"](job["payload"])
+            except Exception:
+                exc_info = sys.exc_info()
+            with self._cond:
+                self._running = None
+                self._results.append((key, job["payload"], result, exc_info))
+                self._cond.notify_all()
+
+
+def export_round_store(store: SqliteRoundStore, dest_folder: str) -> int:
+    """把 SQLite 內的輪次依原本的資料夾格式寫出（與直接用純文字格式存檔結果相同），回傳輪數。
+
+    - 已建立但尚未存檔的輪次匯出為空的「第N輪」資料夾，與純文字格式按「新一輪」後的狀態相同
+    - 空白回覆依資料夾格式寫成「（未填寫）」；資料夾格式無法區分空白與這段文字，
+      命令列匯出、統計與搜尋讀回時都把它視為空白
+    """
+    target = FileRoundStore(dest_folder)
+    count = 0
+    for round_num in store.round_numbers():
+        record = store.load_record(round_num)
+        if record is None:
+            target.create_round(round_num)
+        else:
+            target.save_round(record)
+        count += 1
+    return count
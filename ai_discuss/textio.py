@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""文字檔讀寫：安全檔名、編碼偵測、原子寫入，以及已解析檔案的 LRU 快取"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config import _dedupe_paths, record_exception
+
+TEXT_READ_ENCODINGS = ("utf-8", "utf-8-sig", "cp950", "cp936")
+INVALID_FS_CHARS_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+WINDOWS_RESERVED_NAMES = {
+    "CON", "PRN", "AUX", "NUL",
+    "COM1", "COM2", "COM3", "COM4", "COM5", "COM6", "COM7", "COM8", "COM9",
+    "LPT1", "LPT2", "LPT3", "LPT4", "LPT5", "LPT6", "LPT7", "LPT8", "LPT9",
+}
+
+# 路徑 -> ((mtime_ns, size), 上次成功的編碼)；檔案改過就不再沿用，最多記 _DETECTED_ENCODINGS_MAX 筆
+_DETECTED_ENCODINGS: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+_DETECTED_ENCODINGS_MAX = 4096
+_DETECTED_ENCODINGS_LOCK = threading.Lock()
+
+
+def safe_fs_component(name: Optional[str], fallback: str = "未命名", limit: int = 80) -> str:
+    raw = (name or "").strip()
+    sanitized = INVALID_FS_CHARS_RE.sub("_", raw)
+    sanitized = re.sub(r"\s+", " ", sanitized).rstrip(" .")
+    if not sanitized:
+        sanitized = fallback
+
+    trimmed = sanitized[:limit].rstrip(" .") or fallback
+    if trimmed.upper() in WINDOWS_RESERVED_NAMES:
+        trimmed += "_"
+
+    changed = (trimmed != raw) or (sanitized != raw)
+    if changed and raw:
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
+        base = trimmed[:max(8, limit - 9)].rstrip(" .") or fallback
+        trimmed = f"{base}_{digest}"
+    return trimmed
+
+
+def topic_folder_name(topic_name: str) -> str:
+    return safe_fs_component(topic_name, fallback="未命名主題")
+
+
+def _ai_reply_filename(ai_name: str) -> str:
+    return f"{safe_fs_component(ai_name, fallback='AI')}_回覆.txt"
+
+
+def _ai_reply_path_candidates(folder: str, ai_name: str) -> List[str]:
+    return _dedupe_paths([
+        os.path.join(folder, f"{ai_name}_回覆.txt"),
+        os.path.join(folder, _ai_reply_filename(ai_name)),
+    ])
+
+
+def _decode_text_bytes(data: bytes, preferred: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """解碼已讀入的位元組：先看 BOM，再試上次成功的編碼，最後依序嘗試其他編碼"""
+    if data.startswith(codecs.BOM_UTF8):
+        try:
+            return data[len(codecs.BOM_UTF8):].decode("utf-8"), "utf-8-sig"
+        except UnicodeDecodeError:
+            pass
+    candidates = [preferred] if preferred in TEXT_READ_ENCODINGS else []
+    candidates += [enc for enc in TEXT_READ_ENCODINGS if enc != preferred]
+    for encoding in candidates:
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    return data.decode("utf-8", errors="replace"), None
+
+
+def read_text_file(path: str, default: str = "") -> str:
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        return default
+    except OSError:
+        record_exception(f"讀取檔案失敗：{path}")
+        return default
+
+    key = os.path.normcase(os.path.abspath(path))
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _DETECTED_ENCODINGS_LOCK:
+        item = _DETECTED_ENCODINGS.get(key)
+    text, encoding = _decode_text_bytes(data, item[1] if item is not None and item[0] == stamp else None)
+    if encoding:
+        with _DETECTED_ENCODINGS_LOCK:
+            _DETECTED_ENCODINGS[key] = (stamp, encoding)
+            _DETECTED_ENCODINGS.move_to_end(key)
+            while len(_DETECTED_ENCODINGS) > _DETECTED_ENCODINGS_MAX:
+                _DETECTED_ENCODINGS.popitem(last=False)
+    # 與文字模式讀檔相同的換行處理
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _encode_text(text: str) -> bytes:
+    """與文字模式寫檔相同的換行轉換 + UTF-8 編碼（位移計算需以位元組為準）"""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+def write_text_file(path: str, text: str) -> None:
+    _write_bytes_file(path, _encode_text(text))
+
+
+def _forget_cached_file(path: str) -> None:
+    ROUND_READ_CACHE.invalidate(path)
+    # 一律以 UTF-8 寫出，舊的編碼判斷不再適用
+    with _DETECTED_ENCODINGS_LOCK:
+        _DETECTED_ENCODINGS.pop(os.path.normcase(os.path.abspath(path)), None)
+
+
+def _write_bytes_file(path: str, data: bytes) -> None:
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    _forget_cached_file(path)
+    temp_file = path + ".tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+
+
+class _ParsedFileCache:
+    """已解析檔案內容的 LRU 快取，以 (路徑, mtime_ns, 大小) 驗證是否仍有效"""
+
+    def __init__(self, max_entries: int = 256, max_chars: int = 32 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()   # 路徑 -> ((mtime_ns, size), 內容)
+        self._chars = 0
+        self._lock = threading.Lock()   # 背景寫檔執行緒也會呼叫 invalidate()
+
+    def get(self, path: str, loader: Callable[[str], str]) -> Optional[str]:
+        """回傳 loader(path) 的結果；檔案不存在時回傳 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = os.path.normcase(os.path.abspath(path))
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] == stamp:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return item[1]
+            self.misses += 1
+
+        value = loader(path)
+        with self._lock:
+            self._drop(key)
+            if len(value) <= self.max_chars:
+                self._items[key] = (stamp, value)
+                self._chars += len(value)
+                while len(self._items) > self.max_entries or self._chars > self.max_chars:
+                    _, (_, old) = self._items.popitem(last=False)
+                    self._chars -= len(old)
+        return value
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._drop(os.path.normcase(os.path.abspath(path)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._chars = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _drop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._chars -= len(item[1])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._items),
+            "chars": self._chars,
+        }
+
+
+ROUND_READ_CACHE = _ParsedFileCache()
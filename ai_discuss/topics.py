@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+主題的詳細設定（每個主題資料夾內的 .ai_discuss/topic.json）
+
+根設定檔只保留主題索引 {"topics": {名稱: {"folder": 資料夾}}}；AI 成員與儲存格式
+放在主題資料夾內，開啟主題時才讀取，修改也只重寫該主題的檔案。
+
+舊版設定檔把 ai_list / storage 放在根設定檔的主題項目中：讀取時沿用這些欄位，
+第一次開啟主題時寫出 topic.json 並從根設定檔移除（見 save_topic_meta）。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .config import DESKTOP, Config, record_exception
+from .rounds import TOPIC_META_DIRNAME, AIMember
+from .stores import STORAGE_BACKENDS, detect_storage_backend
+from .textio import _write_bytes_file, topic_folder_name
+
+if sys.version_info >= (3, 8):
+    from typing import TypedDict
+else:   # pragma: no cover
+    TypedDict = dict
+
+TOPIC_META_NAME = "topic.json"
+TOPIC_META_VERSION = 1
+# 舊版根設定檔中、現在改放到 topic.json 的欄位
+LEGACY_TOPIC_KEYS = ("ai_list", "storage")
+
+# (名稱, 資料夾, 儲存格式, ai_list)；儲存格式或 ai_list 為 None 表示尚未讀取 topic.json
+TopicEntry = Tuple[str, str, Optional[str], Optional[List[AIMember]]]
+# 已讀取 topic.json 的主題：(名稱, 資料夾, 儲存格式, ai_list)
+ResolvedTopicEntry = Tuple[str, str, str, List[AIMember]]
+
+
+class TopicMeta(TypedDict):
+    version: int
+    topic: str
+    ai_list: List[AIMember]
+    storage: str   # 尚未決定時為空字串
+
+
+def topic_meta_path(topic_folder: str) -> str:
+    return os.path.join(topic_folder, TOPIC_META_DIRNAME, TOPIC_META_NAME)
+
+
+def topic_index_folder(cfg: Config, name: str) -> str:
+    """根設定檔中主題的資料夾；未記錄時為桌面上的預設位置"""
+    entry = cfg.get("topics", {}).get(name)
+    folder = entry.get("folder", "") if isinstance(entry, dict) else ""
+    folder = (folder or "").strip().strip('"').strip("'")
+    if not folder:
+        return os.path.join(DESKTOP, topic_folder_name(name))
+    return os.path.normpath(os.path.expanduser(folder))
+
+
+def _clean_ai_list(value: Any) -> List[AIMember]:
+    if not isinstance(value, list):
+        return []
+    return [ai for ai in value if isinstance(ai, dict) and ai.get("name")]
+
+
+def _new_topic_meta(name: str, legacy: Optional[Mapping[str, Any]] = None) -> TopicMeta:
+    legacy = legacy if isinstance(legacy, Mapping) else {}
+    storage = legacy.get("storage")
+    return {
+        "version": TOPIC_META_VERSION,
+        "topic": name,
+        "ai_list": _clean_ai_list(legacy.get("ai_list")),
+        "storage": storage if storage in STORAGE_BACKENDS else "",
+    }
+
+
+def read_topic_meta(topic_folder: str) -> Optional[TopicMeta]:
+    """讀取 topic.json；不存在或格式不符時回傳 None"""
+    path = topic_meta_path(topic_folder)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        record_exception(f"讀取主題設定失敗：{path}")
+        return None
+    if not isinstance(data, dict) or data.get("version") != TOPIC_META_VERSION:
+        return None
+    return _new_topic_meta(str(data.get("topic", "")), data)
+
+
+def dump_topic_meta(meta: TopicMeta) -> str:
+    return json.dumps(meta, ensure_ascii=False, indent=2)
+
+
+def write_topic_meta_text(topic_folder: str, text: str) -> None:
+    _write_bytes_file(topic_meta_path(topic_folder), text.encode("utf-8"))
+
+
+def write_topic_meta(topic_folder: str, meta: TopicMeta) -> None:
+    write_topic_meta_text(topic_folder, dump_topic_meta(meta))
+
+
+def load_topic_meta(cfg: Config, name: str, topic_folder: str) -> Tuple[TopicMeta, bool]:
+    """主題的詳細設定；第二個值為 True 表示內容來自根設定檔的舊欄位（尚未寫入主題資料夾）"""
+    meta = read_topic_meta(topic_folder)
+    if meta is not None:
+        meta["topic"] = name
+        return meta, False
+    return _new_topic_meta(name, cfg.get("topics", {}).get(name)), True
+
+
+def save_topic_meta(cfg: Config, name: str, topic_folder: str, meta: TopicMeta) -> bool:
+    """寫入 topic.json，並把根設定檔的主題項目縮成只剩資料夾（呼叫端負責儲存根設定檔）。
+
+    寫入失敗時（例如唯讀位置）詳細設定留在根設定檔，回傳 False。
+    """
+    topics = cfg.setdefault("topics", {})
+    entry = topics.get(name)
+    if not isinstance(entry, dict):
+        entry = {}
+    entry["folder"] = topic_folder
+    topics[name] = entry
+    try:
+        write_topic_meta(topic_folder, meta)
+    except OSError:
+        record_exception(f"寫入主題設定失敗：{topic_folder}")
+        entry.update(ai_list=meta["ai_list"], storage=meta["storage"])
+        return False
+    for key in LEGACY_TOPIC_KEYS:
+        entry.pop(key, None)
+    return True
+
+
+def topic_details(topic_folder: str, legacy: Optional[Mapping[str, Any]] = None,
+                  default_storage: str = "files") -> Tuple[str, List[AIMember]]:
+    """(儲存格式, ai_list)：優先讀 topic.json，其次根設定檔中尚未搬移的舊欄位"""
+    meta = read_topic_meta(topic_folder) or _new_topic_meta("", legacy)
+    storage = meta["storage"] or detect_storage_backend(topic_folder, default_storage)
+    return storage, meta["ai_list"]
+
+
+def resolve_topic_entries(cfg: Config, names: Optional[List[str]] = None) -> List[ResolvedTopicEntry]:
+    """根設定檔中的主題 → [(名稱, 資料夾, 儲存格式, ai_list)]（逐一讀取 topic.json）"""
+    topics: Dict[str, Any] = cfg.get("topics", {})
+    entries = []
+    for name in (names or sorted(topics)):
+        folder = topic_index_folder(cfg, name)
+        storage, ai_list = topic_details(folder, topics.get(name))
+        entries.append((name, folder, storage, ai_list))
+    return entries
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+啟動效能測試：v1（AI討論工具_最終版.py）與 v2（v2/AI討論工具_v2_WIP.py）
+
+  python benchmarks/bench_startup.py                      # 兩個版本 × small / medium / huge
+  python benchmarks/bench_startup.py --apps v1 --sizes small medium --repeat 5
+  python benchmarks/bench_startup.py --baseline 上次結果.json   # 與上次比較
+
+每次量測都在新的子行程中進行，使用 synth.py 產生的假使用者目錄，量測：
+  import_ms      載入主程式模組（含 ttkbootstrap）
+  app_init_ms    App() 建構
+  first_idle_ms  進入 mainloop 到第一次 idle（視窗已可繪製）
+  settled_ms     進入 mainloop 到事件佇列清空（分段啟動的後續載入也完成）
+  process_ms     從啟動子行程到 settled 的總時間（含直譯器啟動）
+  peak_rss_kb    子行程的最大常駐記憶體
+
+Linux 上沒有 DISPLAY 時會自動啟動 Xvfb 虛擬顯示器。結果寫成 JSON，預設放在
+benchmarks/results/。
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import report
+import synth
+
+REPO_ROOT = synth.REPO_ROOT
+APPS = {
+    "v1": os.path.join(REPO_ROOT, "AI討論工具_最終版.py"),
+    "v2": os.path.join(REPO_ROOT, "v2", "AI討論工具_v2_WIP.py"),
+}
+METRICS = ("import_ms", "app_init_ms", "first_idle_ms", "settled_ms", "process_ms", "peak_rss_kb")
+SETTLE_POLL_MS = 5
+SETTLE_TIMEOUT_S = 60
+CHILD_TIMEOUT_S = 300
+
+
+# ── 子行程：實際啟動 App ──
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak   # macOS 單位是 bytes
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) // 1024
+    except Exception:
+        return None
+
+
+def run_child(app_key, app_path):
+    """載入並啟動 App，等事件佇列清空後把量測結果以一行 JSON 印到 stdout"""
+    spawn_wall = float(os.environ.get("AIDT_BENCH_SPAWN", "0") or 0)
+    app_dir = os.path.dirname(app_path)
+    sys.path.insert(0, app_dir)   # 與直接執行腳本相同（v1 需要找到 ai_discuss）
+    os.chdir(app_dir)
+
+    t0 = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(f"bench_{app_key}", app_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    t_import = time.perf_counter()
+    app = module.App()
+    t_init = time.perf_counter()
+    root = app.root
+    result = {"import_ms": (t_import - t0) * 1000, "app_init_ms": (t_init - t_import) * 1000}
+
+    def _pending_after_ids():
+        try:
+            return root.tk.splitlist(root.tk.call("after", "info"))
+        except Exception:
+            return ()
+
+    def _on_settled():
+        now = time.perf_counter()
+        result["settled_ms"] = (now - t_init) * 1000
+        result["process_ms"] = (time.time() - spawn_wall) * 1000 if spawn_wall else None
+        result["peak_rss_kb"] = _peak_rss_kb()
+        marks = getattr(app, "_startup_marks", None)
+        if marks:
+            result["startup_marks"] = [[label, round((t - t0) * 1000, 1)] for label, t in marks]
+        print("BENCH_RESULT " + json.dumps(result, ensure_ascii=False), flush=True)
+        try:
+            app._closing = True
+            root.destroy()
+        except Exception:
+            os._exit(0)
+
+    def _poll_settled():
+        # 只剩自己這個輪詢（或什麼都沒有）時視為已完成啟動；週期性工作過多則以逾時為準
+        waited = time.perf_counter() - t_init
+        if waited > SETTLE_TIMEOUT_S:
+            result["settle_timeout"] = True
+        if not _pending_after_ids() or waited > SETTLE_TIMEOUT_S:
+            root.after_idle(_on_settled)
+            return
+        root.after(SETTLE_POLL_MS, _poll_settled)
+
+    def _on_first_idle():
+        result["first_idle_ms"] = (time.perf_counter() - t_init) * 1000
+        root.after(0, _poll_settled)
+
+    root.after_idle(_on_first_idle)
+    root.mainloop()
+    return 0
+
+
+# ── 父行程：準備資料、重複量測、彙整 ──
+def _ensure_display():
+    """Linux 無 DISPLAY 時啟動 Xvfb；回傳 (環境變數覆寫, 需要結束的行程)"""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        return {}, None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise SystemExit("沒有 DISPLAY，也找不到 Xvfb（apt install xvfb）；或先設定 DISPLAY")
+    for num in range(90, 110):
+        if os.path.exists(f"/tmp/.X{num}-lock"):
+            continue
+        proc = subprocess.Popen([xvfb, f":{num}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{num}"):
+                return {"DISPLAY": f":{num}"}, proc
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+        proc.terminate()
+    raise SystemExit("Xvfb 啟動失敗")
+
+
+def _prepare_home(work_dir, app_key, size, regen):
+    home = os.path.join(work_dir, f"{app_key}-{size}-s{synth.SYNTH_VERSION}")
+    marker = os.path.join(home, ".synth_done")
+    if regen and os.path.isdir(home):
+        shutil.rmtree(home)
+    if not os.path.exists(marker):
+        if os.path.isdir(home):
+            shutil.rmtree(home)
+        os.makedirs(home)
+        print(f"產生 {app_key}/{size} 測試資料 ...", file=sys.stderr)
+        t = time.perf_counter()
+        if app_key == "v1":
+            synth.generate_v1_home(home, size)
+        else:
+            synth.generate_v2_home(home, size)
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(json.dumps(synth.SIZES[size]))
+        print(f"  完成（{time.perf_counter() - t:.1f}s）", file=sys.stderr)
+    return home
+
+
+def _run_once(app_key, home, extra_env):
+    env = synth.home_env(home)
+    env.update(extra_env)
+    env["AIDT_BENCH_SPAWN"] = repr(time.time())
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", app_key],
+                          env=env, capture_output=True, text=True, encoding="utf-8",
+                          errors="replace", timeout=CHILD_TIMEOUT_S)
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH_RESULT "):
+            return json.loads(line[len("BENCH_RESULT "):])
+    raise RuntimeError(f"{app_key} 啟動失敗（exit {proc.returncode}）：\n{proc.stderr.strip()[-2000:]}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="v1 / v2 啟動效能測試")
+    parser.add_argument("--apps", nargs="+", choices=sorted(APPS), default=sorted(APPS))
+    parser.add_argument("--sizes", nargs="+", choices=list(synth.SIZES), default=list(synth.SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="每組量測次數（取中位數）")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "aidt-bench"),
+                        help="合成資料快取位置")
+    parser.add_argument("--regen", action="store_true", help="重新產生合成資料")
+    parser.add_argument("--out", help="結果 JSON 路徑（預設 benchmarks/results/startup-時間.json）")
+    parser.add_argument("--baseline", help="上次的結果 JSON，列出差異")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="有項目慢於 baseline 門檻時以 exit code 1 結束")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.child:
+        return run_child(args.child, APPS[args.child])
+
+    display_env, xvfb = _ensure_display()
+    results = []
+    try:
+        for app_key in args.apps:
+            for size in args.sizes:
+                home = _prepare_home(args.work_dir, app_key, size, args.regen)
+                runs = []
+                for i in range(args.repeat):
+                    run = _run_once(app_key, home, display_env)
+                    runs.append(run)
+                    print(f"{app_key}/{size} #{i + 1}: first_idle {run['first_idle_ms']:.0f}ms, "
+                          f"settled {run['settled_ms']:.0f}ms", file=sys.stderr)
+                results.append({"app": app_key, "size": size, "data": synth.SIZES[size],
+                                "runs": runs,
+                                "summary": {m: report.spread([r.get(m) for r in runs]) for m in METRICS}})
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    out = report.write_report("startup", results, args.out, repeat=args.repeat)
+    regressions = report.print_table(results, ("app", "size"), METRICS,
+                                     report.load_baseline(args.baseline))
+    print(f"\n結果：{out}")
+    return 1 if (args.fail_on_regression and regressions) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+儲存層效能測試（純文字資料夾格式）
+
+  python benchmarks/bench_storage.py                 # 預設情境（見 SCENARIOS）
+  python benchmarks/bench_storage.py --quick         # 略過 10,000 輪與 5 MB 回覆
+  python benchmarks/bench_storage.py --rounds 100 1000 --members 4 --reply-kb 1 64
+  python benchmarks/bench_storage.py --baseline 上次結果.json
+
+每個情境在暫存資料夾產生一個主題，依序量測：
+  save_round_*           store.save_round（交易式提交）每輪耗時，亦即產生資料本身
+  scan_cold_ms           清掉行程內快取、保留 rounds_manifest.json 時的 scan_max_round
+  scan_warm_ms           第二次 scan_max_round
+  scan_nomanifest_ms     刪掉 manifest 後的 scan_max_round（逐一掃描資料夾）
+  read_all_ms            清掉讀取快取後 read_round_files 讀完所有輪次
+  read_round_p50/p95_ms  上述每輪耗時
+  read_warm_ms           快取命中時再讀最後一輪
+  rebuild_accumulated_ms rebuild_accumulated_record 完整重建累積紀錄
+  append_commit_ms       commit_round 新增一輪（含累積紀錄局部更新）
+
+legacy_ratio 比例的輪次會改寫成舊版 cp950 檔案（無位移表頭），讓讀取走編碼偵測與逐行解析。
+作業系統的檔案快取無法從這裡清除，cold 指的是程式內快取。
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import report
+import synth
+from ai_discuss import (
+    commit_round, open_round_store, read_round_files, rebuild_accumulated_record, scan_max_round,
+)
+from ai_discuss import rounds as _rounds
+from ai_discuss.textio import ROUND_READ_CACHE
+
+# (rounds, members, reply_kb)：一次只放大一個維度
+SCENARIOS = [
+    (10, 4, 1), (100, 4, 1), (1000, 4, 1), (10000, 4, 1),
+    (100, 2, 1), (100, 8, 1), (100, 30, 1),
+    (10, 4, 64), (10, 4, 1024), (10, 4, 5120),
+]
+QUICK_MAX_ROUNDS = 1000
+QUICK_MAX_REPLY_KB = 1024
+METRICS = (
+    "save_round_p50_ms", "save_round_p95_ms", "save_total_ms",
+    "scan_cold_ms", "scan_warm_ms", "scan_nomanifest_ms",
+    "read_all_ms", "read_round_p50_ms", "read_round_p95_ms", "read_warm_ms",
+    "rebuild_accumulated_ms", "append_commit_ms", "disk_mb",
+)
+TABLE_METRICS = ("save_round_p50_ms", "scan_cold_ms", "scan_nomanifest_ms", "read_round_p95_ms",
+                 "rebuild_accumulated_ms", "append_commit_ms")
+
+
+def _ms(t0):
+    return (time.perf_counter() - t0) * 1000
+
+
+def _forget_manifests():
+    # 行程內的輪次清單快取（模擬重新啟動程式）
+    with _rounds._ROUND_MANIFEST_LOCK:
+        _rounds._ROUND_MANIFESTS.clear()
+
+
+def _folder_mb(folder):
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(folder):
+        for fn in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, fn))
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+
+def generate(folder, rounds, ai_list, reply_kb, legacy_ratio, seed):
+    """以 save_round 寫入 rounds 輪；回傳每輪耗時（ms）"""
+    rng = random.Random(f"{seed}:{rounds}:{len(ai_list)}:{reply_kb}")
+    pool = synth.TextPool(rng, reply_kb * 1024)
+    store = open_round_store(folder, "files")
+    times = []
+    try:
+        for round_num in range(1, rounds + 1):
+            record = synth.make_round_record(pool, "效能測試", round_num, ai_list, reply_kb * 1024)
+            t0 = time.perf_counter()
+            store.create_round(round_num)
+            store.save_round(record)
+            times.append(_ms(t0))
+            if rng.random() < legacy_ratio:
+                synth.write_legacy_round(store.round_folder(round_num), record)
+    finally:
+        store.close()
+    return times, pool
+
+
+def measure(folder, rounds, ai_list, reply_kb, pool, extra_round):
+    """一次完整的讀取 / 掃描 / 重建 / 新增量測"""
+    result = {}
+    _forget_manifests()
+    t0 = time.perf_counter()
+    found = scan_max_round(folder)
+    result["scan_cold_ms"] = _ms(t0)
+    if found != rounds + extra_round:
+        raise RuntimeError(f"輪數不符：預期 {rounds + extra_round}，掃描到 {found}")
+    t0 = time.perf_counter()
+    scan_max_round(folder)
+    result["scan_warm_ms"] = _ms(t0)
+    manifest = _rounds._round_manifest_path(folder)
+    if os.path.exists(manifest):
+        os.remove(manifest)
+    _forget_manifests()
+    t0 = time.perf_counter()
+    scan_max_round(folder)
+    result["scan_nomanifest_ms"] = _ms(t0)
+
+    ROUND_READ_CACHE.clear()
+    per_round = []
+    t_all = time.perf_counter()
+    for round_num in range(1, rounds + 1):
+        t0 = time.perf_counter()
+        read_round_files(folder, round_num, ai_list)
+        per_round.append(_ms(t0))
+    result["read_all_ms"] = _ms(t_all)
+    result["read_round_p50_ms"] = report.percentile(per_round, 50)
+    result["read_round_p95_ms"] = report.percentile(per_round, 95)
+    t0 = time.perf_counter()
+    read_round_files(folder, rounds, ai_list)
+    result["read_warm_ms"] = _ms(t0)
+
+    store = open_round_store(folder, "files")
+    try:
+        t0 = time.perf_counter()
+        rebuild_accumulated_record(store, "效能測試", ai_list)
+        result["rebuild_accumulated_ms"] = _ms(t0)
+
+        round_num = store.max_round() + 1
+        record = synth.make_round_record(pool, "效能測試", round_num, ai_list, reply_kb * 1024)
+        t0 = time.perf_counter()
+        store.create_round(round_num)
+        if commit_round(store, record, ai_list) is not None:
+            raise RuntimeError("累積紀錄更新失敗")
+        result["append_commit_ms"] = _ms(t0)
+    finally:
+        store.close()
+    return result
+
+
+def run_scenario(work_dir, rounds, members, reply_kb, repeat, legacy_ratio, seed, keep):
+    base = tempfile.mkdtemp(prefix=f"r{rounds}-m{members}-k{reply_kb}-", dir=work_dir)
+    folder = os.path.join(base, "效能測試")
+    ai_list = synth.member_list(members)
+    try:
+        t0 = time.perf_counter()
+        save_times, pool = generate(folder, rounds, ai_list, reply_kb, legacy_ratio, seed)
+        print(f"  產生 {rounds} 輪（{_ms(t0) / 1000:.1f}s）", file=sys.stderr)
+        # 量測前先建好累積紀錄，append_commit_ms 才是局部更新的路徑
+        store = open_round_store(folder, "files")
+        try:
+            rebuild_accumulated_record(store, "效能測試", ai_list)
+        finally:
+            store.close()
+        runs = []
+        for i in range(repeat):
+            run = measure(folder, rounds, ai_list, reply_kb, pool, extra_round=i)
+            run["save_round_p50_ms"] = report.percentile(save_times, 50)
+            run["save_round_p95_ms"] = report.percentile(save_times, 95)
+            run["save_total_ms"] = sum(save_times)
+            run["disk_mb"] = _folder_mb(folder)
+            runs.append(run)
+        return runs
+    finally:
+        if not keep:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="儲存層效能測試（純文字資料夾格式）")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"略過超過 {QUICK_MAX_ROUNDS} 輪或 {QUICK_MAX_REPLY_KB} KB 回覆的情境")
+    parser.add_argument("--rounds", type=int, nargs="+", help="自訂輪數（與 --members / --reply-kb 組合）")
+    parser.add_argument("--members", type=int, nargs="+", help="自訂 AI 數")
+    parser.add_argument("--reply-kb", type=int, nargs="+", help="自訂每則回覆大小（KB）")
+    parser.add_argument("--repeat", type=int, default=3, help="每個情境的量測次數（資料只產生一次）")
+    parser.add_argument("--legacy-ratio", type=float, default=0.25,
+                        help="改寫成舊版 cp950 檔案的輪次比例")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", default=tempfile.gettempdir(), help="產生測試主題的位置")
+    parser.add_argument("--keep", action="store_true", help="保留產生的主題資料夾")
+    parser.add_argument("--out", help="結果 JSON 路徑（預設 benchmarks/results/storage-時間.json）")
+    parser.add_argument("--baseline", help="上次的結果 JSON，列出差異")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="有項目慢於 baseline 門檻時以 exit code 1 結束")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.rounds or args.members or args.reply_kb:
+        scenarios = [(r, m, k) for r in (args.rounds or [100])
+                     for m in (args.members or [4]) for k in (args.reply_kb or [1])]
+    else:
+        scenarios = SCENARIOS
+    if args.quick:
+        scenarios = [s for s in scenarios if s[0] <= QUICK_MAX_ROUNDS and s[2] <= QUICK_MAX_REPLY_KB]
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = []
+    for rounds, members, reply_kb in scenarios:
+        print(f"情境：{rounds} 輪 × {members} 位 AI × {reply_kb} KB", file=sys.stderr)
+        runs = run_scenario(args.work_dir, rounds, members, reply_kb, args.repeat,
+                            args.legacy_ratio, args.seed, args.keep)
+        results.append({
+            "rounds": rounds, "members": members, "reply_kb": reply_kb,
+            "runs": runs,
+            "summary": {m: report.spread([r.get(m) for r in runs]) for m in METRICS},
+        })
+
+    out = report.write_report("storage", results, args.out, repeat=args.repeat,
+                              legacy_ratio=args.legacy_ratio, seed=args.seed)
+    regressions = report.print_table(results, ("rounds", "members", "reply_kb"), TABLE_METRICS,
+                                     report.load_baseline(args.baseline))
+    print(f"\n結果：{out}")
+    return 1 if (args.fail_on_regression and regressions) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""效能測試結果 JSON 的共同欄位、統計與 baseline 比較"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+from synth import REPO_ROOT
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULT_FORMAT_VERSION = 1
+REGRESSION_THRESHOLD = 0.10   # 與 baseline 相比慢超過 10% 視為退步
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "-C", REPO_ROOT, "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def percentile(values, pct):
+    """最近秩百分位數（values 不需先排序）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+def spread(values):
+    """中位數 / 最小 / 最大；無資料時回傳 None"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {"median": statistics.median(values), "min": min(values), "max": max(values)}
+
+
+def write_report(benchmark, results, out=None, **extra):
+    """寫出結果 JSON；out 省略時放在 benchmarks/results/<benchmark>-時間.json，回傳路徑"""
+    report = {
+        "benchmark": benchmark,
+        "format": RESULT_FORMAT_VERSION,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        **extra,
+        "results": results,
+    }
+    out = out or os.path.join(BENCH_DIR, "results",
+                              f"{benchmark}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return out
+
+
+def load_baseline(path):
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_table(results, key_fields, metrics, baseline=None):
+    """每筆結果一列，顯示各指標的 summary 中位數；有 baseline 時附上差異，回傳退步項目數"""
+    base = {}
+    if baseline:
+        for entry in baseline.get("results", []):
+            base[tuple(entry.get(k) for k in key_fields)] = entry.get("summary", {})
+    regressions = 0
+    label_width = max([len(" ".join(str(e.get(k)) for k in key_fields)) for e in results] + [10])
+    print(f"{' '.join(key_fields):{label_width}} " + " ".join(f"{m:>16}" for m in metrics))
+    for entry in results:
+        old = base.get(tuple(entry.get(k) for k in key_fields), {})
+        cells = []
+        for key in metrics:
+            cur = (entry["summary"].get(key) or {}).get("median")
+            if cur is None:
+                cells.append(f"{'-':>16}")
+                continue
+            cell = f"{cur:.1f}" if cur < 100 else f"{cur:.0f}"
+            prev = (old.get(key) or {}).get("median")
+            if prev:
+                delta = (cur - prev) / prev
+                cell += f"({delta:+.0%})"
+                if delta > REGRESSION_THRESHOLD:
+                    cell += "!"
+                    regressions += 1
+            cells.append(f"{cell:>16}")
+        label = " ".join(str(entry.get(k)) for k in key_fields)
+        print(f"{label:{label_width}} " + " ".join(cells))
+    if baseline:
+        print(f"\n慢於 baseline {REGRESSION_THRESHOLD:.0%} 以上的項目：{regressions}（以 ! 標示）")
+    return regressions
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+效能測試用的合成資料（固定亂數種子，每次產生的內容相同）
+
+- generate_v1_home：v1 的設定檔 + 主題資料夾（經由 ai_discuss 寫入，格式與程式存檔相同）
+- generate_v2_home：v2 的設定檔與專案資料夾（每輪歷史紀錄寫成 _歷史紀錄/round_history.jsonl）
+- TextPool / make_round_record / write_legacy_round：儲存層測試用的單輪資料
+
+兩者都產生一個假的使用者目錄；啟動 App 時以 home_env() 的環境變數指向它，
+不會碰到真正的設定檔。
+"""
+
+import json
+import os
+import random
+import struct
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from ai_discuss import open_round_store, rebuild_accumulated_record, topic_folder_name
+from ai_discuss.textio import _ai_reply_filename
+
+# 資料格式有變動時遞增，讓快取的資料重新產生
+SYNTH_VERSION = 2
+
+# topics：主題（v2 為專案）數；rounds：最後開啟的主題輪數；side_rounds：其他主題輪數
+# members：每輪 AI 數；reply_chars：每則回覆字數；big_reply_chars：最後一輪額外一則超長回覆
+SIZES = {
+    "small": {"topics": 3, "rounds": 5, "side_rounds": 3, "members": 3,
+              "reply_chars": 800, "big_reply_chars": 0},
+    "medium": {"topics": 20, "rounds": 120, "side_rounds": 10, "members": 4,
+               "reply_chars": 2500, "big_reply_chars": 0},
+    "huge": {"topics": 60, "rounds": 1500, "side_rounds": 20, "members": 6,
+             "reply_chars": 2000, "big_reply_chars": 600_000},
+}
+
+_WORDS = (
+    "討論", "架構", "效能", "資料", "模型", "回覆", "問題", "建議", "測試", "設計",
+    "介面", "流程", "規格", "風險", "索引", "快取", "主題", "輪次", "整理", "結論",
+    "python", "tkinter", "sqlite", "thread", "cache", "index", "round", "topic",
+)
+
+
+def synth_text(rng, chars):
+    """大約 chars 個字元的中英混合段落"""
+    out = []
+    size = 0
+    while size < chars:
+        line = "".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18)))
+        if rng.random() < 0.5:
+            line += "。"
+        out.append(line)
+        size += len(line) + 1
+    return "\n".join(out)[:chars]
+
+
+class TextPool:
+    """預先產生一大段文字，之後以隨機位移切出指定位元組數的回覆（避免每則 5 MB 都重新產生）"""
+
+    def __init__(self, rng, max_bytes):
+        self.rng = rng
+        # 中文字 UTF-8 佔 3 bytes、英文 1 byte，先產生與位元組數相同的字元數一定夠切
+        self.text = synth_text(rng, max(4096, max_bytes) + 4096)
+
+    def take(self, nbytes):
+        """約 nbytes（UTF-8）的文字"""
+        start = self.rng.randrange(0, 4096)
+        piece = self.text[start:start + nbytes]
+        return piece.encode("utf-8")[:nbytes].decode("utf-8", "ignore")
+
+
+def home_env(home):
+    """讓子行程把 home 當成使用者目錄（Windows 的 APPDATA / USERPROFILE 一併指向）"""
+    env = dict(os.environ)
+    env["HOME"] = home
+    env["USERPROFILE"] = home
+    env["APPDATA"] = os.path.join(home, "AppData", "Roaming")
+    return env
+
+
+def member_list(count):
+    return [{"name": f"AI-{i + 1}", "path": ""} for i in range(count)]
+
+
+def make_round_record(pool, topic, round_num, ai_list, reply_bytes):
+    """一輪 record；每則回覆約 reply_bytes（UTF-8）"""
+    return {
+        "round": round_num,
+        "topic": topic,
+        "saved_at": f"2024-01-01 00:{round_num // 60 % 60:02d}:{round_num % 60:02d}",
+        "question": pool.take(max(200, min(reply_bytes // 5, 20_000))),
+        "replies": [{"name": ai["name"], "path": ai["path"], "text": pool.take(reply_bytes)}
+                    for ai in ai_list],
+        "write_full": True,
+        "write_split": True,
+    }
+
+
+def write_legacy_round(round_folder, record, encoding="cp950"):
+    """把一輪的提問與回覆檔改寫成舊版格式（無位移表頭），以指定編碼存檔"""
+    with open(os.path.join(round_folder, "提問.txt"), "w", encoding=encoding,
+              errors="replace", newline="") as f:
+        f.write(record["question"])
+    for reply in record["replies"]:
+        body = "\n".join([f"AI 名稱：{reply['name']}", f"輪次：第{record['round']}輪",
+                          "-" * 40, reply["text"] or "（未填寫）"])
+        with open(os.path.join(round_folder, _ai_reply_filename(reply["name"])), "w",
+                  encoding=encoding, errors="replace", newline="") as f:
+            f.write(body)
+
+
+def _round_record(rng, topic, round_num, ai_list, reply_chars, big_reply_chars=0):
+    replies = []
+    for idx, ai in enumerate(ai_list):
+        chars = big_reply_chars if (big_reply_chars and idx == 0) else reply_chars
+        replies.append({"name": ai["name"], "path": ai["path"], "text": synth_text(rng, chars)})
+    return {
+        "round": round_num,
+        "topic": topic,
+        "saved_at": f"2024-01-01 00:{round_num // 60 % 60:02d}:{round_num % 60:02d}",
+        "question": synth_text(rng, max(80, reply_chars // 5)),
+        "replies": replies,
+        "write_full": True,
+        "write_split": True,
+    }
+
+
+def fill_topic(folder, topic, rounds, ai_list, reply_chars, big_reply_chars=0,
+               backend="files", seed=0):
+    """寫入 rounds 輪到 folder，並重建累積紀錄；回傳寫入的字元數"""
+    rng = random.Random(f"{seed}:{topic}")
+    os.makedirs(folder, exist_ok=True)
+    store = open_round_store(folder, backend)
+    chars = 0
+    try:
+        for round_num in range(1, rounds + 1):
+            big = big_reply_chars if round_num == rounds else 0
+            record = _round_record(rng, topic, round_num, ai_list, reply_chars, big)
+            chars += len(record["question"]) + sum(len(r["text"]) for r in record["replies"])
+            store.create_round(round_num)
+            store.save_round(record)
+        rebuild_accumulated_record(store, topic, ai_list)
+    finally:
+        store.close()
+    return chars
+
+
+def generate_v1_home(home, size, backend="files", progress=None):
+    """v1：設定檔放在 APPDATA/AIDiscussTool，主題資料夾放在假桌面；最後一個主題為 last_topic"""
+    spec = SIZES[size]
+    desktop = os.path.join(home, "Desktop")
+    topics = {}
+    ai_list = member_list(spec["members"])
+    names = [f"合成主題{i + 1:03d}" for i in range(spec["topics"])]
+    for idx, name in enumerate(names):
+        last = idx == len(names) - 1
+        folder = os.path.join(desktop, topic_folder_name(name))
+        fill_topic(folder, name, spec["rounds"] if last else spec["side_rounds"], ai_list,
+                   spec["reply_chars"], spec["big_reply_chars"] if last else 0, backend=backend)
+        topics[name] = {"folder": folder, "ai_list": [dict(ai) for ai in ai_list], "storage": backend}
+        if progress:
+            progress(idx + 1, len(names))
+    cfg = {"topics": topics, "last_topic": names[-1], "theme": "cosmo",
+           "prefs": {"storage_backend": backend}}
+    cfg_dir = os.path.join(home, "AppData", "Roaming", "AIDiscussTool")
+    os.makedirs(cfg_dir, exist_ok=True)
+    with open(os.path.join(cfg_dir, "AI討論工具_config.json"), "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False, indent=2)
+    return cfg
+
+
+def write_v2_history(folder, entries):
+    """與 v2 RoundHistory 相同的格式：JSONL + 每行起始位移（8 bytes little-endian）"""
+    hist_dir = os.path.join(folder, "_歷史紀錄")
+    os.makedirs(hist_dir, exist_ok=True)
+    offsets = []
+    pos = 0
+    with open(os.path.join(hist_dir, "round_history.jsonl"), "wb") as f:
+        for entry in entries:
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            offsets.append(pos)
+            pos += len(line)
+    with open(os.path.join(hist_dir, "round_history.idx"), "wb") as f:
+        f.write(b"".join(struct.pack("<Q", v) for v in offsets))
+
+
+def generate_v2_home(home, size, progress=None):
+    """v2：設定檔放在假桌面；每個專案一個資料夾，rounds 對應歷史紀錄筆數"""
+    spec = SIZES[size]
+    desktop = os.path.join(home, "Desktop")
+    rng = random.Random(f"v2:{size}")
+    projects = {}
+    names = [f"合成專案{i + 1:03d}" for i in range(spec["topics"])]
+    for idx, name in enumerate(names):
+        rounds = spec["rounds"] if idx == len(names) - 1 else spec["side_rounds"]
+        folder = os.path.join(desktop, name)
+        os.makedirs(os.path.join(folder, "src"), exist_ok=True)
+        history = [{
+            "round": n,
+            "requirement": synth_text(rng, max(40, spec["reply_chars"] // 4)),
+            "round_type": "功能新增",
+            "mode": "完整",
+            "completed_at": f"2024-01-01 {n // 60 % 24:02d}:{n % 60:02d}",
+        } for n in range(1, rounds + 1)]
+        write_v2_history(folder, history)
+        projects[name] = {
+            "folder": folder,
+            "code_folder": "src",
+            "shared_files": [],
+            "extra_c_files": [],
+            "current_round": rounds + 1,
+        }
+        if progress:
+            progress(idx + 1, len(names))
+    cfg = {"projects": projects, "last_project": names[-1], "theme": "darkly"}
+    os.makedirs(desktop, exist_ok=True)
+    with open(os.path.join(desktop, "AI流程控制器_config.json"), "w", encoding="utf-8") as f:
+        json.dump(cfg, f, ensure_ascii=False, indent=2)
+    return cfg
+
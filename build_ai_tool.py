@@ -3,10 +3,12 @@ r"""AI 多窗口集中討論工具 — Windows onefile 打包腳本
 
 用法：
   cd Desktop
-  python build_ai_tool.py
+  python build_ai_tool.py            # 單一 exe
+  python build_ai_tool.py --onedir   # 資料夾版：不必每次啟動先解壓，開啟較快
 
 產出：
   dist\AI多窗口集中討論工具.exe
+  dist\AI多窗口集中討論工具\AI多窗口集中討論工具.exe（--onedir）
 """
 import os
 import sys
@@ -33,6 +35,7 @@ def must_exist(p: Path, label: str) -> None:
 
 
 def main() -> None:
+    onedir = "--onedir" in sys.argv[1:]
     main_py = (PROJECT_ROOT / MAIN_SCRIPT).resolve()
     icon_path = (PROJECT_ROOT / ICON_ICO).resolve()
     png_path = (PROJECT_ROOT / ICON_PNG).resolve()
@@ -46,7 +49,7 @@ def main() -> None:
         "--noconfirm",
         "--clean",
         "--noconsole",
-        "--onefile",
+        "--onedir" if onedir else "--onefile",
         f"--icon={icon_path}",
 
         # 將 ico + png 打進去，讓 tkinter 視窗/工作列都能用
@@ -57,18 +60,22 @@ def main() -> None:
         # ttkbootstrap 必須完整收集
         "--collect-all=ttkbootstrap",
 
-        # 專案只有單一 .py，不需 collect-submodules
+        # 主程式 import 的 ai_discuss 套件會被自動分析收進去，不需 collect-submodules
         # 隱含依賴
         "--hidden-import=PIL",
         "--hidden-import=PIL._tkinter_finder",
     ]
 
-    print(f"[START] {sys.platform} onefile packaging ...")
+    mode = "onedir" if onedir else "onefile"
+    print(f"[START] {sys.platform} {mode} packaging ...")
     for a in params:
         print("  ", a)
 
     PyInstaller.__main__.run(params)
-    print(f"\n[DONE] dist\\{APP_NAME}.exe")
+    if onedir:
+        print(f"\n[DONE] dist\\{APP_NAME}\\{APP_NAME}.exe")
+    else:
+        print(f"\n[DONE] dist\\{APP_NAME}.exe")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+測試共用設定
+
+ai_discuss 與 v2 在匯入時就決定設定檔位置（使用者目錄 / APPDATA），所以在匯入任何
+模組之前先把使用者目錄指向暫存資料夾，測試不會碰到真正的設定檔。
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+_SANDBOX_HOME = tempfile.mkdtemp(prefix="aidt-test-home-")
+os.environ["HOME"] = _SANDBOX_HOME
+os.environ["USERPROFILE"] = _SANDBOX_HOME
+os.environ["APPDATA"] = os.path.join(_SANDBOX_HOME, "AppData", "Roaming")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import pytest  # noqa: E402
+
+from ai_discuss.textio import ROUND_READ_CACHE  # noqa: E402
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SANDBOX_HOME, ignore_errors=True)
+
+
+AI_LIST = [{"name": "Claude", "path": ""}, {"name": "GPT", "path": "D:/專案"}]
+
+
+def make_record(round_num, question="提問", replies=None, topic="測試主題", ai_list=AI_LIST):
+    """一輪 record；replies 為 {AI 名稱: 回覆}，省略時每位 AI 各有一段回覆"""
+    if replies is None:
+        replies = {ai["name"]: f"{ai['name']} 第{round_num}輪的回覆\n第二行" for ai in ai_list}
+    return {
+        "round": round_num,
+        "topic": topic,
+        "saved_at": f"2024-01-01 00:00:{round_num % 60:02d}",
+        "question": question,
+        "replies": [{"name": ai["name"], "path": ai["path"], "text": replies.get(ai["name"], "")}
+                    for ai in ai_list],
+        "write_full": True,
+        "write_split": True,
+    }
+
+
+@pytest.fixture
+def topic_folder(tmp_path):
+    folder = tmp_path / "測試主題"
+    folder.mkdir()
+    yield str(folder)
+    # 讀取快取以路徑為鍵，各測試的暫存路徑不同，仍清掉避免互相影響統計
+    ROUND_READ_CACHE.clear()
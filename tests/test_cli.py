@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""命令列 import / export：匯入前的格式檢查與 JSON Lines 往返"""
+
+import json
+import os
+import uuid
+
+import pytest
+
+from ai_discuss.cli import main
+from ai_discuss.textio import topic_folder_name
+
+
+def _unique_topic(prefix="匯入測試"):
+    # 設定檔在整個測試階段共用，主題名稱不可重複
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def _write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write((row if isinstance(row, str) else json.dumps(row, ensure_ascii=False)) + "\n")
+
+
+def _row(round_num, **extra):
+    row = {"round": round_num, "question": f"第{round_num}輪提問",
+           "replies": [{"name": "Claude", "path": "", "text": f"回覆{round_num}"}]}
+    row.update(extra)
+    return row
+
+
+@pytest.mark.parametrize("rows", [
+    [_row(0)],
+    [_row(-3)],
+    [_row(True)],
+    [_row("2")],
+    [_row(1.5)],
+    [_row(1), _row(2), _row(1)],
+    [_row(1, replies=[{"path": "", "text": "沒有名稱"}])],
+    [_row(1, replies=[{"name": "", "text": "空名稱"}])],
+    [_row(1, replies=[{"name": "Claude", "text": 42}])],
+    [_row(1, question=["不是字串"])],
+    [_row(1), "{被截斷的一行"],
+    ["[1, 2]"],
+], ids=["zero", "negative", "bool", "string", "float", "duplicate", "missing-name", "empty-name",
+        "non-str-text", "non-str-question", "torn-line", "not-object"])
+def test_import_rejects_invalid_rows_before_writing(tmp_path, capsys, rows):
+    source = tmp_path / "rounds.jsonl"
+    _write_jsonl(source, rows)
+    topic = _unique_topic()
+    root = tmp_path / "root"
+
+    assert main(["import", str(source), "--topic", topic, "--root", str(root)]) == 2
+    assert "錯誤：" in capsys.readouterr().err
+    assert not (root / topic_folder_name(topic)).exists()
+
+
+def test_import_rejects_empty_source(tmp_path):
+    source = tmp_path / "empty.jsonl"
+    source.write_text("\n\n", encoding="utf-8")
+    assert main(["import", str(source), "--topic", _unique_topic(), "--root", str(tmp_path)]) == 2
+
+
+@pytest.mark.parametrize("storage", ["files", "sqlite"])
+def test_export_import_round_trip(tmp_path, storage):
+    members = [{"name": "Claude", "path": ""}, {"name": "GPT", "path": "D:/專案"}]
+    rows = [
+        _row(1, saved_at="2024-01-01 10:00:00",
+             replies=[dict(members[0], text="回覆1"), dict(members[1], text="回覆2")]),
+        _row(2, saved_at="2024-01-01 11:00:00",
+             replies=[dict(members[0], text="多行\n回覆"), dict(members[1], text="")]),
+    ]
+    source = tmp_path / "in.jsonl"
+    _write_jsonl(source, rows)
+    first = _unique_topic("往返")
+    assert main(["import", str(source), "--topic", first, "--root", str(tmp_path),
+                 "--storage", storage]) == 0
+
+    exported = tmp_path / "out.jsonl"
+    assert main(["export", first, str(exported)]) == 0
+    second = _unique_topic("往返")
+    assert main(["import", str(exported), "--topic", second, "--root", str(tmp_path),
+                 "--storage", storage]) == 0
+    again = tmp_path / "again.jsonl"
+    assert main(["export", second, str(again)]) == 0
+
+    def _records(path):
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        # 資料夾格式以資料夾 mtime 作為存檔時間，只比較內容
+        return [(r["round"], r["question"], [(x["name"], x["path"], x["text"]) for x in r["replies"]])
+                for r in records]
+
+    expected = [(r["round"], r["question"], [(x["name"], x["path"], x["text"]) for x in r["replies"]])
+                for r in rows]
+    assert _records(exported) == expected
+    assert _records(again) == expected
+
+
+def test_export_to_folder_writes_round_folders(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_jsonl(source, [_row(1), _row(2)])
+    topic = _unique_topic("資料夾匯出")
+    assert main(["import", str(source), "--topic", topic, "--root", str(tmp_path / "src"),
+                 "--storage", "sqlite"]) == 0
+    dest = tmp_path / "dest"
+    assert main(["export", topic, str(dest)]) == 0
+    assert os.path.isdir(dest / "第1輪") and os.path.isdir(dest / "第2輪")
+    assert os.path.isfile(dest / "全部討論紀錄（累積）.txt")
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""「第N輪」資料夾格式：輪次清單、回覆檔、累積紀錄、交易式提交與當機修復"""
+
+import json
+import os
+
+from conftest import AI_LIST, make_record
+
+from ai_discuss import (
+    ACCUMULATED_NAME, FileRoundStore, commit_round, rebuild_accumulated_record, read_round_files,
+    recover_round_commits, scan_max_round,
+)
+from ai_discuss import rounds
+from ai_discuss.textio import _ai_reply_filename
+
+
+def _save(store, record):
+    store.create_round(record["round"])
+    assert commit_round(store, record, AI_LIST) is None
+
+
+def _accumulated_body(folder):
+    """累積紀錄去掉表頭（表頭含更新時間）後的位元組"""
+    index = rounds._load_accumulated_index(folder)
+    with open(os.path.join(folder, ACCUMULATED_NAME), "rb") as f:
+        return f.read()[index["header_len"]:]
+
+
+# ── 輪次清單 ──
+def test_manifest_tracks_rounds_and_external_changes(topic_folder):
+    store = FileRoundStore(topic_folder)
+    for n in (1, 2, 3):
+        store.create_round(n)
+    assert scan_max_round(topic_folder) == 3
+    assert os.path.exists(rounds._round_manifest_path(topic_folder))
+
+    # 其他程式新增的資料夾：主題資料夾 mtime 改變，會重新掃描
+    os.mkdir(os.path.join(topic_folder, "第7輪"))
+    assert scan_max_round(topic_folder) == 7
+
+
+def test_manifest_missing_or_corrupt_falls_back_to_scan(topic_folder):
+    store = FileRoundStore(topic_folder)
+    for n in (1, 2):
+        store.create_round(n)
+    with open(rounds._round_manifest_path(topic_folder), "w", encoding="utf-8") as f:
+        f.write("{壞掉的 JSON")
+    rounds._ROUND_MANIFESTS.clear()
+    assert scan_max_round(topic_folder) == 2
+    os.remove(rounds._round_manifest_path(topic_folder))
+    rounds._ROUND_MANIFESTS.clear()
+    assert scan_max_round(topic_folder) == 2
+
+
+# ── 回覆檔 ──
+def test_reply_file_offset_header_round_trip(topic_folder):
+    record = make_record(1)
+    data = rounds.encode_reply_file(record, record["replies"][1])
+    assert data.startswith(rounds.REPLY_FILE_MAGIC)
+    assert b"\r\n" not in data   # 各平台位元組相同
+    path = os.path.join(topic_folder, "回覆.txt")
+    with open(path, "wb") as f:
+        f.write(data)
+    assert rounds._read_reply_body(path) == record["replies"][1]["text"]
+
+
+def test_reply_file_with_edited_header_uses_legacy_parser(topic_folder):
+    record = make_record(1)
+    data = rounds.encode_reply_file(record, record["replies"][0])
+    # 使用者手動在表頭加了一行：位移不再指向分隔線之後
+    data = data.replace("AI 名稱：".encode("utf-8"), "備註：手動修改\nAI 名稱：".encode("utf-8"), 1)
+    path = os.path.join(topic_folder, "回覆.txt")
+    with open(path, "wb") as f:
+        f.write(data)
+    assert rounds._read_reply_body(path) == record["replies"][0]["text"]
+
+
+def test_legacy_cp950_reply_files_are_readable(topic_folder):
+    folder = os.path.join(topic_folder, "第1輪")
+    os.mkdir(folder)
+    with open(os.path.join(folder, "提問.txt"), "w", encoding="cp950", newline="") as f:
+        f.write("舊版提問內容")
+    body = "\r\n".join(["AI 名稱：Claude", "輪次：第1輪", "-" * 40, "繁體中文回覆\r\n第二行"])
+    with open(os.path.join(folder, _ai_reply_filename("Claude")), "w", encoding="cp950", newline="") as f:
+        f.write(body)
+
+    question, replies = read_round_files(topic_folder, 1, AI_LIST)
+    assert question == "舊版提問內容"
+    assert replies == {"Claude": "繁體中文回覆\n第二行"}
+
+
+# ── 累積紀錄 ──
+def test_incremental_accumulated_matches_full_rebuild(topic_folder):
+    store = FileRoundStore(topic_folder)
+    _save(store, make_record(1))   # 第一次存檔沒有索引，會完整重建
+    # 附加新輪、改寫中間一輪（長度改變，後面的段落要搬移）、再改成同長度
+    for record in (make_record(2), make_record(3),
+                   make_record(2, question="第二輪改得更長的提問" * 20),
+                   make_record(2, question="改成同長度的提問" * 25),
+                   make_record(4)):
+        store.create_round(record["round"])
+        store.save_round(record)
+        assert rounds.update_accumulated_round(store, "測試主題", AI_LIST, record["round"])
+    incremental = _accumulated_body(topic_folder)
+
+    rebuild_accumulated_record(store, "測試主題", AI_LIST)
+    assert _accumulated_body(topic_folder) == incremental
+
+
+def test_accumulated_size_mismatch_forces_rebuild(topic_folder):
+    store = FileRoundStore(topic_folder)
+    for n in (1, 2):
+        _save(store, make_record(n))
+    # 外部編輯：大小與索引不符，局部更新必須放棄
+    with open(os.path.join(topic_folder, ACCUMULATED_NAME), "ab") as f:
+        f.write("使用者自己加的一行\n".encode("utf-8"))
+    assert not rounds.update_accumulated_round(store, "測試主題", AI_LIST, 2)
+
+    _save(store, make_record(2, question="修改後的提問"))
+    with open(os.path.join(topic_folder, ACCUMULATED_NAME), "r", encoding="utf-8") as f:
+        text = f.read()
+    assert "使用者自己加的一行" not in text
+    assert "修改後的提問" in text
+    index = rounds._load_accumulated_index(topic_folder)
+    assert index["size"] == os.path.getsize(os.path.join(topic_folder, ACCUMULATED_NAME))
+
+
+def test_member_change_invalidates_accumulated_index(topic_folder):
+    store = FileRoundStore(topic_folder)
+    _save(store, make_record(1))
+    assert not rounds.update_accumulated_round(store, "測試主題", AI_LIST[:1], 1)
+
+
+# ── 交易式提交與當機修復 ──
+def _write_dir(path, files):
+    os.makedirs(path)
+    for name, text in files.items():
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def _read_dir(path):
+    out = {}
+    for name in os.listdir(path):
+        with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+            out[name] = f.read()
+    return out
+
+
+def test_commit_replaces_round_and_keeps_other_files(topic_folder):
+    _write_dir(os.path.join(topic_folder, "第1輪"), {"提問.txt": "舊", "附件.txt": "保留"})
+    rounds.commit_round_files(topic_folder, 1, {"提問.txt": "新".encode("utf-8")})
+    assert _read_dir(os.path.join(topic_folder, "第1輪")) == {"提問.txt": "新", "附件.txt": "保留"}
+    assert sorted(os.listdir(topic_folder)) == ["第1輪"]
+
+
+def test_recover_discards_unfinished_staging(topic_folder):
+    _write_dir(os.path.join(topic_folder, "第1輪"), {"提問.txt": "舊"})
+    _write_dir(os.path.join(topic_folder, ".第1輪.staging"), {"提問.txt": "寫到一半"})
+    recover_round_commits(topic_folder)
+    assert _read_dir(os.path.join(topic_folder, "第1輪")) == {"提問.txt": "舊"}
+    assert sorted(os.listdir(topic_folder)) == ["第1輪"]
+
+
+def test_recover_rolls_ready_forward(topic_folder):
+    _write_dir(os.path.join(topic_folder, "第1輪"), {"提問.txt": "舊", "附件.txt": "保留"})
+    _write_dir(os.path.join(topic_folder, ".第1輪.ready"), {"提問.txt": "新"})
+    recover_round_commits(topic_folder)
+    assert _read_dir(os.path.join(topic_folder, "第1輪")) == {"提問.txt": "新", "附件.txt": "保留"}
+    assert sorted(os.listdir(topic_folder)) == ["第1輪"]
+
+
+def test_recover_after_crash_mid_swap(topic_folder):
+    # 第N輪 已改名為 .old，但 .ready 尚未換上
+    _write_dir(os.path.join(topic_folder, ".第2輪.old"), {"提問.txt": "舊"})
+    _write_dir(os.path.join(topic_folder, ".第2輪.ready"), {"提問.txt": "新"})
+    recover_round_commits(topic_folder)
+    assert _read_dir(os.path.join(topic_folder, "第2輪")) == {"提問.txt": "新"}
+    assert sorted(os.listdir(topic_folder)) == ["第2輪"]
+
+
+def test_recover_restores_old_when_nothing_was_ready(topic_folder):
+    _write_dir(os.path.join(topic_folder, ".第3輪.old"), {"提問.txt": "舊"})
+    recover_round_commits(topic_folder)
+    assert _read_dir(os.path.join(topic_folder, "第3輪")) == {"提問.txt": "舊"}
+
+
+def test_recover_skips_commits_in_progress(topic_folder):
+    staging = os.path.join(topic_folder, ".第1輪.staging")
+    _write_dir(staging, {"提問.txt": "寫入中"})
+    active = (rounds._round_manifest_key(topic_folder), 1)
+    rounds._ACTIVE_COMMITS.add(active)
+    try:
+        recover_round_commits(topic_folder)
+        assert os.path.isdir(staging)
+    finally:
+        rounds._ACTIVE_COMMITS.discard(active)
+
+
+def test_saved_round_reads_back(topic_folder):
+    store = FileRoundStore(topic_folder)
+    record = make_record(1, replies={"Claude": "回覆 A", "GPT": ""})
+    _save(store, record)
+    question, replies = store.load_round(1, AI_LIST)
+    assert question == "提問"
+    assert replies == {"Claude": "回覆 A", "GPT": "（未填寫）"}
+    with open(rounds._round_manifest_path(topic_folder), "r", encoding="utf-8") as f:
+        assert json.load(f)["rounds"]["1"]["saved"]
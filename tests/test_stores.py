@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""儲存層：SQLite 存取與匯出、背景寫檔執行緒"""
+
+import os
+import threading
+
+from conftest import AI_LIST, make_record
+
+from ai_discuss import (
+    FileRoundStore, RoundSaveWriter, SqliteRoundStore, commit_round, detect_storage_backend,
+    export_round_store,
+)
+
+
+def _folder_bytes(folder):
+    out = {}
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), "rb") as f:
+            out[name] = f.read()
+    return out
+
+
+def test_sqlite_save_and_load(topic_folder):
+    store = SqliteRoundStore(topic_folder)
+    try:
+        store.create_round(1)
+        store.create_round(2)
+        assert store.max_round() == 2
+        assert store.load_round(2, AI_LIST) == ("", {})   # 已建立但尚未存檔
+
+        record = make_record(1, question="問題", replies={"Claude": "甲", "GPT": ""})
+        assert commit_round(store, record, AI_LIST) is None
+        assert store.load_record(1) == record
+        assert store.load_round(1, AI_LIST[:1]) == ("問題", {"Claude": "甲"})
+        assert [r["round"] for r in store.iter_records()] == [1]
+    finally:
+        store.close()
+    assert detect_storage_backend(topic_folder) == "sqlite"
+
+
+def test_sqlite_export_matches_folder_format(tmp_path):
+    records = [make_record(1), make_record(3, replies={"Claude": "只有一位回覆", "GPT": ""})]
+
+    direct = FileRoundStore(str(tmp_path / "direct"))
+    os.makedirs(direct.topic_folder)
+    for record in records:
+        direct.save_round(record)
+
+    db_folder = tmp_path / "db"
+    db_folder.mkdir()
+    store = SqliteRoundStore(str(db_folder))
+    try:
+        for n in (1, 2, 3):
+            store.create_round(n)
+        for record in records:
+            store.save_round(record)
+        dest = str(tmp_path / "exported")
+        assert export_round_store(store, dest) == 3
+    finally:
+        store.close()
+
+    # 未存檔的第2輪匯出為空資料夾，與按「新一輪」後的狀態相同
+    assert os.listdir(os.path.join(dest, "第2輪")) == []
+    for n in (1, 3):
+        assert (_folder_bytes(os.path.join(dest, f"第{n}輪"))
+                == _folder_bytes(os.path.join(direct.topic_folder, f"第{n}輪")))
+    # 空白回覆依資料夾格式寫成「（未填寫）」
+    question, replies = FileRoundStore(dest).load_round(3, AI_LIST)
+    assert replies == {"Claude": "只有一位回覆", "GPT": "（未填寫）"}
+
+
+def test_writer_coalesces_pending_jobs_for_same_key():
+    writer = RoundSaveWriter(name="test-writer")
+    started = threading.Event()
+    release = threading.Event()
+    done = []
+
+    def blocking(payload):
+        started.set()
+        release.wait(5)
+        done.append(payload["value"])
+
+    def work(payload):
+        done.append(payload["value"])
+        return payload["value"]
+
+    try:
+        writer.submit("block", {"value": "block"}, blocking)
+        assert started.wait(5)
+        # 執行中的工作不會被取代；尚未開始的同一 key 只保留最後一次
+        assert writer.submit("round-1", {"value": 1}, work) is False
+        assert writer.submit("round-2", {"value": 2}, work) is False
+        assert writer.submit("round-1", {"value": 3}, work) is True
+        assert writer.pending_payload("round-1") == {"value": 3}
+        assert writer.pending_payload("block") == {"value": "block"}
+        release.set()
+        assert writer.wait_idle(5)
+    finally:
+        release.set()
+        writer.stop(5)
+
+    assert done == ["block", 3, 2]
+    results = writer.drain_results()
+    assert [(key, result, exc) for key, _, result, exc in results] == [
+        ("block", None, None), ("round-1", 3, None), ("round-2", 2, None)]
+    assert not writer.busy()
+
+
+def test_writer_reports_exceptions():
+    writer = RoundSaveWriter(name="test-writer")
+
+    def fail(payload):
+        raise OSError("磁碟已滿")
+
+    try:
+        writer.submit("k", {}, fail)
+        assert writer.wait_idle(5)
+    finally:
+        writer.stop(5)
+    [(key, _, result, exc_info)] = writer.drain_results()
+    assert key == "k" and result is None
+    assert exc_info[0] is OSError
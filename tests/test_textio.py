@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""文字檔讀寫：編碼偵測、原子寫入、讀取快取"""
+
+import os
+
+from ai_discuss.textio import (
+    _ParsedFileCache, read_text_file, safe_fs_component, topic_folder_name, write_text_file,
+)
+
+
+def test_read_detects_legacy_encodings(tmp_path):
+    path = str(tmp_path / "舊檔.txt")
+    with open(path, "w", encoding="cp950", newline="") as f:
+        f.write("繁體中文\r\n第二行")
+    assert read_text_file(path) == "繁體中文\n第二行"
+
+    # 改寫成 UTF-8 後，不能沿用記住的 cp950
+    write_text_file(path, "改寫後的內容")
+    assert read_text_file(path) == "改寫後的內容"
+
+    with open(path, "wb") as f:
+        f.write("﻿有 BOM 的檔案".encode("utf-8"))
+    assert read_text_file(path) == "有 BOM 的檔案"
+
+
+def test_read_missing_file_returns_default(tmp_path):
+    assert read_text_file(str(tmp_path / "不存在.txt"), default="預設") == "預設"
+
+
+def test_write_is_atomic_and_leaves_no_temp_file(tmp_path):
+    path = str(tmp_path / "子資料夾" / "檔案.txt")
+    write_text_file(path, "內容")
+    write_text_file(path, "新內容")
+    assert read_text_file(path) == "新內容"
+    assert os.listdir(os.path.dirname(path)) == ["檔案.txt"]
+
+
+def test_parsed_file_cache_validates_stamp(tmp_path):
+    path = str(tmp_path / "a.txt")
+    write_text_file(path, "一")
+    cache = _ParsedFileCache()
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        return read_text_file(p)
+
+    assert cache.get(path, loader) == "一"
+    assert cache.get(path, loader) == "一"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+    # 大小改變：快取失效並重新讀取
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("一二三")
+    assert cache.get(path, loader) == "一二三"
+    assert len(calls) == 2
+
+    assert cache.get(str(tmp_path / "不存在.txt"), loader) is None
+
+
+def test_parsed_file_cache_evicts_by_size(tmp_path):
+    cache = _ParsedFileCache(max_entries=2, max_chars=10)
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"{i}.txt")
+        write_text_file(path, "字" * 4)
+        paths.append(path)
+        cache.get(path, read_text_file)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["chars"] == 8
+
+
+def test_safe_fs_component():
+    assert safe_fs_component("一般主題") == "一般主題"
+    assert safe_fs_component("   ") == "未命名"
+    # 改過的名稱附上原名雜湊，不同原名不會對到同一個資料夾
+    a, b = safe_fs_component("a<b"), safe_fs_component("a>b")
+    assert a.startswith("a_b_") and b.startswith("a_b_") and a != b
+    assert safe_fs_component("CON").upper() != "CON"
+    assert "/" not in topic_folder_name("主題/一")
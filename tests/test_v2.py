@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""v2 流程控制器：輪次歷史（JSONL + 位移索引）、專案備份與保留規則"""
+
+import importlib.util
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+from conftest import REPO_ROOT
+
+V2_PATH = os.path.join(REPO_ROOT, "v2", "AI討論工具_v2_WIP.py")
+
+
+@pytest.fixture(scope="module")
+def v2():
+    # v2 是單一 GUI 腳本，匯入時需要 tkinter 與 ttkbootstrap（不會開視窗）
+    pytest.importorskip("tkinter")
+    pytest.importorskip("ttkbootstrap")
+    spec = importlib.util.spec_from_file_location("ai_discuss_v2", V2_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    try:
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        sys.modules.pop(spec.name, None)
+
+
+def _entry(i):
+    return {"round": i, "summary": f"第{i}輪摘要"}
+
+
+# ── 輪次歷史 ──
+def test_history_append_and_pages(v2, tmp_path):
+    history = v2.RoundHistory(str(tmp_path))
+    history.extend([_entry(i) for i in range(1, 8)])
+    history.append(_entry(8))
+    assert history.count() == 8
+    assert history.read(2, 4) == [_entry(3), _entry(4)]
+    assert history.read_page(0, page_size=3) == [_entry(8), _entry(7), _entry(6)]
+    assert history.read_page(2, page_size=3) == [_entry(2), _entry(1)]
+    assert v2.RoundHistory(str(tmp_path)).count() == 8
+
+
+def test_history_truncates_torn_jsonl_tail(v2, tmp_path):
+    history = v2.RoundHistory(str(tmp_path))
+    history.extend([_entry(1), _entry(2)])
+    size = os.path.getsize(history.path)
+    # 中途結束：資料寫了半行，索引還沒寫
+    with open(history.path, "ab") as f:
+        f.write('{"round": 3, "summ'.encode("utf-8"))
+
+    reopened = v2.RoundHistory(str(tmp_path))
+    assert reopened.count() == 2
+    assert os.path.getsize(reopened.path) == size
+    reopened.append(_entry(3))
+    assert v2.RoundHistory(str(tmp_path)).read(0, 10) == [_entry(1), _entry(2), _entry(3)]
+
+
+def test_history_rebuilds_missing_or_stale_index(v2, tmp_path):
+    history = v2.RoundHistory(str(tmp_path))
+    history.extend([_entry(i) for i in range(1, 6)])
+
+    # 索引少了尾端兩筆：由 JSONL 補回
+    with open(history.index_path, "r+b") as f:
+        f.truncate(3 * v2._HISTORY_OFFSET.size)
+    reopened = v2.RoundHistory(str(tmp_path))
+    assert reopened.count() == 5
+    assert reopened.read(3, 5) == [_entry(4), _entry(5)]
+    assert os.path.getsize(reopened.index_path) == 5 * v2._HISTORY_OFFSET.size
+
+    # 索引指向資料尾端之外（資料檔被換掉）：整份重建
+    with open(history.path, "wb") as f:
+        f.write((json.dumps(_entry(9), ensure_ascii=False) + "\n").encode("utf-8"))
+    reopened = v2.RoundHistory(str(tmp_path))
+    assert reopened.count() == 1
+    assert reopened.read(0, 1) == [_entry(9)]
+
+
+def test_history_legacy_migration_is_idempotent(v2, tmp_path):
+    legacy = [_entry(i) for i in range(1, 5)]
+    history = v2.RoundHistory(str(tmp_path))
+    history.append({"round": 0, "summary": "搬移前已有的紀錄"})
+
+    history.migrate_legacy(legacy)
+    history.migrate_legacy(legacy)   # 存設定檔失敗、下次啟動再搬一次
+    reopened = v2.RoundHistory(str(tmp_path))
+    reopened.migrate_legacy(legacy)
+    assert reopened.count() == 5
+    assert reopened.read(1, 5) == legacy
+
+
+def test_history_legacy_migration_resumes_after_partial_write(v2, tmp_path):
+    legacy = [_entry(i) for i in range(1, 5)]
+    history = v2.RoundHistory(str(tmp_path))
+    os.makedirs(os.path.dirname(history.migration_path))
+    with open(history.migration_path, "w", encoding="utf-8") as f:
+        json.dump({"start": 0, "count": 4}, f)
+    history.extend(legacy[:2])   # 當機前只附加了兩筆
+
+    reopened = v2.RoundHistory(str(tmp_path))
+    reopened.migrate_legacy(legacy)
+    assert reopened.read(0, 10) == legacy
+
+
+# ── 備份 ──
+def _make_project(root):
+    for rel, text in (("_共用文件/說明.md", "共用"), ("_共識/規格/spec.md", "規格內容" * 50)):
+        path = os.path.join(root, *rel.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+@pytest.mark.parametrize("fmt", ["zip", "tar.xz"])
+def test_extract_archive_member_keeps_relative_path(v2, tmp_path, fmt):
+    proj = tmp_path / "專案"
+    _make_project(str(proj))
+    result = v2.create_archive_backup(str(proj), fmt)
+    archive = result["dir"]
+
+    dest = v2.extract_archive_member(archive, "_共識/規格/spec.md", str(tmp_path / "還原"))
+    assert dest == os.path.join(str(tmp_path / "還原"), "_共識", "規格", "spec.md")
+    with open(dest, "r", encoding="utf-8") as f:
+        assert f.read() == "規格內容" * 50
+    with pytest.raises(KeyError):
+        v2.extract_archive_member(archive, "不存在.md", str(tmp_path / "還原"))
+
+
+def _make_backup(v2, proj, name, files):
+    folder = os.path.join(proj, v2.BACKUP_DIRNAME, name)
+    os.makedirs(folder)
+    for fn, content in files.items():
+        path = os.path.join(folder, fn)
+        if isinstance(content, str) and os.path.exists(content):
+            os.link(content, path)   # 與其他備份共用的檔案
+        else:
+            with open(path, "wb") as f:
+                f.write(content)
+    return folder
+
+
+def _plan_names(plan):
+    return [b["name"] for b, _ in plan["keep"]], [b["name"] for b, _ in plan["remove"]]
+
+
+def test_retention_counts_hardlinked_files_once(v2, tmp_path):
+    proj = str(tmp_path)
+    old = _make_backup(v2, proj, "2024-01-01_1200", {"shared.bin": b"x" * 4000, "old.bin": b"o" * 1000})
+    _make_backup(v2, proj, "2024-01-02_1200", {"shared.bin": os.path.join(old, "shared.bin"),
+                                              "new.bin": b"n" * 500})
+    os.makedirs(os.path.join(proj, v2.BACKUP_DIRNAME, "2024-01-03_1200.part"))   # 寫到一半的備份
+
+    backups = v2.list_backups(proj)
+    assert [b["name"] for b in backups] == ["2024-01-02_1200", "2024-01-01_1200"]
+    assert backups[0]["created"] == datetime(2024, 1, 2, 12, 0)
+
+    plan = v2.plan_backup_retention(proj, {"keep_last": 1, "keep_daily": 0, "keep_weekly": 0})
+    assert _plan_names(plan) == (["2024-01-02_1200"], ["2024-01-01_1200"])
+    assert plan["total_bytes"] == 5500
+    # 共用的 shared.bin 仍被保留的備份引用，刪除只釋放 old.bin
+    assert plan["reclaim_bytes"] == 1000
+
+    assert v2.apply_backup_retention(plan) == 1
+    assert [b["name"] for b in v2.list_backups(proj)] == ["2024-01-02_1200"]
+    assert "將刪除 1 份" in v2.format_retention_report(plan)
+
+
+def test_retention_daily_weekly_and_size_budget(v2, tmp_path):
+    proj = str(tmp_path)
+    names = ["2024-01-01_0900", "2024-01-01_1800", "2024-01-02_0900", "2024-01-09_0900", "2024-01-10_0900"]
+    for name in names:
+        _make_backup(v2, proj, name, {"data.bin": b"d" * 1024 * 1024})
+
+    policy = {"keep_last": 1, "keep_daily": 2, "keep_weekly": 2}
+    keep, remove = _plan_names(v2.plan_backup_retention(proj, policy))
+    # 最近一份 + 最近兩天各一份 + 最近兩週各一份（每期取最後一份）
+    assert keep == ["2024-01-10_0900", "2024-01-09_0900", "2024-01-02_0900"]
+    assert sorted(remove) == ["2024-01-01_0900", "2024-01-01_1800"]
+
+    # 空間上限：從最舊的開始刪，但最新的一份一定保留
+    policy = {"keep_last": 10, "keep_daily": 0, "keep_weekly": 0, "max_total_mb": 0.5}
+    keep, remove = _plan_names(v2.plan_backup_retention(proj, policy))
+    assert keep == ["2024-01-10_0900"]
+    assert len(remove) == 4
+
+
+def test_backup_retention_policy_ignores_unknown_keys(v2):
+    policy = v2.backup_retention_policy({"backup_retention": {"keep_last": 3, "bogus": 1}})
+    assert policy["keep_last"] == 3
+    assert "bogus" not in policy
+    assert v2.backup_retention_policy({}) == v2.DEFAULT_BACKUP_RETENTION
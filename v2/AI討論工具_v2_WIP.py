@@ -12,6 +12,13 @@ from tkinter import filedialog, messagebox
 import os
 import sys
 import json
+import hashlib
+import shutil
+import struct
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 
 IS_WIN = sys.platform == 'win32'
@@ -100,11 +107,690 @@ def load_config():
     return {"projects": {}, "last_project": "", "theme": "darkly"}
 
 
+# ──────────────────────────────────────
+# 效能紀錄（Ctrl+Shift+D 開啟診斷視窗）
+# ──────────────────────────────────────
+PERF_WINDOW = 1000
+PERF_BUCKETS_MS = (1, 5, 20, 100, 500, 2000, 10000)
+
+
+class PerfRecorder:
+    """各操作的呼叫次數、直方圖與最近 PERF_WINDOW 次耗時（只存在記憶體）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.ops = {}
+            self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def record(self, name, ms):
+        bucket = next((i for i, b in enumerate(PERF_BUCKETS_MS) if ms <= b), len(PERF_BUCKETS_MS))
+        with self._lock:
+            op = self.ops.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0,
+                                            "buckets": [0] * (len(PERF_BUCKETS_MS) + 1),
+                                            "samples": deque(maxlen=PERF_WINDOW)})
+            op["count"] += 1
+            op["total"] += ms
+            op["max"] = max(op["max"], ms)
+            op["buckets"][bucket] += 1
+            op["samples"].append(ms)
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self):
+        labels = [f"<={b}ms" for b in PERF_BUCKETS_MS] + [f">{PERF_BUCKETS_MS[-1]}ms"]
+        out = {}
+        with self._lock:
+            for name in sorted(self.ops):
+                op = self.ops[name]
+                ordered = sorted(op["samples"])
+
+                def pct(p):
+                    return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))]
+
+                out[name] = {"count": op["count"], "p50_ms": pct(50), "p95_ms": pct(95),
+                             "max_ms": op["max"], "mean_ms": op["total"] / op["count"],
+                             "histogram": {l: n for l, n in zip(labels, op["buckets"]) if n}}
+        return out
+
+
+PERF = PerfRecorder()
+
+
+def perf_timed(name):
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            with PERF.measure(name):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        return wrapper
+    return decorator
+
+
+@perf_timed("save_config")
 def save_config(cfg):
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(cfg, f, ensure_ascii=False, indent=2)
 
 
+# ──────────────────────────────────────
+# 輪次歷史紀錄（每個專案一份，不放在設定檔）
+# ──────────────────────────────────────
+HISTORY_DIRNAME = "_歷史紀錄"
+HISTORY_FILE = "round_history.jsonl"
+HISTORY_INDEX_FILE = "round_history.idx"
+# 舊版設定檔 round_history 的搬移紀錄：{"start": 搬移前筆數, "count": 舊紀錄筆數}
+HISTORY_MIGRATION_FILE = "legacy_migration.json"
+HISTORY_PAGE_SIZE = 50
+_HISTORY_OFFSET = struct.Struct("<Q")
+
+
+class RoundHistory:
+    """只附加的輪次歷史：每輪一行 JSON，索引檔依序記錄每行的起始位移（8 bytes）
+
+    開啟時只核對最後一筆索引；程式中途結束留下的半行會被截掉，
+    索引缺少的尾端由 JSONL 補回。讀取時依索引直接跳到要顯示的那一頁。
+    JSONL 與索引每次附加後都 fsync：停電後索引不會留下指向資料尾端之外（或內容為零）的位移。
+    """
+
+    def __init__(self, project_folder):
+        folder = os.path.join(project_folder, HISTORY_DIRNAME)
+        self.path = os.path.join(folder, HISTORY_FILE)
+        self.index_path = os.path.join(folder, HISTORY_INDEX_FILE)
+        self.migration_path = os.path.join(folder, HISTORY_MIGRATION_FILE)
+        self._count = None
+
+    def _read_offsets(self, start, stop):
+        with open(self.index_path, "rb") as f:
+            f.seek(start * _HISTORY_OFFSET.size)
+            data = f.read((stop - start) * _HISTORY_OFFSET.size)
+        return [v for (v,) in _HISTORY_OFFSET.iter_unpack(data)]
+
+    def _sync_index(self):
+        """讓索引與 JSONL 一致，回傳筆數"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        count = os.path.getsize(self.index_path) // _HISTORY_OFFSET.size if os.path.exists(self.index_path) else 0
+        if not size and not count:
+            return 0
+        # 最後一筆重新掃描（可能只寫了一半），位移超出檔案大小則整份重建
+        if count:
+            count -= 1
+            start = self._read_offsets(count, count + 1)[0]
+            if start >= size:
+                count, start = 0, 0
+        else:
+            start = 0
+        offsets = []
+        end = start
+        if size > start:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offsets.append(end)
+                    end += len(line)
+        if end < size:
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with open(self.index_path, "ab") as f:
+            f.truncate(count * _HISTORY_OFFSET.size)
+            f.write(b"".join(_HISTORY_OFFSET.pack(v) for v in offsets))
+        return count + len(offsets)
+
+    def count(self):
+        if self._count is None:
+            self._count = self._sync_index()
+        return self._count
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        if not entries:
+            return
+        total = self.count()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        offsets = []
+        with open(self.path, "ab") as f:
+            pos = f.tell()
+            for entry in entries:
+                line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                offsets.append(pos)
+                pos += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, "ab") as f:
+            f.write(b"".join(_HISTORY_OFFSET.pack(v) for v in offsets))
+            f.flush()
+            os.fsync(f.fileno())
+        self._count = total + len(entries)
+
+    def migrate_legacy(self, entries):
+        """附加舊版設定檔中的歷史；可重複呼叫，不會重複附加。
+
+        附加前先落盤記下「從第幾筆開始、共幾筆」，中途當機或之後存設定檔失敗時，
+        下次只補上還沒寫進去的部分。
+        """
+        try:
+            with open(self.migration_path, "r", encoding="utf-8") as f:
+                marker = json.load(f)
+            start, count = int(marker["start"]), int(marker["count"])
+        except FileNotFoundError:
+            start, count = self.count(), len(entries)
+            os.makedirs(os.path.dirname(self.migration_path), exist_ok=True)
+            tmp = self.migration_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"start": start, "count": count}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.migration_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return   # 搬移紀錄損毀：寧可少搬，也不重複附加
+        done = max(0, self.count() - start)
+        self.extend(list(entries)[done:count])
+
+    def read(self, start, stop):
+        """第 start ~ stop-1 筆（依完成順序）"""
+        start = max(0, start)
+        stop = min(stop, self.count())
+        if start >= stop:
+            return []
+        offsets = self._read_offsets(start, stop)
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offsets[0])
+            for _ in offsets:
+                entries.append(json.loads(f.readline().decode("utf-8")))
+        return entries
+
+    def read_page(self, page, page_size=HISTORY_PAGE_SIZE):
+        """第 page 頁（0 為最新），新的在前"""
+        stop = self.count() - page * page_size
+        return list(reversed(self.read(stop - page_size, stop)))
+
+
+# ──────────────────────────────────────
+# 專案備份（增量資料夾或單一壓縮檔，可在背景執行緒執行）
+# ──────────────────────────────────────
+BACKUP_DIRNAME = "_備份"
+BACKUP_DIRS = ("_共用文件", "_窗口A_規劃", "_窗口B_審查", "_窗口C_執行", "_共識")
+BACKUP_MANIFEST = "_backup_manifest.json"
+BACKUP_MANIFEST_VERSION = 1
+# 備份方式：設定檔 backup_mode 的值 -> 顯示名稱
+BACKUP_MODES = {
+    "incremental": "資料夾（增量，未變更的檔案用硬連結）",
+    "zip": "ZIP 壓縮檔",
+    "tar.xz": "tar.xz 壓縮檔（較小、較慢）",
+}
+ARCHIVE_INDEX_SUFFIX = ".index.json"
+ARCHIVE_INDEX_VERSION = 1
+_COPY_CHUNK = 1024 * 1024
+
+
+class BackupCancelled(Exception):
+    """使用者在狀態列按了取消"""
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_COPY_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _ProgressReader:
+    """包住來源檔：邊讀邊算 SHA-256、累計進度，並在每次讀取前檢查是否取消"""
+
+    def __init__(self, f, cancel, progress):
+        self._f = f
+        self._cancel = cancel
+        self._progress = progress
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        if self._cancel is not None and self._cancel.is_set():
+            raise BackupCancelled()
+        data = self._f.read(_COPY_CHUNK if size is None or size < 0 else min(size, _COPY_CHUNK))
+        self.sha256.update(data)
+        if self._progress is not None:
+            self._progress["done"] += len(data)
+        return data
+
+
+def _collect_backup_files(proj_root, dirs):
+    """(有備份的資料夾, [相對資料夾], [(相對路徑, 來源, stat)])；相對路徑一律用 /"""
+    backed_up, rel_dirs, files = [], [], []
+    for d in dirs:
+        src_root = os.path.join(proj_root, d)
+        if not os.path.isdir(src_root):
+            continue
+        backed_up.append(d)
+        for dirpath, _dirnames, filenames in os.walk(src_root):
+            rel_dir = os.path.relpath(dirpath, proj_root).replace(os.sep, "/")
+            rel_dirs.append(rel_dir)
+            for fn in filenames:
+                src = os.path.join(dirpath, fn)
+                files.append((f"{rel_dir}/{fn}", src, os.stat(src)))
+    return backed_up, rel_dirs, files
+
+
+def load_backup_manifest(snapshot_dir):
+    """備份資料夾的清單 {"files": {相對路徑: [size, mtime_ns, sha256]}, ...}；沒有或損壞時回傳 None"""
+    try:
+        with open(os.path.join(snapshot_dir, BACKUP_MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != BACKUP_MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def latest_backup_snapshot(proj_root):
+    """最近一份有清單的備份 (資料夾, 清單)；清單最後才寫，中斷的備份不會被當成基準"""
+    backup_root = os.path.join(proj_root, BACKUP_DIRNAME)
+    try:
+        names = sorted(os.listdir(backup_root), reverse=True)
+    except OSError:
+        return None, None
+    for name in names:
+        snapshot = os.path.join(backup_root, name)
+        if not os.path.isdir(snapshot):
+            continue
+        manifest = load_backup_manifest(snapshot)
+        if manifest is not None:
+            return snapshot, manifest
+    return None, None
+
+
+def _new_backup_path(proj_root, suffix=""):
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
+    path = os.path.join(proj_root, BACKUP_DIRNAME, timestamp + suffix)
+    n = 2
+    while os.path.exists(path) or os.path.exists(path + ".part"):
+        path = os.path.join(proj_root, BACKUP_DIRNAME, f"{timestamp}-{n}{suffix}")
+        n += 1
+    return path
+
+
+def _new_backup_result(path, backed_up, files):
+    return {"dir": path, "backed_up": backed_up, "files": len(files), "copied": 0, "linked": 0,
+            "bytes_copied": 0, "bytes_total": sum(st.st_size for _rel, _src, st in files)}
+
+
+def create_incremental_backup(proj_root, dirs=BACKUP_DIRS, cancel=None, progress=None):
+    """備份 dirs 到 _備份/時間戳。
+
+    與上一份備份的清單比對 (size, mtime)：相同就沿用舊的雜湊；內容相同的檔案以硬連結
+    指向上一份備份，只有變更的檔案真的複製。硬連結失敗（檔案系統不支援、超過連結數
+    上限等）時改為複製，該檔就成為下一次的基準。回傳統計 dict。
+
+    progress 為 {"done", "total", "file"}（位元組），供 UI 執行緒輪詢；cancel 被設定時
+    拋出 BackupCancelled 並移除這份未完成的備份。
+    """
+    backed_up, rel_dirs, files = _collect_backup_files(proj_root, dirs)
+    backup_dir = _new_backup_path(proj_root)
+    result = _new_backup_result(backup_dir, backed_up, files)
+    if not backed_up:
+        return result
+    if progress is not None:
+        progress.update(done=0, total=result["bytes_total"], file="")
+    prev_dir, prev_manifest = latest_backup_snapshot(proj_root)
+    prev_files = (prev_manifest or {}).get("files", {})
+    manifest_files = {}
+    try:
+        for rel_dir in rel_dirs:
+            os.makedirs(os.path.join(backup_dir, rel_dir), exist_ok=True)
+        for rel, src, st in files:
+            if cancel is not None and cancel.is_set():
+                raise BackupCancelled()
+            if progress is not None:
+                progress["file"] = rel
+            dst = os.path.join(backup_dir, rel)
+            prev = prev_files.get(rel)
+            if prev and prev[0] == st.st_size and prev[1] == st.st_mtime_ns:
+                digest = prev[2]
+            else:
+                digest = _file_sha256(src)
+            linked = False
+            if prev and prev[2] == digest:
+                try:
+                    os.link(os.path.join(prev_dir, rel), dst)
+                    linked = True
+                except OSError:
+                    pass
+            if linked:
+                result["linked"] += 1
+            else:
+                shutil.copy2(src, dst)
+                result["copied"] += 1
+                result["bytes_copied"] += st.st_size
+            if progress is not None:
+                progress["done"] += st.st_size
+            manifest_files[rel] = [st.st_size, st.st_mtime_ns, digest]
+        manifest = {
+            "version": BACKUP_MANIFEST_VERSION,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "base": os.path.basename(prev_dir) if prev_dir else "",
+            "dirs": backed_up,
+            "files": manifest_files,
+        }
+        # 清單最後寫入：有清單才代表這份備份完整
+        temp = os.path.join(backup_dir, BACKUP_MANIFEST + ".tmp")
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp, os.path.join(backup_dir, BACKUP_MANIFEST))
+    except BaseException:
+        # 半成品不會被當成基準，但仍佔空間，直接移除（硬連結只是少一個連結）
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        raise
+    return result
+
+
+def create_archive_backup(proj_root, fmt, dirs=BACKUP_DIRS, cancel=None, progress=None):
+    """把 dirs 串流寫進單一壓縮檔 _備份/時間戳.zip 或 .tar.xz，並寫出索引檔（見 read_archive_index）。
+
+    先寫到 .part，完成後才改名；取消或失敗時刪除。progress / cancel 同 create_incremental_backup。
+    """
+    import tarfile
+    import zipfile
+    backed_up, rel_dirs, files = _collect_backup_files(proj_root, dirs)
+    archive = _new_backup_path(proj_root, "." + fmt)
+    result = _new_backup_result(archive, backed_up, files)
+    if not backed_up:
+        return result
+    if progress is not None:
+        progress.update(done=0, total=result["bytes_total"], file="")
+    os.makedirs(os.path.dirname(archive), exist_ok=True)
+    part = archive + ".part"
+    index = []
+    try:
+        if fmt == "zip":
+            with zipfile.ZipFile(part, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                for rel_dir in rel_dirs:
+                    zf.writestr(zipfile.ZipInfo(rel_dir + "/"), b"")
+                for rel, src, st in files:
+                    if progress is not None:
+                        progress["file"] = rel
+                    info = zipfile.ZipInfo.from_file(src, rel)
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    with open(src, "rb") as f, zf.open(info, "w", force_zip64=st.st_size > 2 ** 31) as out:
+                        reader = _ProgressReader(f, cancel, progress)
+                        shutil.copyfileobj(reader, out, _COPY_CHUNK)
+                    # 本機檔頭位置：取出時直接跳過去
+                    index.append({"path": rel, "size": st.st_size, "mtime": st.st_mtime,
+                                  "sha256": reader.sha256.hexdigest(), "offset": info.header_offset})
+        elif fmt == "tar.xz":
+            with tarfile.open(part, "w:xz", preset=6) as tar:
+                for rel_dir in rel_dirs:
+                    tar.add(os.path.join(proj_root, rel_dir), arcname=rel_dir, recursive=False)
+                for rel, src, st in files:
+                    if progress is not None:
+                        progress["file"] = rel
+                    info = tar.gettarinfo(src, arcname=rel)
+                    with open(src, "rb") as f:
+                        reader = _ProgressReader(f, cancel, progress)
+                        tar.addfile(info, reader)
+                    # 未壓縮 tar 串流中的內容位置（addfile 之後 offset 停在 512 位元組對齊的資料結尾）
+                    data_blocks = (info.size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE
+                    index.append({"path": rel, "size": info.size, "mtime": st.st_mtime,
+                                  "sha256": reader.sha256.hexdigest(),
+                                  "offset": tar.offset - data_blocks * tarfile.BLOCKSIZE})
+        else:
+            raise ValueError(f"不支援的封存格式：{fmt}")
+        os.replace(part, archive)
+        result["copied"] = len(files)
+        result["bytes_copied"] = os.path.getsize(archive)
+        with open(archive + ARCHIVE_INDEX_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump({"version": ARCHIVE_INDEX_VERSION, "format": fmt,
+                       "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                       "dirs": backed_up, "files": index}, f, ensure_ascii=False)
+    except BaseException:
+        for path in (part, archive):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+    return result
+
+
+def read_archive_index(archive):
+    """壓縮檔旁的索引 {"format", "files": [{"path", "size", "mtime", "sha256", "offset"}]}；沒有時回傳 None"""
+    try:
+        with open(archive + ARCHIVE_INDEX_SUFFIX, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != ARCHIVE_INDEX_VERSION:
+        return None
+    return data
+
+
+def extract_archive_member(archive, rel, dest_dir):
+    """從壓縮檔取出單一檔案到 dest_dir 下的相同相對路徑（例如 dest_dir/src/a/main.c），
+    回傳寫出的路徑；含 ..、絕對路徑或磁碟代號的項目一律拒絕。
+
+    zip 經由中央目錄直接讀取該檔；tar.xz 無法隨機存取，會解壓到索引記錄的位置為止，
+    但只讀不寫，也不必解析其他檔頭。取出的內容以索引中的 SHA-256 驗證。
+    """
+    import lzma
+    import zipfile
+    data = read_archive_index(archive)
+    entry = next((e for e in (data or {}).get("files", []) if e["path"] == rel), None)
+    if entry is None:
+        raise KeyError(f"索引中沒有這個檔案：{rel}")
+    parts = rel.replace("\\", "/").split("/")
+    if rel.startswith(("/", "\\")) or ":" in parts[0] or any(p in ("", ".", "..") for p in parts):
+        raise ValueError(f"不安全的檔案路徑：{rel}")
+    dest = os.path.join(dest_dir, *parts)
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    h = hashlib.sha256()
+    zf = None
+    if data["format"] == "zip":
+        zf = zipfile.ZipFile(archive)
+        src = zf.open(rel)
+    else:
+        src = lzma.open(archive, "rb")
+        src.seek(entry["offset"])
+    try:
+        with open(dest + ".part", "wb") as out:
+            remaining = entry["size"]
+            while remaining > 0:
+                chunk = src.read(min(_COPY_CHUNK, remaining))
+                if not chunk:
+                    break
+                h.update(chunk)
+                out.write(chunk)
+                remaining -= len(chunk)
+    finally:
+        src.close()
+        if zf is not None:
+            zf.close()
+    if h.hexdigest() != entry["sha256"]:
+        os.remove(dest + ".part")
+        raise ValueError(f"取出的內容與索引不符：{rel}")
+    os.replace(dest + ".part", dest)
+    return dest
+
+
+def run_backup(proj_root, mode, cancel=None, progress=None):
+    """依 BACKUP_MODES 的方式備份（在背景執行緒呼叫）"""
+    with PERF.measure("backup_project"):
+        if mode in ("zip", "tar.xz"):
+            return create_archive_backup(proj_root, mode, cancel=cancel, progress=progress)
+        return create_incremental_backup(proj_root, cancel=cancel, progress=progress)
+
+
+def _format_size(num):
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024 or unit == "GB":
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
+
+
+# 保留規則：設定檔 backup_retention；enabled 為 False 時不自動清除
+DEFAULT_BACKUP_RETENTION = {
+    "enabled": False,
+    "keep_last": 10,      # 最近幾份一定保留
+    "keep_daily": 7,      # 另外每天保留當天最後一份，共幾天
+    "keep_weekly": 8,     # 另外每週保留該週最後一份，共幾週
+    "max_total_mb": 0,    # 全部備份的空間上限（0 = 不限制）；超過時從最舊的開始刪
+}
+_BACKUP_NAME_TIME_FORMAT = "%Y-%m-%d_%H%M"
+
+
+def backup_retention_policy(cfg):
+    policy = dict(DEFAULT_BACKUP_RETENTION)
+    saved = cfg.get("backup_retention")
+    if isinstance(saved, dict):
+        policy.update({k: saved[k] for k in DEFAULT_BACKUP_RETENTION if k in saved})
+    return policy
+
+
+def _backup_inodes(path):
+    """{(st_dev, st_ino): (size, nlink)}；資料夾備份的硬連結檔案只算一次"""
+    inodes = {}
+    if os.path.isdir(path):
+        for dirpath, _dirnames, filenames in os.walk(path):
+            for fn in filenames:
+                try:
+                    st = os.lstat(os.path.join(dirpath, fn))
+                except OSError:
+                    continue
+                inodes[(st.st_dev, st.st_ino)] = (st.st_size, st.st_nlink)
+    else:
+        for p in (path, path + ARCHIVE_INDEX_SUFFIX):
+            try:
+                st = os.lstat(p)
+            except OSError:
+                continue
+            inodes[(st.st_dev, st.st_ino)] = (st.st_size, st.st_nlink)
+    return inodes
+
+
+def list_backups(proj_root):
+    """_備份 內的每一份備份（新的在前）：{"name", "path", "kind", "created", "inodes"}；略過寫到一半的 .part"""
+    backup_root = os.path.join(proj_root, BACKUP_DIRNAME)
+    try:
+        names = os.listdir(backup_root)
+    except OSError:
+        return []
+    backups = []
+    for name in names:
+        path = os.path.join(backup_root, name)
+        if name.endswith(".part") or name.endswith(ARCHIVE_INDEX_SUFFIX):
+            continue
+        if os.path.isdir(path):
+            kind = "dir"
+            stem = name
+        elif name.endswith((".zip", ".tar.xz")):
+            kind = "tar.xz" if name.endswith(".tar.xz") else "zip"
+            stem = name[:-len("." + kind)]
+        else:
+            continue
+        try:
+            # 同一分鐘的第二份以上會加上 -2、-3…
+            created = datetime.strptime(stem[:15], _BACKUP_NAME_TIME_FORMAT)
+        except ValueError:
+            created = datetime.fromtimestamp(os.path.getmtime(path))
+        backups.append({"name": name, "path": path, "kind": kind, "created": created,
+                        "inodes": _backup_inodes(path)})
+    backups.sort(key=lambda b: (b["created"], b["name"]), reverse=True)
+    return backups
+
+
+def _disk_usage(backups):
+    seen = {}
+    for b in backups:
+        seen.update(b["inodes"])
+    return sum(size for size, _nlink in seen.values())
+
+
+def plan_backup_retention(proj_root, policy, backups=None):
+    """依保留規則算出要刪除的備份（不刪任何東西）。
+
+    回傳 {"keep": [(備份, 原因)], "remove": [(備份, 原因)], "total_bytes", "reclaim_bytes"}。
+    最新的一份一律保留；刪除資料夾備份時，只有沒有被其他備份硬連結共用的檔案才會真的釋放空間。
+    """
+    if backups is None:
+        backups = list_backups(proj_root)
+    reasons = {}
+    for b in backups[:max(1, int(policy.get("keep_last", 0)))]:
+        reasons.setdefault(b["name"], "最近")
+    for label, key, count in (("每日", lambda d: d.date(), int(policy.get("keep_daily", 0))),
+                              ("每週", lambda d: d.isocalendar()[:2], int(policy.get("keep_weekly", 0)))):
+        periods = set()
+        for b in backups:
+            period = key(b["created"])
+            if period in periods:
+                continue
+            if len(periods) >= count:
+                break
+            periods.add(period)
+            reasons.setdefault(b["name"], label)
+    kept = [b for b in backups if b["name"] in reasons]
+    removed = [(b, "超出保留規則") for b in backups if b["name"] not in reasons]
+
+    budget = int(float(policy.get("max_total_mb", 0) or 0) * 1024 * 1024)
+    while budget and len(kept) > 1 and _disk_usage(kept) > budget:
+        oldest = kept.pop()
+        removed.append((oldest, f"超過空間上限（原為{reasons[oldest['name']]}）"))
+
+    total = _disk_usage(backups)
+    return {
+        "keep": [(b, reasons[b["name"]]) for b in kept],
+        "remove": removed,
+        "total_bytes": total,
+        "reclaim_bytes": total - _disk_usage(kept),
+    }
+
+
+def apply_backup_retention(plan, cancel=None):
+    """刪除 plan["remove"] 的備份，回傳實際刪除的份數"""
+    removed = 0
+    for b, _reason in plan["remove"]:
+        if cancel is not None and cancel.is_set():
+            break
+        if b["kind"] == "dir":
+            shutil.rmtree(b["path"], ignore_errors=True)
+        else:
+            for p in (b["path"], b["path"] + ARCHIVE_INDEX_SUFFIX):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+        if not os.path.exists(b["path"]):
+            removed += 1
+    return removed
+
+
+def format_retention_report(plan):
+    lines = [f"目前備份共 {len(plan['keep']) + len(plan['remove'])} 份，佔用 {_format_size(plan['total_bytes'])}",
+             f"將刪除 {len(plan['remove'])} 份，可釋放 {_format_size(plan['reclaim_bytes'])}", ""]
+    if plan["remove"]:
+        lines.append("【將刪除】")
+        lines += [f"  {b['name']}　{reason}" for b, reason in plan["remove"]]
+        lines.append("")
+    lines.append("【保留】")
+    lines += [f"  {b['name']}　{reason}" for b, reason in plan["keep"]]
+    return "\n".join(lines)
+
+
 # ──────────────────────────────────────
 # 鐵律（自動帶入所有開場指令）
 # ──────────────────────────────────────
@@ -544,6 +1230,8 @@ class App:
         self.project_type_var = tk.StringVar(value="其他")
         self.round_type_var = tk.StringVar(value="功能新增")
         self._generated_init_prompt = ""  # 暫存預覽用的初始化指令
+        self._histories = {}  # 專案資料夾 -> RoundHistory
+        self._backup_job = None  # 進行中的背景備份（見 _backup_project）
 
         # Build UI
         self._build_top_bar()
@@ -554,6 +1242,10 @@ class App:
         if self.current_project and self.current_project in self.cfg.get("projects", {}):
             self._on_project_selected()
 
+        # 隱藏的效能診斷視窗
+        self.root.bind("<Control-Shift-D>", lambda e: self._show_perf_dialog())
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
     # ── Windows Dark Titlebar ──
     @staticmethod
     def _set_dark_titlebar(theme_name):
@@ -796,9 +1488,16 @@ class App:
     # ── Status Bar ──
     def _build_status_bar(self):
         self.status_var = tk.StringVar(value="就緒")
-        bar = ttkb.Label(self.root, textvariable=self.status_var,
-                         font=("", 9), bootstyle="inverse-dark", padding=(8, 4))
+        bar = ttkb.Frame(self.root, bootstyle="dark")
         bar.pack(fill=X, side=BOTTOM)
+        # 背景備份時才顯示的進度條與取消鈕
+        self.backup_cancel_btn = ttkb.Button(bar, text="取消備份", bootstyle="danger",
+                                             padding=(6, 0), command=self._cancel_backup)
+        self.backup_progress = ttkb.Progressbar(bar, length=160, maximum=100,
+                                                bootstyle="success-striped")
+        self.status_label = ttkb.Label(bar, textvariable=self.status_var,
+                                       font=("", 9), bootstyle="inverse-dark", padding=(8, 4))
+        self.status_label.pack(side=LEFT, fill=X, expand=True)
 
     # ══════════════════════════════════
     # Tab 1：初始設定
@@ -1530,25 +2229,35 @@ class App:
     def _round_complete(self):
         proj = self._get_project()
         if proj:
-            old_round = proj.get("current_round", 1)
-            # 存歷史紀錄
-            history = proj.setdefault("round_history", [])
-            history.append({
-                "round": old_round,
-                "requirement": getattr(self, 'current_req', '（無記錄）'),
-                "round_type": self.round_type_var.get(),
-                "mode": "快速" if self.is_quick_mode.get() else "完整",
-                "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            })
-            proj["current_round"] = old_round + 1
-            self.cfg["projects"][self.current_project] = proj
-            save_config(self.cfg)
-            self._update_project_state_file()
-            # 自動備份
-            self._backup_project(silent=True)
+            # 只計算存檔與備份，不含下方的完成提示視窗
+            with PERF.measure("round_complete"):
+                old_round = proj.get("current_round", 1)
+                # 存歷史紀錄（附加到專案資料夾的 JSONL，設定檔不再隨輪數變大）
+                entry = {
+                    "round": old_round,
+                    "requirement": getattr(self, 'current_req', '（無記錄）'),
+                    "round_type": self.round_type_var.get(),
+                    "mode": "快速" if self.is_quick_mode.get() else "完整",
+                    "completed_at": datetime.now().strftime("%Y-%m-%d %H:%M"),
+                }
+                try:
+                    history = self._project_history(proj)
+                    if history is not None:
+                        history.append(entry)
+                except OSError:
+                    history = None
+                if history is None:
+                    # 專案資料夾無法寫入：先留在設定檔，下次再搬
+                    proj.setdefault("round_history", []).append(entry)
+                proj["current_round"] = old_round + 1
+                self.cfg["projects"][self.current_project] = proj
+                save_config(self.cfg)
+                self._update_project_state_file()
+                # 自動備份（背景執行，進度顯示在狀態列）
+                self._backup_project(silent=True)
 
         messagebox.showinfo("完成",
-            f"本輪（第 {old_round} 輪）完成！已自動備份。\n"
+            f"本輪（第 {old_round} 輪）完成！已開始自動備份（進度見下方狀態列）。\n"
             f"下一輪：第 {proj.get('current_round', 2)} 輪")
         self._build_work_step1()
         self._update_round_display()
@@ -1574,9 +2283,30 @@ class App:
             return self.cfg["projects"][self.current_project]
         return None
 
+    def _project_history(self, proj):
+        """專案的輪次歷史；舊版放在設定檔 round_history 的紀錄會在這裡搬到專案資料夾"""
+        folder = proj.get("folder", "")
+        if not folder or not os.path.isdir(folder):
+            return None
+        history = self._histories.get(folder)
+        if history is None:
+            history = self._histories[folder] = RoundHistory(folder)
+        if "round_history" in proj:
+            history.migrate_legacy(proj["round_history"])
+            del proj["round_history"]
+            save_config(self.cfg)
+        return history
+
+    @perf_timed("project_selected")
     def _on_project_selected(self):
         self.current_project = self.project_var.get()
         self.cfg["last_project"] = self.current_project
+        proj = self._get_project()
+        if proj and "round_history" in proj:
+            try:
+                self._project_history(proj)
+            except OSError:
+                pass
         save_config(self.cfg)
         self._update_cli_command()
         self._update_round_display()
@@ -2009,10 +2739,16 @@ class App:
         if not proj:
             messagebox.showinfo("提示", "請先選擇專案")
             return
-        history = proj.get("round_history", [])
-        if not history:
+        try:
+            history = self._project_history(proj)
+            total = history.count() if history is not None else 0
+        except OSError as e:
+            messagebox.showerror("錯誤", f"無法讀取歷史紀錄：\n{e}")
+            return
+        if not total:
             messagebox.showinfo("歷史紀錄", "目前沒有任何輪次紀錄。\n完成一輪工作後就會自動記錄。")
             return
+        pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
 
         dlg = tk.Toplevel(self.root)
         dlg.title(f"歷史紀錄 — {self.current_project}")
@@ -2024,36 +2760,137 @@ class App:
         pad = ttkb.Frame(dlg, padding=12)
         pad.pack(fill=BOTH, expand=True)
 
-        ttkb.Label(pad, text=f"專案「{self.current_project}」的輪次紀錄",
+        ttkb.Label(pad, text=f"專案「{self.current_project}」的輪次紀錄（共 {total} 輪）",
                    font=("", 13, "bold")).pack(anchor=W, pady=(0, 8))
 
+        # 按鈕列先 pack，視窗縮小時才不會被文字區擠掉
+        btns = ttkb.Frame(pad)
+        btns.pack(side=BOTTOM, fill=X, pady=(8, 0))
+
         text = tk.Text(pad, wrap=tk.WORD, font=("Consolas" if IS_WIN else "Menlo", 10))
         scrollbar = ttkb.Scrollbar(pad, command=text.yview)
         text.config(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=RIGHT, fill=Y)
         text.pack(fill=BOTH, expand=True)
 
-        for h in reversed(history):
-            req_preview = h.get("requirement", "")[:200]
-            if len(h.get("requirement", "")) > 200:
-                req_preview += "..."
-            text.insert(tk.END,
-                f"第 {h.get('round', '?')} 輪 — {h.get('completed_at', '?')}\n"
-                f"  類型：{h.get('round_type', '?')}  |  模式：{h.get('mode', '?')}\n"
-                f"  需求：{req_preview}\n"
-                f"{'─' * 50}\n"
-            )
-        text.config(state=tk.DISABLED)
+        page_var = tk.StringVar()
+        current = {"page": 0}
 
-        ttkb.Button(pad, text="關閉", bootstyle="secondary",
-                    command=dlg.destroy).pack(anchor=E, pady=(8, 0))
+        def show(page):
+            # 每次只讀一頁（HISTORY_PAGE_SIZE 輪），新的在前
+            try:
+                entries = history.read_page(page)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("錯誤", f"無法讀取歷史紀錄：\n{e}", parent=dlg)
+                return
+            current["page"] = page
+            text.config(state=tk.NORMAL)
+            text.delete("1.0", tk.END)
+            for h in entries:
+                req_preview = h.get("requirement", "")[:200]
+                if len(h.get("requirement", "")) > 200:
+                    req_preview += "..."
+                text.insert(tk.END,
+                    f"第 {h.get('round', '?')} 輪 — {h.get('completed_at', '?')}\n"
+                    f"  類型：{h.get('round_type', '?')}  |  模式：{h.get('mode', '?')}\n"
+                    f"  需求：{req_preview}\n"
+                    f"{'─' * 50}\n"
+                )
+            text.config(state=tk.DISABLED)
+            text.yview_moveto(0)
+            page_var.set(f"第 {page + 1} / {pages} 頁")
+            btn_newer.config(state=tk.NORMAL if page > 0 else tk.DISABLED)
+            btn_older.config(state=tk.NORMAL if page < pages - 1 else tk.DISABLED)
+
+        ttkb.Button(btns, text="關閉", bootstyle="secondary",
+                    command=dlg.destroy).pack(side=RIGHT)
+        btn_newer = ttkb.Button(btns, text="◀ 較新", bootstyle="secondary-outline",
+                                command=lambda: show(current["page"] - 1))
+        btn_newer.pack(side=LEFT)
+        ttkb.Label(btns, textvariable=page_var).pack(side=LEFT, padx=8)
+        btn_older = ttkb.Button(btns, text="較舊 ▶", bootstyle="secondary-outline",
+                                command=lambda: show(current["page"] + 1))
+        btn_older.pack(side=LEFT)
+        show(0)
+
+    def _history_count(self):
+        proj = self._get_project()
+        if not proj:
+            return 0
+        try:
+            history = self._project_history(proj)
+            return history.count() if history is not None else len(proj.get("round_history", []))
+        except OSError:
+            return len(proj.get("round_history", []))
+
+    # ══════════════════════════════════
+    # 效能診斷（Ctrl+Shift+D）
+    # ══════════════════════════════════
+    def _show_perf_dialog(self):
+        dlg = tk.Toplevel(self.root)
+        dlg.title("效能診斷")
+        dlg.transient(self.root)
+        self._center_dialog(dlg, 600, 340)
+        dlg.bind("<Escape>", lambda e: dlg.destroy())
+
+        pad = ttkb.Frame(dlg, padding=12)
+        pad.pack(fill=BOTH, expand=True)
+        cols = ("count", "p50", "p95", "max", "mean")
+        tree = ttkb.Treeview(pad, columns=cols, show="tree headings", selectmode="none", height=8)
+        tree.heading("#0", text="操作")
+        tree.column("#0", width=170)
+        for col, title in zip(cols, ("次數", "p50 (ms)", "p95 (ms)", "最大 (ms)", "平均 (ms)")):
+            tree.heading(col, text=title)
+            tree.column(col, width=75, anchor=E)
+        tree.pack(fill=BOTH, expand=True)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for name, st in PERF.snapshot().items():
+                tree.insert("", tk.END, text=name, values=(
+                    st["count"], f"{st['p50_ms']:.1f}", f"{st['p95_ms']:.1f}",
+                    f"{st['max_ms']:.1f}", f"{st['mean_ms']:.1f}"))
+
+        def reset():
+            PERF.reset()
+            refresh()
+
+        def export():
+            path = filedialog.asksaveasfilename(
+                parent=dlg, initialdir=DESKTOP, defaultextension=".json",
+                initialfile=f"AI流程控制器_效能紀錄_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json",
+                filetypes=[("JSON", "*.json")])
+            if not path:
+                return
+            data = {"exported_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "recording_since": PERF.started_at, "window": PERF_WINDOW,
+                    "python": sys.version.split()[0], "platform": sys.platform,
+                    "projects": len(self.cfg.get("projects", {})),
+                    "history_rounds": self._history_count(),
+                    "operations": PERF.snapshot()}
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            except OSError as e:
+                messagebox.showerror("錯誤", f"匯出失敗：\n{e}", parent=dlg)
+                return
+            self.status_var.set(f"效能紀錄已匯出：{path}")
+
+        btns = ttkb.Frame(pad)
+        btns.pack(fill=X, pady=(8, 0))
+        ttkb.Button(btns, text="匯出 JSON", bootstyle="primary", command=export).pack(side=RIGHT)
+        ttkb.Button(btns, text="重設", bootstyle="secondary-outline",
+                    command=reset).pack(side=RIGHT, padx=(0, 6))
+        ttkb.Button(btns, text="重新整理", bootstyle="secondary-outline",
+                    command=refresh).pack(side=RIGHT, padx=(0, 6))
+        ttkb.Label(btns, text=f"自 {PERF.started_at} 起記錄", font=("", 9)).pack(side=LEFT)
+        refresh()
 
     # ══════════════════════════════════
     # 備份功能
     # ══════════════════════════════════
     def _backup_project(self, silent=False):
-        """備份專案的文件（_共用文件、_窗口A_規劃、_窗口B_審查、_窗口C_執行、_共識）"""
-        import shutil
+        """在背景執行緒備份專案的文件（_共用文件、_窗口A_規劃、_窗口B_審查、_窗口C_執行、_共識）"""
         proj = self._get_project()
         if not proj:
             if not silent:
@@ -2066,27 +2903,255 @@ class App:
                 messagebox.showwarning("錯誤", f"專案路徑不存在：{proj_root}")
             return
 
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
-        backup_dir = os.path.join(proj_root, "_備份", timestamp)
-        dirs_to_backup = ["_共用文件", "_窗口A_規劃", "_窗口B_審查", "_窗口C_執行", "_共識"]
-        backed_up = []
+        if self._backup_job is not None:
+            # 增量備份下次仍會補上這段期間的變更，不排隊
+            if not silent:
+                messagebox.showinfo("提示", "上一個備份還在進行中，請稍候。")
+            self.status_var.set("上一個備份尚未完成，略過本次備份")
+            return
+
+        mode = self.cfg.get("backup_mode", "incremental")
+        policy = backup_retention_policy(self.cfg)
+        job = {"cancel": threading.Event(), "progress": {"done": 0, "total": 0, "file": ""},
+               "silent": silent, "result": None, "error": None, "pruned": None}
 
-        for d in dirs_to_backup:
-            src = os.path.join(proj_root, d)
-            if os.path.isdir(src):
-                dst = os.path.join(backup_dir, d)
-                shutil.copytree(src, dst)
-                backed_up.append(d)
+        def work():
+            try:
+                job["result"] = run_backup(proj_root, mode, job["cancel"], job["progress"])
+            except BaseException as e:
+                job["error"] = e
+                return
+            if not policy["enabled"]:
+                return
+            # 備份成功後依保留規則清除舊備份；失敗只記在狀態列，不影響這次備份
+            try:
+                job["progress"]["file"] = "清除舊備份…"
+                with PERF.measure("prune_backups"):
+                    plan = plan_backup_retention(proj_root, policy)
+                    job["pruned"] = (apply_backup_retention(plan, job["cancel"]), plan["reclaim_bytes"])
+            except OSError as e:
+                job["pruned"] = e
+
+        job["thread"] = threading.Thread(target=work, name="project-backup", daemon=True)
+        self._backup_job = job
+        self.backup_progress.config(value=0)
+        self.backup_cancel_btn.pack(side=RIGHT, padx=(0, 6), pady=2, before=self.status_label)
+        self.backup_progress.pack(side=RIGHT, padx=6, before=self.status_label)
+        self.status_var.set("備份中…")
+        job["thread"].start()
+        self.root.after(100, self._poll_backup)
+
+    def _poll_backup(self):
+        job = self._backup_job
+        if job is None:
+            return
+        progress = job["progress"]
+        if job["thread"].is_alive():
+            pct = progress["done"] * 100 / progress["total"] if progress["total"] else 0
+            self.backup_progress.config(value=pct)
+            self.status_var.set(f"備份中… {pct:.0f}%  {progress['file']}")
+            self.root.after(100, self._poll_backup)
+            return
 
-        if backed_up:
+        self._backup_job = None
+        self.backup_progress.pack_forget()
+        self.backup_cancel_btn.pack_forget()
+        silent = job["silent"]
+        error = job["error"]
+        if isinstance(error, BackupCancelled):
+            self.status_var.set("備份已取消")
+            return
+        if error is not None:
             if not silent:
-                messagebox.showinfo("備份完成",
-                    f"已備份到：\n{backup_dir}\n\n"
-                    f"備份內容：\n" + "\n".join(f"  {d}" for d in backed_up))
-            self.status_var.set(f"備份完成：{timestamp}")
-        else:
+                messagebox.showerror("錯誤", f"備份失敗：\n{error}")
+            self.status_var.set(f"備份失敗：{error}")
+            return
+
+        result = job["result"]
+        backed_up = result["backed_up"]
+        if not backed_up:
             if not silent:
                 messagebox.showinfo("提示", "沒有找到可備份的資料夾")
+            return
+        if os.path.isdir(result["dir"]):
+            summary = (f"新複製 {result['copied']} 個檔案（{_format_size(result['bytes_copied'])}），"
+                       f"沿用上次備份 {result['linked']} 個")
+        else:
+            summary = (f"{result['files']} 個檔案，{_format_size(result['bytes_total'])} "
+                       f"壓縮為 {_format_size(result['bytes_copied'])}")
+        pruned = job["pruned"]
+        if isinstance(pruned, OSError):
+            summary += f"；清除舊備份失敗：{pruned}"
+        elif pruned and pruned[0]:
+            summary += f"；已清除 {pruned[0]} 份舊備份（釋放 {_format_size(pruned[1])}）"
+        if not silent:
+            messagebox.showinfo("備份完成",
+                f"已備份到：\n{result['dir']}\n\n"
+                f"備份內容：\n" + "\n".join(f"  {d}" for d in backed_up) + f"\n\n{summary}")
+        self.status_var.set(f"備份完成：{os.path.basename(result['dir'])}（{summary}）")
+
+    def _cancel_backup(self):
+        if self._backup_job is not None:
+            self._backup_job["cancel"].set()
+            self.status_var.set("正在取消備份…")
+
+    def _extract_from_archive_dialog(self, parent):
+        """從壓縮檔備份取出單一檔案（依 .index.json 索引，不解開整個壓縮檔）"""
+        proj = self._get_project()
+        initial = os.path.join(proj.get("folder", ""), BACKUP_DIRNAME) if proj else DESKTOP
+        archive = filedialog.askopenfilename(
+            parent=parent, initialdir=initial if os.path.isdir(initial) else DESKTOP,
+            filetypes=[("備份壓縮檔", "*.zip *.tar.xz")])
+        if not archive:
+            return
+        index = read_archive_index(archive)
+        if index is None:
+            messagebox.showerror("錯誤", "找不到這個壓縮檔的索引檔（.index.json）。", parent=parent)
+            return
+
+        dlg = tk.Toplevel(parent)
+        dlg.title(f"取出檔案 — {os.path.basename(archive)}")
+        dlg.transient(parent)
+        dlg.grab_set()
+        self._center_dialog(dlg, 560, 420)
+        dlg.bind("<Escape>", lambda e: dlg.destroy())
+        pad = ttkb.Frame(dlg, padding=12)
+        pad.pack(fill=BOTH, expand=True)
+        ttkb.Label(pad, text=f"建立於 {index.get('created_at', '?')}，共 {len(index['files'])} 個檔案",
+                   font=("", 10)).pack(anchor=W, pady=(0, 6))
+        btns = ttkb.Frame(pad)
+        btns.pack(side=BOTTOM, fill=X, pady=(8, 0))
+        listbox = tk.Listbox(pad, selectmode=tk.EXTENDED)
+        scrollbar = ttkb.Scrollbar(pad, command=listbox.yview)
+        listbox.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        listbox.pack(fill=BOTH, expand=True)
+        paths = [e["path"] for e in index["files"]]
+        for path in paths:
+            listbox.insert(tk.END, path)
+
+        def extract():
+            sel = listbox.curselection()
+            if not sel:
+                messagebox.showinfo("提示", "請先選擇要取出的檔案", parent=dlg)
+                return
+            dest = filedialog.askdirectory(parent=dlg, initialdir=DESKTOP)
+            if not dest:
+                return
+            try:
+                for i in sel:
+                    extract_archive_member(archive, paths[i], dest)
+            except (OSError, KeyError, ValueError) as e:
+                messagebox.showerror("錯誤", f"取出失敗：\n{e}", parent=dlg)
+                return
+            messagebox.showinfo("完成", f"已取出 {len(sel)} 個檔案到：\n{dest}\n（保留原本的資料夾結構）",
+                                parent=dlg)
+
+        ttkb.Button(btns, text="關閉", bootstyle="secondary", command=dlg.destroy).pack(side=RIGHT)
+        ttkb.Button(btns, text="取出選取的檔案", bootstyle="primary",
+                    command=extract).pack(side=RIGHT, padx=(0, 6))
+
+    def _retention_dialog(self, parent):
+        """備份保留規則；「預覽」只列出會刪除哪些備份與可釋放的空間，不會刪檔"""
+        policy = backup_retention_policy(self.cfg)
+        dlg = tk.Toplevel(parent)
+        dlg.title("備份保留規則")
+        dlg.transient(parent)
+        dlg.grab_set()
+        self._center_dialog(dlg, 560, 520)
+        dlg.bind("<Escape>", lambda e: dlg.destroy())
+        pad = ttkb.Frame(dlg, padding=12)
+        pad.pack(fill=BOTH, expand=True)
+
+        enabled_var = tk.BooleanVar(value=bool(policy["enabled"]))
+        ttkb.Checkbutton(pad, text="每次備份完成後自動清除舊備份", variable=enabled_var,
+                         bootstyle="round-toggle").pack(anchor=W, pady=(0, 8))
+        fields = (("keep_last", "保留最近幾份："), ("keep_daily", "每天一份，保留幾天："),
+                  ("keep_weekly", "每週一份，保留幾週："), ("max_total_mb", "空間上限（MB，0 = 不限）："))
+        vars_ = {}
+        for key, label in fields:
+            row = ttkb.Frame(pad)
+            row.pack(fill=X, pady=2)
+            ttkb.Label(row, text=label, width=24).pack(side=LEFT)
+            vars_[key] = tk.StringVar(value=str(policy[key]))
+            ttkb.Entry(row, textvariable=vars_[key], width=10).pack(side=LEFT)
+        ttkb.Label(pad, text="（三種保留條件取聯集；最新的一份一律保留）",
+                   bootstyle="secondary", font=("", 9)).pack(anchor=W, pady=(2, 6))
+
+        btns = ttkb.Frame(pad)
+        btns.pack(side=BOTTOM, fill=X, pady=(8, 0))
+        report = tk.Text(pad, wrap=tk.NONE, height=12, font=("Consolas" if IS_WIN else "Menlo", 10))
+        report.pack(fill=BOTH, expand=True)
+        report.insert("1.0", "按「預覽」查看依目前規則會刪除哪些備份。")
+        report.config(state=tk.DISABLED)
+
+        def read_policy():
+            new = {"enabled": enabled_var.get()}
+            try:
+                for key, _label in fields:
+                    value = float(vars_[key].get().strip() or 0)
+                    if value < 0:
+                        raise ValueError
+                    new[key] = value if key == "max_total_mb" else int(value)
+            except ValueError:
+                messagebox.showwarning("提示", "請輸入 0 以上的數字", parent=dlg)
+                return None
+            return new
+
+        def show_report(text):
+            if not dlg.winfo_exists():
+                return
+            report.config(state=tk.NORMAL)
+            report.delete("1.0", tk.END)
+            report.insert("1.0", text)
+            report.config(state=tk.DISABLED)
+
+        def preview():
+            new = read_policy()
+            proj = self._get_project()
+            if new is None or not proj:
+                return
+            show_report("計算中…")
+            state = {}
+
+            def work():
+                try:
+                    state["text"] = format_retention_report(plan_backup_retention(proj.get("folder", ""), new))
+                except OSError as e:
+                    state["text"] = f"無法讀取備份資料夾：{e}"
+
+            def poll():
+                if worker.is_alive():
+                    dlg.after(100, poll)
+                else:
+                    show_report(state["text"])
+
+            # 掃描所有備份的檔案可能要一段時間，放到背景
+            worker = threading.Thread(target=work, name="retention-preview", daemon=True)
+            worker.start()
+            poll()
+
+        def save():
+            new = read_policy()
+            if new is None:
+                return
+            self.cfg["backup_retention"] = new
+            save_config(self.cfg)
+            dlg.destroy()
+
+        ttkb.Button(btns, text="儲存", bootstyle="success", command=save).pack(side=RIGHT)
+        ttkb.Button(btns, text="預覽（不刪檔）", bootstyle="info-outline",
+                    command=preview).pack(side=RIGHT, padx=(0, 6))
+        ttkb.Button(btns, text="取消", bootstyle="secondary", command=dlg.destroy).pack(side=LEFT)
+
+    def _on_close(self):
+        job = self._backup_job
+        if job is not None:
+            if not messagebox.askyesno("備份進行中", "備份尚未完成。要取消備份並關閉程式嗎？"):
+                return
+            job["cancel"].set()
+            job["thread"].join(timeout=10)
+        self.root.destroy()
 
     # ══════════════════════════════════
     # 新建專案對話框（從頂部 bar 觸發）
@@ -2102,7 +3167,7 @@ class App:
         dlg.title("設定")
         dlg.transient(self.root)
         dlg.grab_set()
-        self._center_dialog(dlg, 580, 480)
+        self._center_dialog(dlg, 580, 520)
         dlg.bind("<Escape>", lambda e: dlg.destroy())
 
         pad = ttkb.Frame(dlg, padding=16)
@@ -2129,6 +3194,16 @@ class App:
         ttkb.Label(pad, text="（這段文字會自動帶入所有角色的開場指令，告訴 AI 每次回覆結尾要做什麼）",
                    bootstyle="secondary", font=("", 9)).pack(anchor=W, pady=(0, 4))
 
+        # 備份方式
+        row_backup = ttkb.Frame(pad)
+        row_backup.pack(fill=X, pady=4)
+        ttkb.Label(row_backup, text="備份方式：", width=14).pack(side=LEFT)
+        backup_labels = list(BACKUP_MODES.values())
+        backup_var = tk.StringVar(value=BACKUP_MODES.get(self.cfg.get("backup_mode", "incremental"),
+                                                         backup_labels[0]))
+        ttkb.Combobox(row_backup, textvariable=backup_var, values=backup_labels,
+                      state="readonly", width=32).pack(side=LEFT)
+
         # 專案列表管理
         ttkb.Label(pad, text="已建立的專案：", font=("", 11)).pack(anchor=W, pady=(16, 4))
 
@@ -2165,6 +3240,10 @@ class App:
                     command=edit_proj).pack(side=LEFT, padx=(0, 8))
         ttkb.Button(proj_btn_row, text="備份專案文件", bootstyle="warning-outline",
                     command=self._backup_project).pack(side=LEFT)
+        ttkb.Button(proj_btn_row, text="從壓縮檔取出檔案", bootstyle="secondary-outline",
+                    command=lambda: self._extract_from_archive_dialog(dlg)).pack(side=LEFT, padx=(8, 0))
+        ttkb.Button(proj_btn_row, text="備份保留規則", bootstyle="secondary-outline",
+                    command=lambda: self._retention_dialog(dlg)).pack(side=LEFT, padx=(8, 0))
 
         def apply_settings():
             changed = False
@@ -2176,6 +3255,10 @@ class App:
             if new_ending and new_ending != self.cfg.get("ending_rule", "每次回覆結尾都要確認下一步"):
                 self.cfg["ending_rule"] = new_ending
                 changed = True
+            new_mode = next((k for k, v in BACKUP_MODES.items() if v == backup_var.get()), "incremental")
+            if new_mode != self.cfg.get("backup_mode", "incremental"):
+                self.cfg["backup_mode"] = new_mode
+                changed = True
             if changed:
                 save_config(self.cfg)
                 messagebox.showinfo("提示", "設定已儲存。主題變更將在下次啟動時生效。")